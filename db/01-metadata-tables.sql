@@ -7,6 +7,10 @@ CREATE TABLE users (
     name text NOT NULL
 );
 
+-- email and name prefix search of the management console
+CREATE INDEX idx_users_email_prefix ON users (lower(email) text_pattern_ops);
+CREATE INDEX idx_users_name_prefix ON users (lower(name) text_pattern_ops);
+
 -- 2 "providers" table
 -- -------------------------------------------------------------
 CREATE TABLE providers (
@@ -19,6 +23,11 @@ CREATE TABLE providers (
     immutable boolean NOT NULL
 );
 
+-- management console listing (ordered by name) and name prefix search
+CREATE INDEX idx_providers_name ON providers (name, id);
+CREATE INDEX idx_providers_name_prefix
+    ON providers (lower(name) text_pattern_ops);
+
 -- 3 "economies" table
 -- -------------------------------------------------------------
 CREATE TABLE economies (
@@ -34,7 +43,11 @@ CREATE TABLE economies (
 
 -- 4 "permissions" table
 -- permission can be given to a region XOR an economy
+-- granted year ranges of a scope never overlap, overlapping and adjacent
+-- grants are merged when they are inserted
 -- -------------------------------------------------------------
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 CREATE TABLE permissions (
     id bigserial PRIMARY KEY,
     provider_id bigint NOT NULL REFERENCES providers (id) ON DELETE CASCADE,
@@ -42,6 +55,8 @@ CREATE TABLE permissions (
     region char(3) REFERENCES regions (id),
     year_start integer NOT NULL,
     year_end integer NOT NULL,
+    years int4range NOT NULL
+        GENERATED ALWAYS AS (int4range(year_start, year_end, '[]')) STORED,
     footnote text,
     created_at timestamp DEFAULT NOW() NOT NULL
 
@@ -54,15 +69,22 @@ CREATE TABLE permissions (
     CONSTRAINT check_permission_year_start_end
     CHECK (
         year_end >= year_start
-    )
-);
+    ),
+
+    -- 2. no overlapping economy-based permissions, the GiST index also
+    -- serves `years @> year` permission checks
+    CONSTRAINT exclude_permissions_economy_overlap
+    EXCLUDE USING gist (
+        provider_id WITH =, economy_code WITH =, years WITH &&
+    ) WHERE (region IS NULL),
 
--- ensure uniqueness for economy-based permissions
-CREATE UNIQUE INDEX idx_permissions_unique_economy
-    ON permissions (provider_id, economy_code, year_start, year_end)
-    WHERE region IS NULL;
+    -- 3. no overlapping region-based permissions
+    CONSTRAINT exclude_permissions_region_overlap
+    EXCLUDE USING gist (
+        provider_id WITH =, region WITH =, years WITH &&
+    ) WHERE (economy_code IS NULL)
+);
 
--- ensure uniqueness for region-based permissions
-CREATE UNIQUE INDEX idx_permissions_unique_region
-    ON permissions (provider_id, region, year_start, year_end)
-    WHERE economy_code IS NULL;
+-- permission listings of a provider
+CREATE INDEX idx_permissions_provider
+    ON permissions (provider_id, year_start DESC, id DESC);
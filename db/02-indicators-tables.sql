@@ -2,6 +2,11 @@
 -- `economic_indicators`, `health_indicators`, and `environment_indicators`.
 -- A compatibility view `indicators` is provided (FULL OUTER JOIN) so existing
 -- queries expecting a single combined table continue to work.
+--
+-- The tables are partitioned by year ranges (06-indicator-partitions.sql),
+-- rows of years without a partition go to the `_default` partition. Write
+-- through the tables themselves, change tracking triggers do not see writes
+-- made to partitions directly (except TRUNCATE).
 -- -------------------------------------------------------------
 
 -- Economic indicators table
@@ -15,8 +20,15 @@ CREATE TABLE economic_indicators (
     trade real,
     agriculture_forestry_and_fishing real,
 
+    -- change feed bookkeeping (04-change-feed.sql)
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+
     PRIMARY KEY (provider_id, economy_code, year)
-);
+) PARTITION BY RANGE (year);
+
+CREATE TABLE economic_indicators_default
+    PARTITION OF economic_indicators DEFAULT;
 
 -- Health indicators table
 CREATE TABLE health_indicators (
@@ -31,8 +43,15 @@ CREATE TABLE health_indicators (
     safely_managed_drinking_water_services real,
     diabetes_prevalence real,
 
+    -- change feed bookkeeping (04-change-feed.sql)
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+
     PRIMARY KEY (provider_id, economy_code, year)
-);
+) PARTITION BY RANGE (year);
+
+CREATE TABLE health_indicators_default
+    PARTITION OF health_indicators DEFAULT;
 
 -- Environment indicators table
 CREATE TABLE environment_indicators (
@@ -47,8 +66,15 @@ CREATE TABLE environment_indicators (
     crop_production_index real,
     gdp_per_unit_of_energy_use real,
 
+    -- change feed bookkeeping (04-change-feed.sql)
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+
     PRIMARY KEY (provider_id, economy_code, year)
-);
+) PARTITION BY RANGE (year);
+
+CREATE TABLE environment_indicators_default
+    PARTITION OF environment_indicators DEFAULT;
 
 -- Compatibility view that presents a single combined view similar to the
 -- original `indicators` table. This keeps external queries/code working
@@ -0,0 +1,52 @@
+-- Data versions
+-- Change counters maintained by statement triggers, per table and, for tables
+-- holding economy data, per economy. A transaction changing rows increments
+-- the counters of the economies it touched (the '' counter for tables without
+-- an economy column, and for TRUNCATE) and notifies the `data_changes` channel
+-- with `{"table": ..., "economies": [...]}` once it commits. `economies` is
+-- null when the whole table may have changed.
+--
+-- The statement triggers only collect the touched economies, the counters
+-- are incremented by a deferred trigger when the transaction commits: once
+-- per transaction however many statements it ran (batches of single row
+-- statements), and in key order, so concurrent writers can not deadlock on
+-- the counter rows.
+--
+-- The version of a table, or of an economy's rows in it, is the sum of its
+-- counters. Counters are only ever incremented under a row lock, so versions
+-- grow in commit order.
+--
+-- Statement triggers of a partitioned table fire for statements on the table
+-- itself, except TRUNCATE: truncating it, or one of its partitions, fires the
+-- TRUNCATE triggers of the truncated partitions. These are therefore
+-- installed on the partitions, and count changes under the table's name.
+-- -------------------------------------------------------------
+CREATE TABLE data_versions (
+    table_name text NOT NULL,
+    economy_code text NOT NULL DEFAULT '',
+    version bigint NOT NULL,
+
+    PRIMARY KEY (table_name, economy_code)
+);
+
+-- a row per transaction with pending changes, until they are counted
+CREATE UNLOGGED TABLE data_version_commits (
+    xid xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+\ir functions/data-versions.sql
+
+CREATE CONSTRAINT TRIGGER data_version_commits_flush
+    AFTER INSERT ON data_version_commits
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION flush_data_versions();
+
+SELECT track_data_versions('regions');
+SELECT track_data_versions('income_levels');
+SELECT track_data_versions('users');
+SELECT track_data_versions('providers');
+SELECT track_data_versions('economies', 'code');
+SELECT track_data_versions('permissions', 'economy_code');
+SELECT track_data_versions('economic_indicators', 'economy_code');
+SELECT track_data_versions('health_indicators', 'economy_code');
+SELECT track_data_versions('environment_indicators', 'economy_code');
@@ -0,0 +1,29 @@
+-- Indicator change feed
+-- Indicator rows carry the time (`updated_at`) and the transaction
+-- (`change_xid`) of their last change, deleted rows leave a tombstone in
+-- `indicator_deletions`. A change feed client remembers the database snapshot
+-- of its last sync; rows and tombstones whose transaction is not visible in
+-- that snapshot changed since then, whatever order transactions committed in.
+--
+-- A tombstone is removed when its row is inserted again, so a key has either
+-- a row or a tombstone. TRUNCATE leaves tombstones of every truncated row.
+-- -------------------------------------------------------------
+CREATE TABLE indicator_deletions (
+    table_name text NOT NULL,
+    provider_id bigint NOT NULL,
+    economy_code char(3) NOT NULL,
+    year integer NOT NULL,
+    deleted_at timestamptz NOT NULL DEFAULT now(),
+    change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+
+    PRIMARY KEY (table_name, provider_id, economy_code, year)
+);
+
+CREATE INDEX idx_indicator_deletions_change
+    ON indicator_deletions (table_name, change_xid);
+
+\ir functions/change-feed.sql
+
+SELECT track_indicator_changes('economic_indicators');
+SELECT track_indicator_changes('health_indicators');
+SELECT track_indicator_changes('environment_indicators');
@@ -0,0 +1,21 @@
+-- Indicator revisions
+-- Every indicator table has an append-only `<table>_revisions` history next
+-- to it. Each write appends the new values of the changed rows, valid from
+-- the writing transaction's time; deleting a row appends a revision with
+-- `deleted` set. The value in effect at a time is the row's latest revision
+-- valid from then or earlier. Reads probe it for each key that may have had
+-- a row then: the keys of the current rows, and of deleted revisions (rows
+-- deleted, truncated or moved to another key since), which are indexed.
+--
+-- Writes of one transaction to a row collapse into a single revision, since
+-- they share its time. The indicator tables still hold the current values,
+-- so reads of current data do not touch the history.
+--
+-- A revisions table mirrors the indicator fields of its table, columns added
+-- to an indicator table must be added to its revisions table too.
+-- -------------------------------------------------------------
+\ir functions/indicator-revisions.sql
+
+SELECT track_indicator_revisions('economic_indicators');
+SELECT track_indicator_revisions('health_indicators');
+SELECT track_indicator_revisions('environment_indicators');
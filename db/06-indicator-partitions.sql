@@ -0,0 +1,68 @@
+-- Indicator partitions
+-- The indicator tables are partitioned by year, a decade per partition
+-- (`<table>_1960_1969`, ...). Queries filtering by year only scan the
+-- partitions of those years, and a period can be reloaded by truncating its
+-- partitions instead of deleting rows:
+--
+--     TRUNCATE economic_indicators_1990_1999;
+--
+-- which, like any TRUNCATE of indicator rows, is recorded by the data
+-- version, change feed and revision triggers.
+--
+-- Rows of years without a partition are kept in the `_default` partition
+-- until one is created for them with `create_indicator_partition`.
+-- -------------------------------------------------------------
+
+-- Create the partition of indicator table `tbl` holding years
+-- [year_from, year_to), moving its rows out of the default partition. The
+-- partition gets the TRUNCATE triggers of the default partition (statement
+-- triggers are not inherited, see 03-data-versions.sql).
+CREATE FUNCTION create_indicator_partition(tbl regclass, year_from integer,
+                                           year_to integer)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    name text := (SELECT relname FROM pg_class WHERE oid = tbl);
+    part text := format('%s_%s_%s', name, year_from, year_to - 1);
+    fallback regclass := (name || '_default')::regclass;
+    trig record;
+BEGIN
+    -- rows are moved between partitions directly, so the tracking triggers
+    -- of `tbl` do not record them as changes
+    EXECUTE format('CREATE TEMPORARY TABLE moved_indicators (LIKE %s)', tbl);
+    EXECUTE format('WITH moved AS (DELETE FROM %s '
+                   'WHERE year >= %s AND year < %s RETURNING *) '
+                   'INSERT INTO moved_indicators SELECT * FROM moved',
+                   fallback, year_from, year_to);
+
+    EXECUTE format('CREATE TABLE %I PARTITION OF %s '
+                   'FOR VALUES FROM (%s) TO (%s)',
+                   part, tbl, year_from, year_to);
+    EXECUTE format('INSERT INTO %I SELECT * FROM moved_indicators', part);
+    DROP TABLE moved_indicators;
+
+    FOR trig IN
+        SELECT tgname,
+               CASE WHEN tgtype & 2 <> 0 THEN 'BEFORE' ELSE 'AFTER' END
+                   AS timing,
+               tgfoid::regproc AS function,
+               (SELECT coalesce(string_agg(quote_literal(arg), ', '), '')
+                    FROM unnest(string_to_array(encode(tgargs, 'escape'),
+                                                '\000')) AS arg
+                    WHERE arg <> '') AS args
+        FROM pg_trigger
+        -- statement level TRUNCATE triggers
+        WHERE tgrelid = fallback AND NOT tgisinternal AND tgtype & 33 = 32
+    LOOP
+        EXECUTE format('CREATE TRIGGER %I %s TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION %s(%s)',
+                       trig.tgname, trig.timing, part, trig.function,
+                       trig.args);
+    END LOOP;
+END
+$$;
+
+SELECT create_indicator_partition(tbl, year, year + 10)
+    FROM unnest(ARRAY['economic_indicators', 'health_indicators',
+                      'environment_indicators']::regclass[]) AS tbl,
+         generate_series(1960, 2030, 10) AS year;
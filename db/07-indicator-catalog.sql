@@ -0,0 +1,39 @@
+-- Indicator catalog
+-- Indicators beyond the ones of the category tables (02-indicators-tables.sql)
+-- are stored in long format: `indicator_catalog` describes each series and
+-- `indicator_values` holds one row per (indicator, economy, year, provider).
+-- Adding a series is an INSERT into the catalog, it does not widen the rows
+-- every indicator query reads.
+--
+-- Values are read per indicator (the primary key) or per economy
+-- (`idx_indicator_values_economy`).
+-- -------------------------------------------------------------
+CREATE TABLE indicator_catalog (
+    id bigserial NOT NULL PRIMARY KEY,
+    -- WDI series code, e.g. 'SP.POP.TOTL'
+    code text NOT NULL UNIQUE,
+    name text NOT NULL,
+    unit text,
+    topic text,
+    description text
+);
+
+CREATE TABLE indicator_values (
+    indicator_id bigint NOT NULL
+        REFERENCES indicator_catalog (id) ON DELETE CASCADE,
+    provider_id bigint NOT NULL REFERENCES providers (id) ON DELETE CASCADE,
+    economy_code char(3) NOT NULL REFERENCES economies (code) ON DELETE CASCADE,
+    year integer NOT NULL,
+
+    value real NOT NULL,
+
+    PRIMARY KEY (indicator_id, provider_id, economy_code, year)
+);
+
+CREATE INDEX idx_indicator_values_economy
+    ON indicator_values (economy_code, indicator_id, year);
+CREATE INDEX idx_indicator_values_provider
+    ON indicator_values (provider_id);
+
+SELECT track_data_versions('indicator_catalog');
+SELECT track_data_versions('indicator_values', 'economy_code');
@@ -0,0 +1,86 @@
+-- Change feed functions, see 04-change-feed.sql.
+-- Shared by the schema and the migrations, every definition is
+-- `CREATE OR REPLACE`.
+-- -------------------------------------------------------------
+CREATE OR REPLACE FUNCTION touch_indicator() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at := now();
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END
+$$;
+
+-- TRUNCATE triggers are installed on the partitions of partitioned tables,
+-- see 03-data-versions.sql
+CREATE OR REPLACE FUNCTION record_indicator_deletions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    tbl name := trigger_table_name(TG_RELID);
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        EXECUTE format('INSERT INTO indicator_deletions '
+                       '(table_name, provider_id, economy_code, year) '
+                       'SELECT %L, provider_id, economy_code, year FROM %s '
+                       'ON CONFLICT (table_name, provider_id, economy_code, '
+                       'year) DO UPDATE SET deleted_at = now(), '
+                       'change_xid = pg_current_xact_id()',
+                       tbl, TG_RELID::regclass);
+    ELSE
+        INSERT INTO indicator_deletions
+            (table_name, provider_id, economy_code, year)
+            SELECT tbl, provider_id, economy_code, year
+            FROM old_rows
+        ON CONFLICT (table_name, provider_id, economy_code, year)
+            DO UPDATE SET deleted_at = now(),
+                          change_xid = pg_current_xact_id();
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION clear_indicator_deletions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM indicator_deletions d
+        USING new_rows n
+        WHERE d.table_name = TG_TABLE_NAME
+          AND (d.provider_id, d.economy_code, d.year)
+            = (n.provider_id, n.economy_code, n.year);
+
+    RETURN NULL;
+END
+$$;
+
+-- Install the change feed triggers and index on indicator table `tbl`.
+CREATE OR REPLACE FUNCTION track_indicator_changes(tbl regclass) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    name text := (SELECT relname FROM pg_class WHERE oid = tbl);
+    target regclass;
+BEGIN
+    EXECUTE format('CREATE INDEX %I ON %s (change_xid)',
+                   'idx_' || name || '_change', tbl);
+    EXECUTE format('CREATE TRIGGER %I BEFORE UPDATE ON %s FOR EACH ROW '
+                   'WHEN (OLD IS DISTINCT FROM NEW) '
+                   'EXECUTE FUNCTION touch_indicator()',
+                   name || '_touch', tbl);
+    EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %s '
+                   'REFERENCING OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION record_indicator_deletions()',
+                   name || '_deletions', tbl);
+    FOR target IN SELECT truncate_trigger_targets(tbl) LOOP
+        EXECUTE format('CREATE TRIGGER %I BEFORE TRUNCATE ON %s '
+                       'FOR EACH STATEMENT '
+                       'EXECUTE FUNCTION record_indicator_deletions()',
+                       name || '_truncations', target);
+    END LOOP;
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION clear_indicator_deletions()',
+                   name || '_undeletions', tbl);
+END
+$$;
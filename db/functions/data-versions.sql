@@ -0,0 +1,159 @@
+-- Data version functions, see 03-data-versions.sql.
+-- Shared by the schema and the migrations, every definition is
+-- `CREATE OR REPLACE`.
+-- -------------------------------------------------------------
+-- Tables to install the TRUNCATE triggers of `tbl` on: its leaf partitions
+-- if it is partitioned, itself otherwise.
+CREATE OR REPLACE FUNCTION truncate_trigger_targets(tbl regclass)
+RETURNS SETOF regclass
+LANGUAGE sql STABLE AS $$
+    SELECT relid FROM pg_partition_tree(tbl) WHERE isleaf
+    UNION ALL
+    SELECT tbl WHERE NOT EXISTS (SELECT FROM pg_partition_tree(tbl))
+$$;
+
+-- Name of the table a trigger fired for, that of the partitioned table for
+-- a partition.
+CREATE OR REPLACE FUNCTION trigger_table_name(relid oid) RETURNS name
+LANGUAGE sql STABLE AS $$
+    SELECT relname FROM pg_class
+        WHERE oid = coalesce(pg_partition_root(relid), relid)
+$$;
+
+-- Economies whose rows the transaction changed so far, by table: a json
+-- object kept in the transaction local setting `data_versions.pending`.
+CREATE OR REPLACE FUNCTION pending_data_versions() RETURNS jsonb
+LANGUAGE sql STABLE AS $$
+    SELECT coalesce(nullif(current_setting('data_versions.pending', true),
+                           ''), '{}')::jsonb
+$$;
+
+-- Add the economies a statement changed to the pending changes, the first
+-- change of a transaction schedules `flush_data_versions` at its commit.
+CREATE OR REPLACE FUNCTION bump_data_versions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    -- economy column of the table, passed as the trigger argument
+    economy text := coalesce(quote_ident(TG_ARGV[0]) || '::text', 'NULL');
+    touched text := format('SELECT coalesce(%s, '''') AS code', economy);
+    tbl name := trigger_table_name(TG_RELID);
+    pending jsonb := pending_data_versions();
+    economies text[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        economies := ARRAY[''];
+    ELSIF TG_OP = 'INSERT' THEN
+        EXECUTE format('SELECT array_agg(DISTINCT code) '
+                       'FROM (%s FROM new_rows) t', touched)
+            INTO economies;
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format('SELECT array_agg(DISTINCT code) '
+                       'FROM (%s FROM old_rows) t', touched)
+            INTO economies;
+    ELSE
+        EXECUTE format('SELECT array_agg(DISTINCT code) '
+                       'FROM (%1$s FROM new_rows UNION ALL '
+                       '%1$s FROM old_rows) t', touched)
+            INTO economies;
+    END IF;
+
+    -- the statement changed no rows
+    IF economies IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF pending = '{}' THEN
+        INSERT INTO data_version_commits DEFAULT VALUES;
+    END IF;
+
+    PERFORM set_config('data_versions.pending', jsonb_set(
+        pending, ARRAY[tbl::text],
+        (SELECT jsonb_agg(DISTINCT code) FROM (
+            SELECT jsonb_array_elements_text(
+                coalesce(pending -> tbl::text, '[]'))
+            UNION ALL
+            SELECT unnest(economies)
+        ) t (code))
+    )::text, true);
+
+    RETURN NULL;
+END
+$$;
+
+-- Count the pending changes of the committing transaction: increment the
+-- counters of every (table, economy) it changed at once, in key order, and
+-- notify once per table. Notifications listing more economies are sent with
+-- null `economies` (pg_notify payloads are limited to 8000 bytes).
+CREATE OR REPLACE FUNCTION flush_data_versions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    pending jsonb := pending_data_versions();
+    changed record;
+BEGIN
+    PERFORM set_config('data_versions.pending', '', true);
+    DELETE FROM data_version_commits WHERE xid = NEW.xid;
+
+    INSERT INTO data_versions AS v (table_name, economy_code, version)
+        SELECT t.key, e.code, 1
+        FROM jsonb_each(pending) AS t,
+             jsonb_array_elements_text(t.value) AS e (code)
+        ORDER BY 1, 2
+    ON CONFLICT (table_name, economy_code)
+        DO UPDATE SET version = v.version + 1;
+
+    FOR changed IN
+        SELECT key AS tbl,
+               ARRAY(SELECT jsonb_array_elements_text(value) ORDER BY 1)
+                   AS economies
+        FROM jsonb_each(pending)
+        ORDER BY key
+    LOOP
+        PERFORM pg_notify('data_changes', json_build_object(
+            'table', changed.tbl,
+            'economies', CASE
+                WHEN '' = ANY (changed.economies)
+                     OR cardinality(changed.economies) > 500
+                    THEN NULL
+                ELSE changed.economies
+            END
+        )::text);
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+-- Install the data version triggers on `tbl`, `economy_column` names the
+-- column holding the economy code of its rows.
+CREATE OR REPLACE FUNCTION track_data_versions(tbl regclass,
+                                    economy_column text DEFAULT NULL)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    name text := (SELECT relname FROM pg_class WHERE oid = tbl);
+    args text := coalesce(quote_literal(economy_column), '');
+    target regclass;
+BEGIN
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION '
+                   'bump_data_versions(%s)',
+                   name || '_versions_insert', tbl, args);
+    EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %s '
+                   'REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION '
+                   'bump_data_versions(%s)',
+                   name || '_versions_update', tbl, args);
+    EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %s '
+                   'REFERENCING OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION '
+                   'bump_data_versions(%s)',
+                   name || '_versions_delete', tbl, args);
+    FOR target IN SELECT truncate_trigger_targets(tbl) LOOP
+        EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %s '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION '
+                       'bump_data_versions(%s)',
+                       name || '_versions_truncate', target, args);
+    END LOOP;
+END
+$$;
@@ -0,0 +1,134 @@
+-- Indicator revision functions, see 05-indicator-revisions.sql.
+-- Shared by the schema and the migrations, every definition is
+-- `CREATE OR REPLACE`.
+-- -------------------------------------------------------------
+-- indicator field columns of revisions table `revisions`
+CREATE OR REPLACE FUNCTION indicator_revision_fields(revisions regclass)
+RETURNS SETOF name
+LANGUAGE sql STABLE AS $$
+    SELECT attname FROM pg_attribute
+        WHERE attrelid = revisions AND attnum > 0 AND NOT attisdropped
+          AND attname NOT IN ('provider_id', 'economy_code', 'year',
+                              'valid_from', 'deleted')
+        ORDER BY attnum
+$$;
+
+-- TRUNCATE triggers are installed on the partitions of partitioned tables,
+-- see 03-data-versions.sql
+CREATE OR REPLACE FUNCTION record_indicator_revisions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    revisions text := trigger_table_name(TG_RELID) || '_revisions';
+    fields text;
+    excluded text;
+    nulls text;
+BEGIN
+    SELECT string_agg(quote_ident(f), ', '),
+           string_agg(format('%1$I = EXCLUDED.%1$I', f), ', '),
+           string_agg('NULL', ', ')
+        INTO fields, excluded, nulls
+        FROM indicator_revision_fields(revisions::regclass) AS f;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- rows an update left unchanged get no revision
+        EXECUTE format('INSERT INTO %1$I AS r (provider_id, economy_code, '
+                       'year, %2$s, valid_from) '
+                       'SELECT *, now() FROM ('
+                       'SELECT provider_id, economy_code, year, %2$s '
+                       'FROM new_rows %3$s) t '
+                       'ON CONFLICT (provider_id, economy_code, year, '
+                       'valid_from) DO UPDATE SET %4$s, deleted = false',
+                       revisions, fields,
+                       CASE WHEN TG_OP = 'UPDATE' THEN format(
+                           'EXCEPT SELECT provider_id, economy_code, year, '
+                           '%s FROM old_rows', fields)
+                       ELSE '' END,
+                       excluded);
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE', 'TRUNCATE') THEN
+        EXECUTE format('INSERT INTO %1$I (provider_id, economy_code, year, '
+                       '%2$s, valid_from, deleted) '
+                       'SELECT provider_id, economy_code, year, %3$s, '
+                       'now(), true FROM (%4$s) t '
+                       'ON CONFLICT (provider_id, economy_code, year, '
+                       'valid_from) DO UPDATE SET %5$s, deleted = true',
+                       revisions, fields, nulls,
+                       CASE TG_OP
+                           -- keys an update moved rows away from
+                           WHEN 'UPDATE' THEN
+                               'SELECT provider_id, economy_code, year '
+                               'FROM old_rows EXCEPT '
+                               'SELECT provider_id, economy_code, year '
+                               'FROM new_rows'
+                           WHEN 'DELETE' THEN
+                               'SELECT provider_id, economy_code, year '
+                               'FROM old_rows'
+                           ELSE format('SELECT provider_id, economy_code, '
+                                       'year FROM %s', TG_RELID::regclass)
+                       END,
+                       excluded);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+-- Create the revisions table of indicator table `tbl`, seeded with its
+-- current rows (valid from their last change), and install its triggers. An
+-- existing revisions table is kept, e.g. when `tbl` was recreated.
+CREATE OR REPLACE FUNCTION track_indicator_revisions(tbl regclass) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    name text := (SELECT relname FROM pg_class WHERE oid = tbl);
+    revisions text := name || '_revisions';
+    fields text;
+    target regclass;
+BEGIN
+    IF to_regclass(revisions) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %s, '
+                       'valid_from timestamptz NOT NULL, '
+                       'deleted boolean NOT NULL DEFAULT false, '
+                       'PRIMARY KEY (provider_id, economy_code, year, '
+                       'valid_from))',
+                       revisions, tbl);
+        EXECUTE format('ALTER TABLE %I DROP COLUMN updated_at, '
+                       'DROP COLUMN change_xid', revisions);
+
+        SELECT string_agg(quote_ident(f), ', ') INTO fields
+            FROM indicator_revision_fields(revisions::regclass) AS f;
+        EXECUTE format('INSERT INTO %1$I (provider_id, economy_code, year, '
+                       '%2$s, valid_from) '
+                       'SELECT provider_id, economy_code, year, %2$s, '
+                       'updated_at FROM %3$s',
+                       revisions, fields, tbl);
+    END IF;
+
+    -- keys of rows deleted since, probed by reads of past rows
+    EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I '
+                   '(provider_id, economy_code, year) WHERE deleted',
+                   revisions || '_deleted', revisions);
+
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %s '
+                   'REFERENCING NEW TABLE AS new_rows '
+                   'FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION record_indicator_revisions()',
+                   name || '_revisions_insert', tbl);
+    EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %s '
+                   'REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION record_indicator_revisions()',
+                   name || '_revisions_update', tbl);
+    EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %s '
+                   'REFERENCING OLD TABLE AS old_rows '
+                   'FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION record_indicator_revisions()',
+                   name || '_revisions_delete', tbl);
+    FOR target IN SELECT truncate_trigger_targets(tbl) LOOP
+        EXECUTE format('CREATE TRIGGER %I BEFORE TRUNCATE ON %s '
+                       'FOR EACH STATEMENT '
+                       'EXECUTE FUNCTION record_indicator_revisions()',
+                       name || '_revisions_truncate', target);
+    END LOOP;
+END
+$$;
@@ -0,0 +1,67 @@
+-- Migrates a database created before permissions were stored as ranges.
+--
+-- Adds the `years` range column, merges overlapping and adjacent grants of
+-- each scope (the merged grant keeps the smallest id) and replaces the exact
+-- tuple unique indexes with overlap exclusion constraints.
+--
+-- psql "$DATABASE_URL" -f db/migrations/001-permission-ranges.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE permissions
+    ADD COLUMN years int4range NOT NULL
+        GENERATED ALWAYS AS (int4range(year_start, year_end, '[]')) STORED;
+
+-- merge overlapping and adjacent grants
+CREATE TEMPORARY TABLE merged_permissions ON COMMIT DROP AS
+SELECT
+    min(p.id) AS id,
+    p.provider_id,
+    p.economy_code,
+    p.region,
+    lower(m.years) AS year_start,
+    upper(m.years) - 1 AS year_end,
+    (array_agg(p.footnote ORDER BY p.id)
+        FILTER (WHERE p.footnote IS NOT NULL))[1] AS footnote,
+    min(p.created_at) AS created_at
+FROM (
+    SELECT provider_id, economy_code, region,
+           unnest(range_agg(years)) AS years
+    FROM permissions
+    GROUP BY provider_id, economy_code, region
+) m
+JOIN permissions p
+    ON p.provider_id = m.provider_id
+   AND p.economy_code IS NOT DISTINCT FROM m.economy_code
+   AND p.region IS NOT DISTINCT FROM m.region
+   AND p.years <@ m.years
+GROUP BY p.provider_id, p.economy_code, p.region, m.years;
+
+DELETE FROM permissions;
+
+INSERT INTO permissions
+    (id, provider_id, economy_code, region, year_start, year_end, footnote,
+     created_at)
+SELECT id, provider_id, economy_code, region, year_start, year_end, footnote,
+       created_at
+FROM merged_permissions;
+
+DROP INDEX IF EXISTS idx_permissions_unique_economy;
+DROP INDEX IF EXISTS idx_permissions_unique_region;
+
+ALTER TABLE permissions
+    ADD CONSTRAINT exclude_permissions_economy_overlap
+    EXCLUDE USING gist (
+        provider_id WITH =, economy_code WITH =, years WITH &&
+    ) WHERE (region IS NULL),
+    ADD CONSTRAINT exclude_permissions_region_overlap
+    EXCLUDE USING gist (
+        provider_id WITH =, region WITH =, years WITH &&
+    ) WHERE (economy_code IS NULL);
+
+CREATE INDEX IF NOT EXISTS idx_permissions_provider
+    ON permissions (provider_id, year_start DESC, id DESC);
+
+COMMIT;
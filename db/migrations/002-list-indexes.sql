@@ -0,0 +1,12 @@
+-- Indexes for the keyset-paginated, searchable management listings.
+--
+-- psql "$DATABASE_URL" -f db/migrations/002-list-indexes.sql
+-- -------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_users_email_prefix
+    ON users (lower(email) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_users_name_prefix
+    ON users (lower(name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_providers_name ON providers (name, id);
+CREATE INDEX IF NOT EXISTS idx_providers_name_prefix
+    ON providers (lower(name) text_pattern_ops);
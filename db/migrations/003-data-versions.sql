@@ -0,0 +1,10 @@
+-- Adds the data version counters and `data_changes` notifications of
+-- db/03-data-versions.sql to a database created before them.
+--
+-- psql "$DATABASE_URL" -f db/migrations/003-data-versions.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+\ir ../03-data-versions.sql
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Adds the change tracking columns of the indicator tables and the change
+-- feed schema of db/04-change-feed.sql to a database created before them.
+-- Existing rows are stamped with the migration's time and transaction.
+--
+-- psql "$DATABASE_URL" -f db/migrations/004-change-feed.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+ALTER TABLE economic_indicators
+    ADD COLUMN updated_at timestamptz NOT NULL DEFAULT now(),
+    ADD COLUMN change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE health_indicators
+    ADD COLUMN updated_at timestamptz NOT NULL DEFAULT now(),
+    ADD COLUMN change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE environment_indicators
+    ADD COLUMN updated_at timestamptz NOT NULL DEFAULT now(),
+    ADD COLUMN change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+\ir ../04-change-feed.sql
+
+COMMIT;
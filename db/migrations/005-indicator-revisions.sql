@@ -0,0 +1,11 @@
+-- Adds the indicator revision history of db/05-indicator-revisions.sql to a
+-- database created before it. The current rows become the first revisions,
+-- valid from their last change (db/migrations/004-change-feed.sql).
+--
+-- psql "$DATABASE_URL" -f db/migrations/005-indicator-revisions.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+\ir ../05-indicator-revisions.sql
+
+COMMIT;
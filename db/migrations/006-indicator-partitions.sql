@@ -0,0 +1,82 @@
+-- Partitions the indicator tables of a database created before they were
+-- partitioned (db/02-indicators-tables.sql, db/06-indicator-partitions.sql).
+--
+-- The tables are recreated as partitioned tables and their rows copied over,
+-- keeping their change tracking columns, so the copy is not recorded as a
+-- change. The tracking functions are replaced by their partition aware
+-- versions (db/functions/) and the triggers reinstalled.
+--
+-- psql "$DATABASE_URL" -f db/migrations/006-indicator-partitions.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+\ir ../functions/data-versions.sql
+\ir ../functions/change-feed.sql
+\ir ../functions/indicator-revisions.sql
+
+DROP VIEW indicators;
+
+DO $$
+DECLARE
+    tbl text;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['economic_indicators', 'health_indicators',
+                               'environment_indicators'] LOOP
+        EXECUTE format('ALTER TABLE %1$I RENAME TO %1$I_unpartitioned',
+                       tbl);
+        EXECUTE format('ALTER INDEX %1$I_pkey '
+                       'RENAME TO %1$I_unpartitioned_pkey', tbl);
+
+        EXECUTE format('CREATE TABLE %1$I ('
+                       'LIKE %1$I_unpartitioned INCLUDING DEFAULTS, '
+                       'PRIMARY KEY (provider_id, economy_code, year), '
+                       'FOREIGN KEY (provider_id) REFERENCES providers (id) '
+                       'ON DELETE CASCADE, '
+                       'FOREIGN KEY (economy_code) '
+                       'REFERENCES economies (code) ON DELETE CASCADE'
+                       ') PARTITION BY RANGE (year)', tbl);
+        EXECUTE format('CREATE TABLE %1$I_default PARTITION OF %1$I DEFAULT',
+                       tbl);
+        EXECUTE format('INSERT INTO %1$I_default '
+                       'SELECT * FROM %1$I_unpartitioned', tbl);
+        EXECUTE format('DROP TABLE %I_unpartitioned', tbl);
+
+        PERFORM track_data_versions(tbl, 'economy_code');
+        PERFORM track_indicator_changes(tbl);
+        PERFORM track_indicator_revisions(tbl);
+    END LOOP;
+END
+$$;
+
+CREATE VIEW indicators AS
+    SELECT
+        COALESCE(ei.provider_id, hi.provider_id, env.provider_id) AS provider_id,
+        COALESCE(ei.economy_code, hi.economy_code, env.economy_code) AS economy_code,
+        COALESCE(ei.year, hi.year, env.year) AS year,
+
+        ei.industry,
+        ei.gdp_per_capita,
+        ei.trade,
+        ei.agriculture_forestry_and_fishing,
+
+        hi.community_health_workers,
+        hi.prevalence_of_undernourishment,
+        hi.prevalence_of_severe_food_insecurity,
+        hi.basic_handwashing_facilities,
+        hi.safely_managed_drinking_water_services,
+        hi.diabetes_prevalence,
+
+        env.energy_use,
+        env.access_to_electricity,
+        env.alternative_and_nuclear_energy,
+        env.permanent_cropland,
+        env.crop_production_index,
+        env.gdp_per_unit_of_energy_use
+    FROM economic_indicators ei
+    FULL OUTER JOIN health_indicators hi USING (provider_id, economy_code, year)
+    FULL OUTER JOIN environment_indicators env USING (provider_id, economy_code, year);
+
+
+\ir ../06-indicator-partitions.sql
+
+COMMIT;
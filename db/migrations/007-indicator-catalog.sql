@@ -0,0 +1,10 @@
+-- Adds the indicator catalog and long-format value store of
+-- db/07-indicator-catalog.sql to a database created before it.
+--
+-- psql "$DATABASE_URL" -f db/migrations/007-indicator-catalog.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+\ir ../07-indicator-catalog.sql
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Counts data version changes once per transaction, at commit
+-- (db/03-data-versions.sql), in databases whose triggers counted them per
+-- statement.
+--
+-- psql "$DATABASE_URL" -f db/migrations/008-data-version-commits.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+CREATE UNLOGGED TABLE IF NOT EXISTS data_version_commits (
+    xid xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+\ir ../functions/data-versions.sql
+
+DROP TRIGGER IF EXISTS data_version_commits_flush ON data_version_commits;
+CREATE CONSTRAINT TRIGGER data_version_commits_flush
+    AFTER INSERT ON data_version_commits
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION flush_data_versions();
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Indexes the deleted revisions of the indicator revisions tables
+-- (db/05-indicator-revisions.sql), the keys `as_of` reads probe besides the
+-- current rows.
+--
+-- psql "$DATABASE_URL" -f db/migrations/009-revision-deletions.sql
+-- -------------------------------------------------------------
+BEGIN;
+
+\ir ../functions/indicator-revisions.sql
+
+CREATE INDEX IF NOT EXISTS economic_indicators_revisions_deleted
+    ON economic_indicators_revisions (provider_id, economy_code, year)
+    WHERE deleted;
+CREATE INDEX IF NOT EXISTS health_indicators_revisions_deleted
+    ON health_indicators_revisions (provider_id, economy_code, year)
+    WHERE deleted;
+CREATE INDEX IF NOT EXISTS environment_indicators_revisions_deleted
+    ON environment_indicators_revisions (provider_id, economy_code, year)
+    WHERE deleted;
+
+COMMIT;
@@ -1,10 +1,13 @@
-from fixtures import l01_download, l02_misc, l03_economies, l04_worldbank
+from fixtures import l01_download, l02_misc, l03_economies, l04_worldbank, \
+    l05_series
 
 from src.state import from_env
+from src.metrics import FIXTURE_STEP_SECONDS, fixture_registry
 from src import log
 
 from typing import Optional, Tuple
 from dotenv import load_dotenv
+from time import perf_counter
 import asyncio
 import os
 
@@ -15,6 +18,7 @@ PIPELINE = [
     ('misc', l02_misc.load),
     ('economies', l03_economies.load),
     ('worldbank', l04_worldbank.load),
+    ('series', l05_series.load),
     ('end', None)
 ]
 
@@ -53,10 +57,14 @@ async def run_migration(name, func, state):
         save_step_status(name, None)
 
     while True:
+        start = perf_counter()
         try:
             await run()
             log.info(f"Done '{name}'")
 
+            FIXTURE_STEP_SECONDS.set(perf_counter() - start, step=name)
+            fixture_registry.write_textfile()
+
             break
         except Exception as err:
             log.error(f"An error occured during '{name}'",
@@ -2,6 +2,7 @@ from fixtures.l01_download import ECONOMIES_FILE_PATH
 
 from src import log
 from src.dto import EconomyCreateDto
+from src.metrics import FIXTURE_ROWS
 from src.state import State
 
 import json
@@ -58,9 +59,11 @@ async def load(state: State, *_):
                     lng=lng_val
                 ))
             success += 1
+            FIXTURE_ROWS.inc(step='economies', outcome='inserted')
 
         except Exception as e:
             log.error(f"Skipping {item.get('id', 'unknown')}: {e}")
             skipped += 1
+            FIXTURE_ROWS.inc(step='economies', outcome='skipped')
 
     log.info(f"Load Complete. Inserted: {success}, Skipped/Error: {skipped}")
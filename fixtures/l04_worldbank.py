@@ -2,36 +2,18 @@ from fixtures.l01_download import DATA_DIR
 
 from src import log
 from src.dto import IndicatorCreateDto
+from src.indicators import WDI_FIELDS
+from src.metrics import FIXTURE_ROWS, fixture_registry
 from src.state import State
 
 import csv
 import os
 from collections import defaultdict
+from time import perf_counter
 
 
-INDICATOR_MAPPING = {
-    # health
-    'SH.MED.NUMW.P3': 'community_health_workers',
-    'SN.ITK.DEFC.ZS': 'prevalence_of_undernourishment',
-    'SN.ITK.SVFI.ZS': 'prevalence_of_severe_food_insecurity',
-    'SH.STA.HYGN.ZS': 'basic_handwashing_facilities',
-    'SH.H2O.SMDW.ZS': 'safely_managed_drinking_water_services',
-    'SH.STA.DIAB.ZS': 'diabetes_prevalence',
-
-    # economic
-    'NV.IND.TOTL.ZS': 'industry',
-    'NY.GDP.PCAP.CD': 'gdp_per_capita',
-    'NE.TRD.GNFS.ZS': 'trade',
-    'NV.AGR.TOTL.ZS': 'agriculture_forestry_and_fishing',
-
-    # environment
-    'EG.USE.PCAP.KG.OE': 'energy_use',
-    'EG.ELC.ACCS.ZS': 'access_to_electricity',
-    'EG.USE.COMM.CL.ZS': 'alternative_and_nuclear_energy',
-    'AG.LND.CROP.ZS': 'permanent_cropland',
-    'AG.PRD.CROP.XD': 'crop_production_index',
-    'EG.GDP.PUSE.KO.PP.KD': 'gdp_per_unit_of_energy_use'
-}
+# WDI series code -> indicator field
+INDICATOR_MAPPING = WDI_FIELDS
 
 
 async def load(state: State, *_):
@@ -74,6 +56,7 @@ async def load(state: State, *_):
 
     success = 0
     skipped = 0
+    start = perf_counter()
 
     for (country_code, year), fields in data_buffer.items():
         try:
@@ -86,12 +69,17 @@ async def load(state: State, *_):
 
             await state.indicator_service.create(dto)
             success += 1
+            FIXTURE_ROWS.inc(step='worldbank', outcome='inserted')
 
             if success % 1000 == 0:
-                log.info(f"Inserted {success} indicators...")
+                rate = success / (perf_counter() - start)
+                log.info(f"Inserted {success} indicators...",
+                         rows_per_second=round(rate))
+                fixture_registry.write_textfile()
 
         except Exception as e:
             log.error(f"Skipping {country_code}-{year}: {e}")
             skipped += 1
+            FIXTURE_ROWS.inc(step='worldbank', outcome='skipped')
 
     log.info(f"Load Complete. Inserted: {success}, Skipped/Error: {skipped}")
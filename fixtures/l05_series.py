@@ -0,0 +1,108 @@
+from fixtures.l01_download import DATA_DIR
+
+from src import log
+from src.dto import IndicatorDefinitionCreateDto, IndicatorValueCreateDto
+from src.metrics import FIXTURE_ROWS
+from src.state import State
+
+import csv
+import os
+
+
+# WDI series loaded into the indicator catalog, overridden by the
+# comma separated `WDI_SERIES` environment variable
+DEFAULT_SERIES = [
+    'SP.POP.TOTL',
+    'SP.DYN.LE00.IN',
+    'NY.GDP.MKTP.CD',
+    'SL.UEM.TOTL.ZS',
+    'FP.CPI.TOTL.ZG',
+    'SE.PRM.ENRR',
+]
+
+BATCH_SIZE = 5000
+
+
+def series_codes() -> list:
+    value = os.environ.get('WDI_SERIES')
+    if not value:
+        return DEFAULT_SERIES
+    return [code.strip() for code in value.split(',') if code.strip()]
+
+
+async def load(state: State, *_):
+    codes = set(series_codes())
+    provider_id = 1
+
+    definitions = []
+    with open(os.path.join(DATA_DIR, "WDISeries.csv"), mode='r',
+              encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            if row.get('Series Code') not in codes:
+                continue
+
+            definitions.append(IndicatorDefinitionCreateDto(
+                code=row['Series Code'],
+                name=row.get('Indicator Name') or row['Series Code'],
+                unit=row.get('Unit of measure') or None,
+                topic=row.get('Topic') or None,
+                description=row.get('Long definition') or None
+            ))
+
+    await state.indicator_catalog_service.upsert_many(definitions)
+    ids = {
+        d.code: d.id for d in
+        await state.indicator_catalog_service.repo.get_by_codes(list(codes))
+    }
+    log.info(f"{len(ids)} catalog series ready.")
+
+    economies = {
+        e.code for e in await state.economy_service.list(100000, 0)
+    }
+
+    batch = []
+    loaded = 0
+    skipped = 0
+
+    async def flush():
+        nonlocal loaded
+        await state.indicator_value_service.upsert_many(batch)
+        loaded += len(batch)
+        FIXTURE_ROWS.inc(len(batch), step='series', outcome='inserted')
+        batch.clear()
+
+    with open(os.path.join(DATA_DIR, "WDICSV.csv"), mode='r',
+              encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            indicator_id = ids.get(row.get('Indicator Code', ''))
+            if indicator_id is None:
+                continue
+
+            country_code = row.get('Country Code', '')
+            if country_code not in economies:
+                skipped += 1
+                continue
+
+            for year_col, value in row.items():
+                if not year_col.isdigit() or not value:
+                    continue
+
+                try:
+                    batch.append(IndicatorValueCreateDto(
+                        indicator_id=indicator_id,
+                        provider_id=provider_id,
+                        economy_code=country_code,
+                        year=int(year_col),
+                        value=float(value)
+                    ))
+                except ValueError:
+                    continue
+
+            if len(batch) >= BATCH_SIZE:
+                await flush()
+
+    if batch:
+        await flush()
+
+    log.info(f"Load Complete. Inserted: {loaded}, Skipped series of "
+             f"unknown economies: {skipped}")
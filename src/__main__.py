@@ -1,11 +1,11 @@
 from src.app import create_app
+from src.asgi import create_asgi_app
 from src.state import from_env
 
 import os
 import asyncio
 from dotenv import load_dotenv
 import uvicorn
-from asgiref.wsgi import WsgiToAsgi
 
 
 load_dotenv()
@@ -21,7 +21,7 @@ async def main():
 
     flask_app = create_app(state)
 
-    app = WsgiToAsgi(flask_app)
+    app = create_asgi_app(flask_app, state)
 
     config = uvicorn.Config(
         app,
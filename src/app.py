@@ -1,9 +1,17 @@
 """Flask app creation and bootsrap."""
 
-from src import log
+from src import log, tracing
+from src.compression import ResponseCompressor
+from src.metrics import RequestMetrics, observe_acquire, observe_query, \
+    read_textfile, registry
+from src.middleware import metrics_authorize
+from src.repo.instrumentation import instrumentation
+from src.repo.pool import pool_ready
+from src.deadline import ClientDisconnected, RequestDeadlines
 from src.error import AppError, \
     error_handler, validation_error_handler, \
-    not_found_error_handler, unspecified_error_handler
+    not_found_error_handler, unspecified_error_handler, \
+    timeout_error_handler, client_disconnected_handler
 from src.routes import internal_routes, management_routes, portal_routes, public_routes
 from src.state import State
 
@@ -13,13 +21,16 @@ from src.handlers import (
     EconomyHandler,
     PermissionHandler,
     IndicatorHandler,
+    IndicatorCatalogHandler,
+    IndicatorValueHandler,
     PortalHandler,
     PublicHandler
 )
 from src.service import PublicService
 
 from pydantic_core import ValidationError
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, send_from_directory
+import asyncpg
 import time
 
 
@@ -30,8 +41,42 @@ def create_app(state: State):
     app.register_error_handler(AppError, error_handler)
     app.register_error_handler(404, not_found_error_handler)
     app.register_error_handler(ValidationError, validation_error_handler)
+    app.register_error_handler(TimeoutError, timeout_error_handler)
+    app.register_error_handler(asyncpg.QueryCanceledError,
+                               timeout_error_handler)
+    app.register_error_handler(ClientDisconnected,
+                               client_disconnected_handler)
     app.register_error_handler(Exception, unspecified_error_handler)
 
+    deadlines = RequestDeadlines(state.query_timeout_ms / 1000, {
+        'public': state.public_query_timeout_ms / 1000
+    })
+    app.before_request(deadlines.before_request)
+    app.teardown_request(deadlines.teardown_request)
+
+    if state.trace_requests:
+        mode = state.trace_requests.lower()
+        if mode not in ('header', 'log', 'both'):
+            raise ValueError("TRACE_REQUESTS must be one of 'header', 'log' "
+                             "or 'both'.")
+
+        tracer = tracing.RequestTracer(header=mode in ('header', 'both'),
+                                       log_line=mode in ('log', 'both'))
+        app.before_request(tracer.before_request)
+        app.after_request(tracer.after_request)
+
+        instrumentation.add_hook(query_hook=tracing.record_query)
+        tracing.enabled = True
+        log.info("request tracing enabled", mode=mode)
+
+    request_metrics = RequestMetrics()
+    app.before_request(request_metrics.before_request)
+    app.after_request(request_metrics.after_request)
+
+    compressor = ResponseCompressor(min_size=state.compression_min_size,
+                                    level=state.compression_level)
+    app.after_request(compressor.after_request)
+
     start_time = time.time()
 
     def index():
@@ -39,17 +84,60 @@ def create_app(state: State):
     app.add_url_rule("/", view_func=index)
 
     def status_handler():
-        return jsonify({
+        status = {
             'message': "OK",
-            'uptime': int(time.time() - start_time)
-        })
+            'uptime': int(time.time() - start_time),
+            'pool': instrumentation.pool_stats(state.pool)
+        }
+        if state.read_pool is not None:
+            status['read_pool'] = state.read_pool.stats()
+        if state.response_cache is not None:
+            status['cache'] = state.response_cache.stats()
+        if state.data_changes is not None:
+            status['data_changes'] = state.data_changes.stats()
+        return jsonify(status)
     app.add_url_rule("/status", view_func=status_handler)
 
+    async def ready_handler():
+        # liveness is /status, readiness also needs a working database
+        ready = await pool_ready(state.pool)
+        return jsonify({
+            'ready': ready,
+            'pool': instrumentation.pool_stats(state.pool)
+        }), 200 if ready else 503
+    app.add_url_rule("/status/ready", view_func=ready_handler)
+
+    if state.metrics_token is not None:
+        instrumentation.add_hook(query_hook=observe_query,
+                                 acquire_hook=observe_acquire)
+
+        registry.gauge('db_pool_size', "Open pool connections.",
+                       callback=state.pool.get_size)
+        registry.gauge('db_pool_idle', "Idle pool connections.",
+                       callback=state.pool.get_idle_size)
+        registry.gauge('db_pool_max_size', "Pool connection limit.",
+                       callback=state.pool.get_max_size)
+        registry.gauge('db_pool_waiters',
+                       "Callers waiting for a pool connection.",
+                       callback=lambda: instrumentation.waiters)
+
+        authorize = metrics_authorize(state.metrics_token)
+
+        def metrics_handler():
+            authorize()
+            return Response(registry.render() + read_textfile(),
+                            mimetype='text/plain; version=0.0.4')
+        app.add_url_rule("/metrics", view_func=metrics_handler)
+        log.info("registered metrics route")
+
     provider_handler = ProviderHandler(state.provider_service)
     user_handler = UserHandler(state.user_service)
     economy_handler = EconomyHandler(state.economy_service)
     permission_handler = PermissionHandler(state.permission_service)
     indicator_handler = IndicatorHandler(state.indicator_service)
+    catalog_handler = IndicatorCatalogHandler(
+        state.indicator_catalog_service)
+    value_handler = IndicatorValueHandler(state.indicator_value_service)
 
     # Portal handler needs multiple services
     portal_handler = PortalHandler(
@@ -57,12 +145,15 @@ def create_app(state: State):
         state.provider_service,
         state.permission_service,
         state.indicator_service,
-        state.jwt_secret
+        state.jwt_keyring
     )
 
     # Public handler
-    public_service = PublicService(state.pool)
-    public_handler = PublicHandler(public_service)
+    public_service = PublicService(state.pool, state.read_pool)
+    public_handler = PublicHandler(public_service, state.response_cache,
+                                   ttl=state.cache_ttl,
+                                   reference_ttl=state.cache_reference_ttl,
+                                   compressor=compressor)
 
     if state.internal_access_token is not None:
         log.info("registered internal access routes")
@@ -71,7 +162,9 @@ def create_app(state: State):
                                                user_handler,
                                                economy_handler,
                                                permission_handler,
-                                               indicator_handler))
+                                               indicator_handler,
+                                               catalog_handler,
+                                               value_handler))
     else:
         log.info("no internal access token provided, skipped internal routes")
 
@@ -80,7 +173,7 @@ def create_app(state: State):
                                              user_handler,
                                              permission_handler))
 
-    app.register_blueprint(portal_routes(state.jwt_secret,
+    app.register_blueprint(portal_routes(state.jwt_keyring,
                                          portal_handler))
 
     # Public routes (no auth required)
@@ -0,0 +1,245 @@
+"""ASGI adapter serving the Flask application.
+
+asgiref's `WsgiToAsgi` runs every request on one thread-sensitive thread, so
+requests are served one at a time (and concurrent ones can fail with
+"CurrentThreadExecutor already quit or is broken"). `AsgiApp` is the same
+adapter (its environ and `start_response` are asgiref's), except that each
+request runs on a worker thread of a dedicated pool, while its async views
+still run on the server's event loop where the database pool lives: the
+thread is started by asgiref's `SyncToAsync`, so Flask's `async_to_sync`
+hands the views back to that loop.
+
+The adapter also watches for the client disconnecting while its request is
+served, so the request's queries can be cancelled (see `src.deadline`).
+
+`SurfaceLimiter` wraps the adapter and admits requests per API surface
+before they take a worker thread. A surface with a concurrency limit serves
+at most that many requests at once; others wait up to the queue timeout for
+a slot and are then rejected with a `503` and `Retry-After`, so a burst on
+one surface (e.g. public analytics) can not starve the others (e.g. portal
+logins) of threads and connections.
+"""
+
+from src.deadline import watch_disconnect
+from src.error import AppError, AppErrorType, error_handler
+from src.metrics import HTTP_IN_FLIGHT, HTTP_REJECTED
+from src.state import State
+
+from asgiref.sync import AsyncToSync, SyncToAsync
+from asgiref.wsgi import WsgiToAsgiInstance
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, Optional
+
+import asyncio
+import math
+
+
+# path prefix -> surface, named like the blueprints
+SURFACES = (
+    ('/api/public/', 'public'),
+    ('/api/portal/', 'portal'),
+    ('/management/', 'management'),
+    ('/internal/', 'internal'),
+)
+
+
+def surface_of(path: str) -> Optional[str]:
+    for prefix, surface in SURFACES:
+        if path.startswith(prefix):
+            return surface
+    return None
+
+
+class SurfaceLimiter:
+    """ASGI middleware admitting requests per API surface.
+
+    Args:
+        app: The ASGI application serving admitted requests.
+        limits: Maximum concurrent requests by surface, surfaces without a
+                positive limit are not bounded.
+        queue_timeout: Seconds a request waits for a slot before it is
+                       rejected.
+    """
+
+    def __init__(self, app, limits: Dict[str, int],
+                 queue_timeout: float = 1.0):
+        self.app = app
+        self.limits = {s: n for s, n in limits.items() if n > 0}
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+
+        self._semaphores = {
+            s: asyncio.Semaphore(n) for s, n in self.limits.items()
+        }
+        self._in_flight = dict.fromkeys(self.limits, 0)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        surface = surface_of(scope['path'])
+
+        async with self.admit(surface) as admitted:
+            if admitted:
+                await self.app(scope, receive, send)
+            else:
+                await self.reject(surface, send)
+
+    @asynccontextmanager
+    async def admit(self, surface: Optional[str]) -> AsyncIterator[bool]:
+        """Hold a slot of `surface` while the body runs. Yields False if the
+        request has to be rejected.
+        """
+
+        semaphore = self._semaphores.get(surface)
+        if semaphore is None:
+            yield True
+            return
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            HTTP_REJECTED.inc(surface=surface)
+            yield False
+            return
+
+        self._in_flight[surface] += 1
+        HTTP_IN_FLIGHT.set(self._in_flight[surface], surface=surface)
+        try:
+            yield True
+        finally:
+            self._in_flight[surface] -= 1
+            HTTP_IN_FLIGHT.set(self._in_flight[surface], surface=surface)
+            semaphore.release()
+
+    async def reject(self, surface: str, send):
+        response = error_handler(AppError(
+            AppErrorType.UNAVAILABLE,
+            f"Too many concurrent {surface} requests, retry later."))
+
+        headers = [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in response.headers.items()
+        ]
+        headers.append((b'retry-after', str(self.retry_after).encode()))
+
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body',
+                    'body': response.get_data()})
+
+
+class WsgiRequest(WsgiToAsgiInstance):
+    """asgiref's adapter of one HTTP request, running the application on
+    `executor` instead of the thread-sensitive thread.
+
+    Args:
+        wsgi_application: The WSGI application.
+        executor: Threads running the application.
+    """
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        self.scope = scope
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] != 'http.request':
+                    # disconnected before the body was received
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+
+            # `sync_send` is called from the worker thread
+            self.sync_send = AsyncToSync(send)
+            await SyncToAsync(self.run, thread_sensitive=False,
+                              executor=self.executor)(body)
+
+    def run(self, body):
+        """Run the application and send its response, on a worker thread."""
+
+        output = self.wsgi_application(
+            self.build_environ(self.scope, body), self.start_response)
+        try:
+            sent = 0
+            for chunk in output:
+                self._start()
+                if self.response_content_length is not None:
+                    # never more than the announced length
+                    chunk = chunk[:self.response_content_length - sent]
+                self.sync_send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+                sent += len(chunk)
+                if sent == self.response_content_length:
+                    break
+        finally:
+            if hasattr(output, 'close'):
+                output.close()
+
+        self._start()
+        self.sync_send({'type': 'http.response.body'})
+
+    def _start(self):
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+
+
+class AsgiApp:
+    """Flask served over ASGI, on a pool of worker threads.
+
+    Args:
+        wsgi_application: The Flask application.
+        workers: Threads serving requests.
+    """
+
+    def __init__(self, wsgi_application, workers: int = 32):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='request')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError("Only HTTP is served, received a "
+                             f"{scope['type']} scope.")
+
+        disconnected = asyncio.Event()
+        body_received = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if not message.get('more_body'):
+                body_received.set()
+            return message
+
+        async def watch():
+            # once the body is read, the next message is the disconnect
+            await body_received.wait()
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            with watch_disconnect(disconnected):
+                await WsgiRequest(self.wsgi_application,
+                                  self.executor)(scope, receive_body, send)
+        finally:
+            watcher.cancel()
+
+
+def create_asgi_app(flask_app, state: State) -> SurfaceLimiter:
+    return SurfaceLimiter(AsgiApp(flask_app, workers=state.worker_threads), {
+        'public': state.public_concurrency,
+        'portal': state.portal_concurrency,
+        'management': state.management_concurrency,
+        'internal': state.internal_concurrency,
+    }, queue_timeout=state.queue_timeout_ms / 1000)
@@ -0,0 +1,325 @@
+"""Response cache backends.
+
+Public API responses are cached as serialized bodies. A cache key embeds a
+data version: writes bump the version of the data they touch, so entries
+built from older data are simply never looked up again and age out.
+
+Versions are bumped by the application's own indicator writes and by the
+database's `data_changes` notifications (see `src.repo.data_versions`), so
+writes of other processes, or made by hand, invalidate entries as well.
+
+Versions live in the backend next to the entries. With `SqliteCache`, every
+worker process on a host shares one cache file, so a response computed by
+one worker (or before a restart) serves the others, and a write handled by
+one worker invalidates the entries of all of them.
+
+A cache is an optimization only: backend failures are logged and treated
+as misses.
+"""
+
+from src.error import log
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import sqlite3
+
+
+# Data sets, their versions are part of the keys of entries built from them.
+# Indicators are also versioned per economy (`indicators:<code>`), changes
+# not attributable to economies bump `indicators:*`.
+INDICATOR_DATA = 'indicators'
+ALL_ECONOMIES = 'indicators:*'
+REFERENCE_DATA = 'reference'
+
+# tables whose rows appear in reference lists and indicator responses
+REFERENCE_TABLES = {'regions', 'income_levels', 'users', 'providers',
+                    'economies', 'indicator_catalog'}
+INDICATOR_SOURCES = {'economic_indicators', 'health_indicators',
+                     'environment_indicators', 'indicator_values',
+                     'indicator_catalog', 'economies', 'providers',
+                     'regions', 'income_levels'}
+
+
+class CacheBackend(ABC):
+    """Interface of cache backends.
+
+    Attributes:
+        blocking: Calls wait on I/O, the request path runs them on a worker
+                  thread instead of the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached value of `key`, None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        """Cache `value` for `ttl` seconds."""
+
+    @abstractmethod
+    def version(self, name: str) -> Optional[int]:
+        """Current version of the data set `name`, None if it can not be
+        read (the cache is bypassed then).
+        """
+
+    def versions(self, names: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        versions = tuple(self.version(name) for name in names)
+        return None if None in versions else versions
+
+    @abstractmethod
+    def bump(self, name: str):
+        """Invalidate the entries built from data set `name`."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Size and state of the cache, reported by `GET /status`."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache, bounded by the total size of its values.
+
+    Attributes:
+        max_bytes: Size budget of the cached values.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time():
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+
+            self._entries[key] = (time() + ttl, value)
+            self._size += len(value)
+
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def bump(self, name: str):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            'backend': 'memory',
+            'entries': len(self._entries),
+            'bytes': self._size,
+        }
+
+
+class SqliteCache(CacheBackend):
+    """Cache kept in a SQLite file, shared by the processes opening it.
+
+    Attributes:
+        path: The cache file.
+        max_bytes: Size budget of the cached values, enforced every
+                   `trim_interval` writes by evicting the entries closest to
+                   expiry.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_bytes: int = 64 << 20,
+                 trim_interval: int = 64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.trim_interval = trim_interval
+        self.errors = 0
+
+        self._writes = 0
+        self._lock = Lock()
+
+        # durability does not matter for a cache, WAL lets readers of other
+        # processes proceed while one writes
+        self._db = sqlite3.connect(path, timeout=1.0,
+                                   check_same_thread=False,
+                                   isolation_level=None)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+            CREATE TABLE IF NOT EXISTS versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+
+    def _failed(self, e: sqlite3.Error):
+        self.errors += 1
+        log.warning("cache backend error", path=self.path, error=str(e))
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value FROM entries WHERE key = ? AND expires > ?",
+                    (key, time())).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            row = None
+
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                    (key, value, time() + ttl))
+
+                self._writes += 1
+                if self._writes % self.trim_interval == 0:
+                    self._trim()
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def _trim(self):
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (time(),))
+
+        size = self._db.execute(
+            "SELECT coalesce(sum(length(value)), 0) FROM entries"
+        ).fetchone()[0]
+        if size <= self.max_bytes:
+            return
+
+        # drop the entries expiring first until the budget is met
+        self._db.execute("""
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, sum(length(value)) OVER (
+                        ORDER BY expires DESC, key
+                    ) AS kept
+                    FROM entries
+                ) WHERE kept > ?
+            )
+        """, (self.max_bytes,))
+
+    def version(self, name: str) -> Optional[int]:
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT version FROM versions WHERE name = ?",
+                    (name,)).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+
+        return row[0] if row else 0
+
+    def bump(self, name: str):
+        try:
+            with self._lock:
+                self._db.execute("""
+                    INSERT INTO versions VALUES (?, 1)
+                    ON CONFLICT (name) DO UPDATE SET version = version + 1
+                """, (name,))
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def stats(self) -> dict:
+        try:
+            with self._lock:
+                entries, size = self._db.execute(
+                    "SELECT count(*), coalesce(sum(length(value)), 0) "
+                    "FROM entries WHERE expires > ?", (time(),)).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            entries = size = None
+
+        return {
+            'backend': 'sqlite',
+            'entries': entries,
+            'bytes': size,
+            'errors': self.errors,
+        }
+
+
+def indicator_data_sets(economy_code: Optional[str]) -> Tuple[str, ...]:
+    """Data sets an indicator response depends on: all indicators, or the
+    ones of a single economy.
+    """
+
+    if economy_code is None:
+        return (INDICATOR_DATA,)
+    return (ALL_ECONOMIES, f'{INDICATOR_DATA}:{economy_code}')
+
+
+def bump_indicators(cache: CacheBackend,
+                    economies: Optional[Iterable[str]] = None):
+    """Invalidate indicator entries of `economies`, of all economies if
+    None.
+    """
+
+    cache.bump(INDICATOR_DATA)
+    if economies is None:
+        cache.bump(ALL_ECONOMIES)
+        return
+
+    for code in economies:
+        cache.bump(f'{INDICATOR_DATA}:{code}')
+
+
+def invalidate(cache: CacheBackend, table: str,
+               economies: Optional[Iterable[str]] = None):
+    """Invalidate the entries built from rows of `table`, `economies`
+    limits indicator entries to those economies.
+    """
+
+    if table in REFERENCE_TABLES:
+        cache.bump(REFERENCE_DATA)
+    if table in INDICATOR_SOURCES:
+        bump_indicators(cache, economies)
+
+
+def create_cache(backend: str, path: str,
+                 max_bytes: int) -> Optional[CacheBackend]:
+    """Cache backend by name: `memory`, `sqlite` or `none`."""
+
+    backend = backend.lower()
+
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryCache(max_bytes)
+    if backend == 'sqlite':
+        return SqliteCache(path, max_bytes)
+
+    raise ValueError("CACHE_BACKEND must be one of 'memory', 'sqlite' or "
+                     "'none'.")
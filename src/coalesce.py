@@ -0,0 +1,94 @@
+"""Single-flight coalescing of identical concurrent work.
+
+When many clients ask for the same thing at once (a dashboard loading the
+same indicator page), only the first request runs the query; the others
+await its flight and share the result. A flight is forgotten as soon as it
+completes, so nothing is cached beyond the requests that overlapped it.
+
+The flight runs in its own task, detached from the disconnect watch of the
+request that started it: a client going away only stops waiting, and the
+flight is cancelled once none of its callers is waiting anymore.
+"""
+
+from src import deadline
+from src.metrics import COALESCED_CALLS
+
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+import asyncio
+
+
+R = TypeVar('R')
+
+
+class _Flight(Generic[R]):
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[R]):
+    """Deduplicates concurrent calls by key.
+
+    Attributes:
+        name: Label of the `coalesced_calls_total` metric.
+        coalesced: Calls served by a flight another call started.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._flights: Dict[Hashable, _Flight[R]] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable,
+                 fn: Callable[[], Awaitable[R]]) -> R:
+        """Return the result of `fn()`, sharing it with concurrent calls of
+        the same `key`. Exceptions of `fn` are raised to every caller.
+        """
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(key, fn)
+        else:
+            self.coalesced += 1
+            COALESCED_CALLS.inc(flight=self.name)
+
+        flight.waiters += 1
+        try:
+            return await deadline.cancel_on_disconnect(
+                asyncio.shield(flight.task))
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # new calls must not join the flight while it is cancelled
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _start(self, key: Hashable,
+               fn: Callable[[], Awaitable[R]]) -> _Flight[R]:
+        async def run() -> R:
+            with deadline.watch_disconnect(None):
+                return await fn()
+
+        # the task copies the starting request's context (app context,
+        # deadline), `run` drops its disconnect watch
+        task = asyncio.create_task(run())
+        flight = _Flight(task)
+        self._flights[key] = flight
+
+        def forget(_):
+            self._forget(key, flight)
+            # retrieve the exception if every caller left before it was
+            # raised, so it is not reported as never retrieved
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(forget)
+        return flight
+
+    def _forget(self, key: Hashable, flight: _Flight[R]):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
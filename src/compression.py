@@ -0,0 +1,171 @@
+"""Negotiated HTTP response compression.
+
+Responses are compressed according to the client's `Accept-Encoding` header
+once they exceed a minimum size. Brotli is used when the optional `brotli`
+package is installed, gzip otherwise.
+
+Compressed bodies are kept in a small LRU, bounded by their total size and
+keyed by the digest of the uncompressed bytes, so identical payloads
+(coalesced responses, popular pages) are compressed only once. Responses of
+the public API response cache are compressed by `PublicHandler` instead,
+which stores their compressed variants in that cache next to the bodies.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+import gzip
+import hashlib
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+)
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict[str, float]:
+    """Parse an `Accept-Encoding` header into an {encoding: q} mapping."""
+
+    encodings = {}
+
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+
+        encodings[name] = q
+
+    return encodings
+
+
+class ResponseCompressor:
+    """Flask `after_request` hook that compresses eligible responses.
+
+    Attributes:
+        min_size: Bodies smaller than this many bytes are sent as is.
+        level: Compression level, gzip (1-9) or brotli quality (0-11, clamped).
+        cache_bytes: Size budget of the compressed variants kept in memory.
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 6,
+                 cache_bytes: int = 8 << 20):
+        self.min_size = min_size
+        self.level = level
+        self.cache_bytes = cache_bytes
+
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+        self._cache: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Pick the preferred supported encoding, or None for identity."""
+
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+
+        return best
+
+    def compress(self, body: bytes, encoding: str,
+                 remember: bool = True) -> bytes:
+        """Compress `body`, reusing a previously compressed variant if the
+        same bytes were seen recently.
+
+        Args:
+            remember: Keep the compressed variant for later calls, callers
+                      caching it themselves pass False.
+        """
+
+        if not remember:
+            return self._compress(body, encoding)
+
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        compressed = self._compress(body, encoding)
+        if len(compressed) > self.cache_bytes:
+            return compressed
+
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+
+            self._cache[key] = compressed
+            self._size += len(compressed)
+
+            while self._size > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._size -= len(evicted)
+
+        return compressed
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body, quality=min(self.level, 11))
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    def is_eligible(self, response: Response) -> bool:
+        if response.direct_passthrough or response.is_streamed:
+            return False
+
+        if not 200 <= response.status_code < 300 \
+                or response.status_code == 206:
+            return False
+
+        if 'Content-Encoding' in response.headers:
+            return False
+
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or \
+            mimetype in COMPRESSIBLE_MIMETYPES
+
+    def after_request(self, response: Response) -> Response:
+        if not self.is_eligible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.set_data(self.compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        return response
@@ -0,0 +1,124 @@
+"""Request deadlines and cancellation of abandoned queries.
+
+Every request gets a deadline for its database work, configured per API
+surface. The instrumented connections pass the time left to asyncpg as the
+`timeout` of every pool checkout and query; asyncpg cancels a timed out query
+on the server. The pool's `statement_timeout` is a server-side backstop for
+queries whose client side is gone entirely.
+
+When the client disconnects before its response is sent, the ASGI adapter
+sets the request's disconnect event and the query in flight is cancelled, so
+abandoned requests stop holding connections and database CPU.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Awaitable, Dict, Iterator, Optional, TypeVar
+
+import asyncio
+
+from flask import g, request
+
+
+R = TypeVar('R')
+
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+_disconnected: ContextVar[Optional[asyncio.Event]] = \
+    ContextVar('disconnected', default=None)
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was sent."""
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the deadline of the current request, None if it
+    has no deadline.
+
+    Raises:
+        TimeoutError: The deadline has passed.
+    """
+
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+
+    left = deadline - monotonic()
+    if left <= 0:
+        raise TimeoutError("Request deadline exceeded.")
+
+    return left
+
+
+@contextmanager
+def watch_disconnect(event: Optional[asyncio.Event]) -> Iterator[None]:
+    """Cancel queries started in the enclosed block once `event` is set,
+    None stops watching.
+    """
+
+    token = _disconnected.set(event)
+    try:
+        yield
+    finally:
+        _disconnected.reset(token)
+
+
+async def cancel_on_disconnect(awaitable: Awaitable[R]) -> R:
+    """Await `awaitable`, cancelling it if the client disconnects first.
+
+    Raises:
+        ClientDisconnected: The client is gone.
+    """
+
+    event = _disconnected.get()
+    if event is None:
+        return await awaitable
+
+    task = asyncio.ensure_future(awaitable)
+    if event.is_set():
+        task.cancel()
+        raise ClientDisconnected()
+
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait((task, waiter),
+                           return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+        if not task.done():
+            task.cancel()
+            # let asyncpg finish cancelling the query on the server
+            await asyncio.wait((task,))
+
+    if task.cancelled():
+        raise ClientDisconnected()
+
+    return task.result()
+
+
+class RequestDeadlines:
+    """Flask hooks starting the deadline of each request.
+
+    Args:
+        default: Seconds a request may spend on database work, 0 for no
+                 deadline.
+        by_surface: Overrides of `default` by top level blueprint (public,
+                    portal, management, internal).
+    """
+
+    def __init__(self, default: float, by_surface: Dict[str, float] = {}):
+        self.default = default
+        self.by_surface = dict(by_surface)
+
+    def before_request(self):
+        surface = (request.blueprint or 'app').split('.')[0]
+        seconds = self.by_surface.get(surface, self.default)
+
+        if seconds > 0:
+            g.deadline_token = _deadline.set(monotonic() + seconds)
+
+    def teardown_request(self, _=None):
+        token = g.pop('deadline_token', None)
+        if token is not None:
+            _deadline.reset(token)
@@ -0,0 +1,173 @@
+"""Derived indicator expressions.
+
+Derived series are computed by the database from the indicator fields, so
+clients receive the derived values instead of the series they come from. An
+expression is an indicator field (see `src.indicators`) or one of:
+
+    yoy(x)          change from the previous year, in percent
+    avg(x, n)       average of the last `n` years (2 to 20), this one included
+    ratio(x, y)     x / y
+    product(x, y)   x * y
+
+e.g. `yoy(gdp_per_capita)`, `avg(ratio(trade, industry), 5)`. Values are
+computed per provider and economy, in year order. `yoy` and `avg` can not be
+nested in each other, they are computed by one window over the series.
+"""
+
+from src.error import AppError, AppErrorType
+from src.indicators import CATEGORIES, FIELD_NAMES
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+import re
+
+
+MAX_EXPRESSIONS = 8
+MAX_WINDOW = 20
+
+TOKEN = re.compile(r'\s*(?:([a-z_][a-z0-9_]*)|(\d+)|([(),]))')
+
+# name -> (number of expression arguments, takes a year count)
+FUNCTIONS = {
+    'yoy': (1, False),
+    'avg': (1, True),
+    'ratio': (2, False),
+    'product': (2, False),
+}
+WINDOW_FUNCTIONS = {'yoy', 'avg'}
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+
+
+@dataclass(frozen=True)
+class Call:
+    function: str
+    args: Tuple['Expression', ...]
+    years: int = 0
+
+
+Expression = Union[Field, Call]
+
+
+def invalid(message: str) -> AppError:
+    return AppError(AppErrorType.VALIDATION_ERROR,
+                    f"Invalid derived series: {message}")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens, position = [], 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise invalid(f"unexpected '{text[position:].strip()[:10]}'")
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+def parse(text: str) -> Expression:
+    """Parse expression `text`.
+
+    Raises:
+        AppError: VALIDATION_ERROR if the expression is malformed.
+    """
+    tokens = tokenize(text.lower())
+    position = 0
+
+    def take(expected: Optional[str] = None) -> str:
+        nonlocal position
+        if position == len(tokens):
+            raise invalid("unexpected end of expression")
+        token = tokens[position]
+        if expected is not None and token != expected:
+            raise invalid(f"expected '{expected}', found '{token}'")
+        position += 1
+        return token
+
+    def expression(in_window: bool) -> Expression:
+        name = take()
+        if not (name[0].isalpha() or name[0] == '_'):
+            raise invalid(f"expected an indicator or function, found "
+                          f"'{name}'")
+        if position == len(tokens) or tokens[position] != '(':
+            if name not in FIELD_NAMES:
+                raise invalid(f"unknown indicator '{name}'")
+            return Field(name)
+
+        if name not in FUNCTIONS:
+            raise invalid(f"unknown function '{name}'")
+        if name in WINDOW_FUNCTIONS and in_window:
+            raise invalid(f"'{name}' can not be nested in yoy or avg")
+
+        arity, takes_years = FUNCTIONS[name]
+        take('(')
+        args = []
+        for i in range(arity):
+            if i:
+                take(',')
+            args.append(expression(in_window or name in WINDOW_FUNCTIONS))
+
+        years = 0
+        if takes_years:
+            take(',')
+            count = take()
+            if not count.isdigit() or not 2 <= int(count) <= MAX_WINDOW:
+                raise invalid(f"'{name}' takes a year count between 2 and "
+                              f"{MAX_WINDOW}")
+            years = int(count)
+        take(')')
+
+        return Call(name, tuple(args), years)
+
+    parsed = expression(False)
+    if position != len(tokens):
+        raise invalid(f"unexpected '{tokens[position]}'")
+    return parsed
+
+
+def parse_all(texts: List[str]) -> List[Expression]:
+    if not texts:
+        raise invalid("at least one `series` expression is required")
+    if len(texts) > MAX_EXPRESSIONS:
+        raise invalid(f"at most {MAX_EXPRESSIONS} expressions are allowed")
+    return [parse(text) for text in texts]
+
+
+def render(expression: Expression) -> str:
+    """Normalized text of `expression`, the name of its values."""
+    if isinstance(expression, Field):
+        return expression.name
+
+    args = [render(arg) for arg in expression.args]
+    if expression.years:
+        args.append(str(expression.years))
+    return f"{expression.function}({','.join(args)})"
+
+
+def fields(expression: Expression) -> List[str]:
+    """Indicator fields `expression` reads."""
+    if isinstance(expression, Field):
+        return [expression.name]
+    return [f for arg in expression.args for f in fields(arg)]
+
+
+def lookback(expression: Expression) -> int:
+    """Years before a year that its value is computed from."""
+    if isinstance(expression, Field):
+        return 0
+
+    own = {'yoy': 1, 'avg': expression.years - 1}.get(expression.function, 0)
+    return max([own, *(lookback(arg) for arg in expression.args)])
+
+
+def categories(expressions: List[Expression]) -> List[str]:
+    """Category tables holding the fields of `expressions`, in category
+    order.
+    """
+    used = {f for e in expressions for f in fields(e)}
+    return [c.table for c in CATEGORIES if used & set(c.field_names)]
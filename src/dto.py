@@ -21,8 +21,12 @@ Usage in Architecture:
 """
 
 from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, create_model, \
+    model_validator
 from dataclasses import dataclass
+from datetime import datetime
+
+from src.indicators import FIELD_NAMES
 
 
 # 1. Provider DTOs
@@ -120,30 +124,15 @@ class PermissionCreateDto(BaseModel):
 
 # 5. Indicator DTOs
 # ---------------------------------------------------------
-class IndicatorUpdateDto(BaseModel):
-    """Used for PATCH requests.
+# fields come from the indicator registry (src/indicators.py)
+IndicatorUpdateDto = create_model(
+    'IndicatorUpdateDto',
+    __doc__="""Used for PATCH requests.
     Clients can send any subset of Economic, Health, or Environment fields.
-    """
-    model_config = ConfigDict(extra='ignore')
-
-    industry: Optional[float] = None
-    gdp_per_capita: Optional[float] = None
-    trade: Optional[float] = None
-    agriculture_forestry_and_fishing: Optional[float] = None
-
-    community_health_workers: Optional[float] = None
-    prevalence_of_undernourishment: Optional[float] = None
-    prevalence_of_severe_food_insecurity: Optional[float] = None
-    basic_handwashing_facilities: Optional[float] = None
-    safely_managed_drinking_water_services: Optional[float] = None
-    diabetes_prevalence: Optional[float] = None
-
-    energy_use: Optional[float] = None
-    access_to_electricity: Optional[float] = None
-    alternative_and_nuclear_energy: Optional[float] = None
-    permanent_cropland: Optional[float] = None
-    crop_production_index: Optional[float] = None
-    gdp_per_unit_of_energy_use: Optional[float] = None
+    """,
+    __config__=ConfigDict(extra='ignore'),
+    **{name: (Optional[float], None) for name in FIELD_NAMES}
+)
 
 
 class IndicatorCreateDto(IndicatorUpdateDto):
@@ -156,6 +145,40 @@ class IndicatorCreateDto(IndicatorUpdateDto):
     year: int
 
 
+# 6. Indicator Catalog DTOs
+# ---------------------------------------------------------
+class IndicatorDefinitionUpdateDto(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    code: Optional[str] = None
+    name: Optional[str] = None
+    unit: Optional[str] = None
+    topic: Optional[str] = None
+    description: Optional[str] = None
+
+
+class IndicatorDefinitionCreateDto(BaseModel):
+    code: str
+    name: str
+    unit: Optional[str] = None
+    topic: Optional[str] = None
+    description: Optional[str] = None
+
+
+class IndicatorValueUpdateDto(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    value: Optional[float] = None
+
+
+class IndicatorValueCreateDto(BaseModel):
+    indicator_id: int
+    provider_id: int
+    economy_code: str = Field(..., max_length=3)
+    year: int
+    value: float
+
+
 @dataclass
 class IndicatorFilters:
     """Common filters for indicator queries."""
@@ -167,3 +190,45 @@ class IndicatorFilters:
     provider_id: Optional[int] = None
     limit: int = 100
     offset: int = 0
+    # values in effect at this time instead of the current ones
+    as_of: Optional[datetime] = None
+
+    def key(self) -> tuple:
+        """Normalized filter values, equal for filters selecting the same
+        rows (codes are case insensitive, `year` overrides the range).
+        """
+        year_range = (None, None) if self.year is not None \
+            else (self.year_start, self.year_end)
+
+        return (
+            self.economy_code.upper() if self.economy_code else None,
+            self.region.upper() if self.region else None,
+            self.year, *year_range,
+            self.provider_id, self.limit, self.offset, self.as_of
+        )
+
+
+@dataclass
+class ChangeToken:
+    """Position in the indicator change feed.
+
+    `since` is the database snapshot (`pg_snapshot` text) of the previous
+    sync, None for a full sync. While a sync is paged, `upto` is the snapshot
+    the pages are read at and `after` the position of the last change sent:
+    category index and key columns.
+    """
+    since: Optional[str] = None
+    upto: Optional[str] = None
+    after: Optional[list] = None
+
+
+@dataclass
+class ListParams:
+    """Keyset pagination and search parameters of list endpoints.
+
+    `after` holds the ordering key values of the last row of the previous
+    page (decoded from the `cursor` query parameter), `q` is a search prefix.
+    """
+    limit: int = 100
+    after: Optional[list] = None
+    q: Optional[str] = None
@@ -14,7 +14,9 @@ Usage in Architecture:
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, create_model, model_validator
+
+from src.indicators import FIELD_NAMES
 
 
 # 1. Lookups (Regions & Income Levels)
@@ -89,26 +91,30 @@ class Permission(BaseModel):
 
 # 4. Indicator Entity
 # ---------------------------------------------------------
-class Indicator(BaseModel):
+# fields come from the indicator registry (src/indicators.py)
+Indicator = create_model(
+    'Indicator',
+    provider_id=(int, ...),
+    economy_code=(str, ...),
+    year=(int, ...),
+    **{name: (Optional[float], None) for name in FIELD_NAMES}
+)
+
+
+# 5. Indicator Catalog Entities
+# ---------------------------------------------------------
+class IndicatorDefinition(BaseModel):
+    id: int
+    code: str
+    name: str
+    unit: Optional[str] = None
+    topic: Optional[str] = None
+    description: Optional[str] = None
+
+
+class IndicatorValue(BaseModel):
+    indicator_id: int
     provider_id: int
-    economy_code: str
+    economy_code: str = Field(..., max_length=3)
     year: int
-
-    industry: Optional[float] = None
-    gdp_per_capita: Optional[float] = None
-    trade: Optional[float] = None
-    agriculture_forestry_and_fishing: Optional[float] = None
-
-    community_health_workers: Optional[float] = None
-    prevalence_of_undernourishment: Optional[float] = None
-    prevalence_of_severe_food_insecurity: Optional[float] = None
-    basic_handwashing_facilities: Optional[float] = None
-    safely_managed_drinking_water_services: Optional[float] = None
-    diabetes_prevalence: Optional[float] = None
-
-    energy_use: Optional[float] = None
-    access_to_electricity: Optional[float] = None
-    alternative_and_nuclear_energy: Optional[float] = None
-    permanent_cropland: Optional[float] = None
-    crop_production_index: Optional[float] = None
-    gdp_per_unit_of_energy_use: Optional[float] = None
+    value: float
@@ -8,6 +8,8 @@ import json
 import structlog
 from werkzeug.wrappers.response import Response
 
+from src.metrics import APP_ERRORS
+
 log = structlog.get_logger(__name__)
 
 
@@ -22,6 +24,8 @@ class AppErrorType(Enum):
     ALREADY_EXITS = 5
     FK_VIOLATION = 6
     FORBIDDEN = 7
+    UNAVAILABLE = 8
+    TIMEOUT = 9
 
     details: Any
 
@@ -42,6 +46,10 @@ class AppErrorType(Enum):
                 return 400
             case AppErrorType.INTERNAL_ERROR:
                 return 500
+            case AppErrorType.UNAVAILABLE:
+                return 503
+            case AppErrorType.TIMEOUT:
+                return 504
 
 
 class AppError(Exception):
@@ -68,6 +76,8 @@ def error_handler(e: AppError) -> Response:
     details.
     """
 
+    APP_ERRORS.inc(type=e.name)
+
     if (e.name == 'INTERNAL_ERROR'):
         log.error("blocked a sent of internal error", details=e.details)
         e.details = "details redacted to not leak sensitive information"
@@ -97,6 +107,19 @@ def not_found_error_handler(_) -> Response:
     return error_handler(AppError(AppErrorType.NOT_FOUND, "route not found"))
 
 
+def timeout_error_handler(_) -> Response:
+    """A query ran past the request deadline or the statement timeout."""
+
+    return error_handler(AppError(AppErrorType.TIMEOUT,
+                                  "The request took too long to process."))
+
+
+def client_disconnected_handler(_) -> Response:
+    """Nobody reads the response of a request whose client went away."""
+
+    return Response(status=499)
+
+
 def validation_error_handler(e: ValidationError) -> Response:
     """Converts Pydantic validation errors into 400 Bad Request responses."""
 
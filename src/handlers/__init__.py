@@ -4,6 +4,8 @@ from .economy_handler import EconomyHandler
 from .provider_handler import ProviderHandler
 from .permission_handler import PermissionHandler
 from .indicator_handler import IndicatorHandler
+from .catalog_handler import IndicatorCatalogHandler, \
+    IndicatorValueHandler
 from .user_handler import UserHandler
 from .portal_handler import PortalHandler
 from .public_handler import PublicHandler
@@ -15,6 +17,8 @@ __all__ = [
     'ProviderHandler',
     'PermissionHandler',
     'IndicatorHandler',
+    'IndicatorCatalogHandler',
+    'IndicatorValueHandler',
     'UserHandler',
     'PortalHandler',
     'PublicHandler'
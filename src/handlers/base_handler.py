@@ -1,4 +1,5 @@
-from .util import json
+from .util import (constraint_errors, json, json_array, page_response,
+                   parse_batch, parse_list_params)
 
 from src import AppError, AppErrorType
 from src.service.base_service import BaseService
@@ -50,6 +51,18 @@ class BaseHandler(Generic[T, U, C]):
         self.create_dto_class = service.model_types[2]
 
     async def list(self):
+        """Lists entities ordered by their keys.
+
+        Pages are keyset-paginated through the `cursor` parameter (the next
+        cursor is sent in the `X-Next-Cursor` header), `offset` is still
+        accepted for offset-based paging.
+        """
+        if "offset" not in request.args:
+            page = parse_list_params()
+            items, next_after = await self.service.list_page(page.limit,
+                                                             page.after)
+            return page_response([i.model_dump() for i in items], next_after)
+
         try:
             limit = int(request.args.get("limit", 100))
             offset = int(request.args.get("offset", 0))
@@ -99,3 +112,42 @@ class BaseHandler(Generic[T, U, C]):
 
     async def delete(self, *keys):
         return jsonify(await self.service.delete([*keys]))
+
+    async def create_batch(self):
+        """Insert an array of records at once, all or nothing."""
+        records = parse_batch(self.create_dto_class)
+
+        with constraint_errors():
+            inserted = await self.service.insert_many(records)
+
+        return jsonify({'inserted': inserted}), 201
+
+    async def upsert_batch(self):
+        """Insert an array of records, updating the ones that exist."""
+        records = parse_batch(self.create_dto_class)
+
+        with constraint_errors():
+            upserted = await self.service.upsert_many(records)
+
+        return jsonify({'upserted': upserted})
+
+    async def delete_batch(self):
+        """Delete records by an array of keys. Composite keys are given as
+        arrays in key column order, e.g. `[[1, "TUR", 2020], ...]`.
+        """
+        key_count = self.service.key_column_count
+
+        keys = []
+        for index, item in enumerate(json_array('keys')):
+            key = item if isinstance(item, list) else [item]
+            if len(key) != key_count or \
+               not all(isinstance(v, (int, str)) for v in key):
+                raise AppError(AppErrorType.VALIDATION_ERROR,
+                               f"Item {index}: expected {key_count} key "
+                               "value(s).")
+            keys.append(key)
+
+        with constraint_errors():
+            deleted = await self.service.delete_many(keys)
+
+        return jsonify({'deleted': deleted})
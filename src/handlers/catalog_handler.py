@@ -0,0 +1,17 @@
+from .base_handler import BaseHandler
+
+from src.service import IndicatorCatalogService, IndicatorValueService
+
+
+class IndicatorCatalogHandler(BaseHandler):
+    service: IndicatorCatalogService
+
+    def __init__(self, service: IndicatorCatalogService):
+        super().__init__(service)
+
+
+class IndicatorValueHandler(BaseHandler):
+    service: IndicatorValueService
+
+    def __init__(self, service: IndicatorValueService):
+        super().__init__(service)
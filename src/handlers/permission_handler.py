@@ -1,11 +1,31 @@
 from .base_handler import BaseHandler
-from .util import json
+from .util import MAX_BULK_ITEMS, constraint_errors, json, page_response, \
+    parse_list_params
 
 from src.dto import PermissionCreateDto
 from src.service import PermissionService
 from src.error import AppError, AppErrorType
 
 from flask import jsonify, request
+from pydantic import ValidationError
+
+
+# constraint name -> (error type, details)
+CONSTRAINT_ERRORS = {
+    'permissions_provider_id_fkey': (
+        AppErrorType.VALIDATION_ERROR, "Invalid provider_id."),
+    'permissions_economy_code_fkey': (
+        AppErrorType.VALIDATION_ERROR, "Invalid economy_code."),
+    'permissions_region_fkey': (
+        AppErrorType.VALIDATION_ERROR, "Invalid region code."),
+}
+
+
+def constraint_error(constraint_name: str) -> tuple:
+    """Error type and details of a violated permission constraint."""
+    return CONSTRAINT_ERRORS.get(constraint_name, (
+        AppErrorType.VALIDATION_ERROR,
+        f"Violates constraint {constraint_name}."))
 
 
 class PermissionHandler(BaseHandler):
@@ -14,6 +34,17 @@ class PermissionHandler(BaseHandler):
     def __init__(self, service: PermissionService):
         super().__init__(service)
 
+    async def create(self):
+        """Grant a permission, merged into the existing grants. Responds
+        with the `id` of the grant covering it.
+        """
+        payload = PermissionCreateDto(**json())
+
+        with constraint_errors():
+            res = await self.service.create(payload)
+
+        return jsonify(res), 201
+
     async def list_permissions(self):  # MANAGEMENT
         try:
             provider_id = request.args.get("provider_id")
@@ -25,8 +56,10 @@ class PermissionHandler(BaseHandler):
                            "Query parameter 'provider_id' is required and "
                            "must be an integer.")
 
-        perms = await self.service.get_permissions_by_provider(pid)
-        return jsonify(perms)
+        return page_response(
+            *await self.service.get_permissions_by_provider(
+                pid, parse_list_params())
+        )
 
     async def create_permission(self):  # MANAGEMENT
         payload = PermissionCreateDto(**json())
@@ -35,28 +68,85 @@ class PermissionHandler(BaseHandler):
             raise AppError(AppErrorType.VALIDATION_ERROR,
                            "Range start cannot be larger than end.")
 
-        try:
-            res = await self.service.create_permission(
-                payload.provider_id,
-                payload.year_start,
-                payload.year_end,
-                payload.economy_code,
-                payload.region,
-                payload.footnote
-            )
-            return jsonify(res), 201
-
-        except Exception as e:
-            if "foreign key constraint" in str(e).lower():
+        res = (await self.service.create_permissions([payload]))[0]
+
+        if res['constraint_name'] is not None:
+            raise AppError(*constraint_error(res['constraint_name']))
+
+        return jsonify({'id': res['id']}), 201
+
+    async def bulk_create_permissions(self):  # MANAGEMENT
+        """POST /permissions/bulk - Grant an array of permissions at once.
+
+        Items are validated up front; a malformed item rejects the whole
+        request. Overlapping and adjacent grants are merged, items violating
+        a constraint are reported individually, by the constraint name of
+        their database error, while the others are granted.
+        """
+        payload = request.get_json()
+
+        if not isinstance(payload, list) or not payload:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           "Expected a non-empty array of permissions.")
+
+        if len(payload) > MAX_BULK_ITEMS:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           f"At most {MAX_BULK_ITEMS} permissions can be "
+                           "granted at once.")
+
+        permissions = []
+        for index, item in enumerate(payload):
+            try:
+                permission = PermissionCreateDto.model_validate(item)
+            except ValidationError as e:
+                raise AppError(AppErrorType.VALIDATION_ERROR,
+                               f"Item {index}: {e}")
+
+            if permission.year_end < permission.year_start:
                 raise AppError(AppErrorType.VALIDATION_ERROR,
-                               "Invalid provider_id, economy_code, or "
-                               "region code.")
-
-            if "unique constraint" in str(e).lower():
-                raise AppError(AppErrorType.ALREADY_EXITS,
-                               "This permission scope already exists for "
-                               "the provider.")
-            raise e
+                               f"Item {index}: Range start cannot be larger "
+                               "than end.")
+            permissions.append(permission)
+
+        results = await self.service.create_permissions(permissions)
+
+        granted = [{'index': r['idx'], 'id': r['id']}
+                   for r in results if r['constraint_name'] is None]
+        conflicts = []
+        for r in results:
+            if r['constraint_name'] is not None:
+                error_type, details = constraint_error(r['constraint_name'])
+                conflicts.append({
+                    'index': r['idx'],
+                    'error': error_type.name,
+                    'constraint': r['constraint_name'],
+                    'details': details
+                })
+
+        return jsonify({'granted': granted, 'conflicts': conflicts}), \
+            201 if granted else 200
+
+    async def bulk_delete_permissions(self):  # MANAGEMENT
+        """DELETE /permissions/bulk - Revoke an array of permission ids."""
+        payload = request.get_json()
+
+        if not isinstance(payload, list) or not payload or \
+           not all(type(i) is int for i in payload):
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           "Expected a non-empty array of permission ids.")
+
+        if len(payload) > MAX_BULK_ITEMS:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           f"At most {MAX_BULK_ITEMS} permissions can be "
+                           "revoked at once.")
+
+        deleted = {r['id'] for r in
+                   await self.service.delete_permissions(payload)}
+
+        return jsonify({
+            'deleted': [i for i in payload if i in deleted],
+            'not_found': [i for i in payload if i not in deleted]
+        })
 
     async def delete_permission(self, id: int):  # MANAGEMENT
         res = await self.service.delete_permission(int(id))
@@ -7,6 +7,8 @@ data entry for Provider Administrators and Technical Accounts.
 from .util import json
 
 from src.error import AppError, AppErrorType
+from src.jwt_keyring import JwtKeyring
+from src.tracing import span
 from src.service import (
     UserService,
     ProviderService,
@@ -15,7 +17,6 @@ from src.service import (
 )
 
 from flask import jsonify, request, g
-import jwt
 from datetime import datetime, timedelta, timezone
 
 
@@ -26,20 +27,20 @@ class PortalHandler:
     provider_service: ProviderService
     permission_service: PermissionService
     indicator_service: IndicatorService
-    jwt_secret: str
+    jwt_keyring: JwtKeyring
 
     def __init__(self,
                  user_service: UserService,
                  provider_service: ProviderService,
                  permission_service: PermissionService,
                  indicator_service: IndicatorService,
-                 jwt_secret: str):
+                 jwt_keyring: JwtKeyring):
         # Portal handler doesn't use a single service like BaseHandler
         self.user_service = user_service
         self.provider_service = provider_service
         self.permission_service = permission_service
         self.indicator_service = indicator_service
-        self.jwt_secret = jwt_secret
+        self.jwt_keyring = jwt_keyring
 
     # -------------------------------------------------------------------------
     # Authentication Endpoints
@@ -55,18 +56,14 @@ class PortalHandler:
             raise AppError(AppErrorType.VALIDATION_ERROR,
                            "Email and password are required.")
 
-        # Fetch user by email
-        user = await self.user_service.get_user_by_email(email)
+        # Verify credentials, hashing runs on the password hasher's executor
+        with span('authenticate'):
+            user = await self.user_service.authenticate(email, password)
 
         if not user:
             raise AppError(AppErrorType.UNAUTHORIZED,
                            "Invalid email or password.")
 
-        # Verify password (plain text comparison for now)
-        if user['password'] != password:
-            raise AppError(AppErrorType.UNAUTHORIZED,
-                           "Invalid email or password.")
-
         # Generate JWT token
         token_payload = {
             'user_id': user['id'],
@@ -74,7 +71,7 @@ class PortalHandler:
             'exp': datetime.now(timezone.utc) + timedelta(hours=24)
         }
 
-        token = jwt.encode(token_payload, self.jwt_secret, algorithm='HS256')
+        token = self.jwt_keyring.encode(token_payload)
 
         return jsonify({'token': token})
 
@@ -128,9 +125,11 @@ class PortalHandler:
                            "X-Provider-Context header is required.")
 
         # Check if user has access to this provider
-        access = await self.provider_service.validate_user_provider_access(
-            user_id, provider_id
-        )
+        with span('provider_access'):
+            access = \
+                await self.provider_service.validate_user_provider_access(
+                    user_id, provider_id
+                )
 
         if not access:
             raise AppError(AppErrorType.FORBIDDEN,
@@ -237,10 +236,11 @@ class PortalHandler:
         economy_code = economy_code.strip().upper()
 
         # Check if provider has permission for this economy/year
-        permission = \
-            await self.permission_service.check_permission_for_economy(
-                g.provider_id, economy_code, year
-            )
+        with span('permission_check'):
+            permission = \
+                await self.permission_service.check_permission_for_economy(
+                    g.provider_id, economy_code, year
+                )
 
         if not permission:
             raise AppError(AppErrorType.FORBIDDEN,
@@ -1,5 +1,5 @@
 from .base_handler import BaseHandler
-from .util import json
+from .util import json, page_response, parse_list_params
 
 from src.service import ProviderService
 from src.dto import ProviderCreateDto
@@ -15,8 +15,9 @@ class ProviderHandler(BaseHandler):
         super().__init__(service)
 
     async def get_all_providers(self):  # MANAGEMENT
-        providers = await self.service.get_all_providers()
-        return jsonify(providers)
+        return page_response(
+            *await self.service.get_all_providers(parse_list_params())
+        )
 
     async def create_provider(self):  # MANAGEMENT
         payload = ProviderCreateDto(**json())
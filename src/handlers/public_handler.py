@@ -1,9 +1,22 @@
 """Public handler for read-only data access."""
 
-from flask import jsonify
+from flask import Response, current_app, jsonify, request
 
+from src.cache import INDICATOR_DATA, REFERENCE_DATA, CacheBackend, \
+    indicator_data_sets
+from src.coalesce import SingleFlight
+from src.compression import ResponseCompressor
+from src.derived import parse_all, render
+from src.metrics import CACHE_LOOKUPS
+from src.dto import IndicatorFilters
+from src.error import AppError, AppErrorType
 from src.service.public_service import PublicService
-from .util import parse_indicator_filters
+from .util import encode_change_token, parse_change_token, \
+    parse_indicator_filters, parse_limit
+
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+import asyncio
 
 
 class PublicHandler:
@@ -11,56 +24,234 @@ class PublicHandler:
 
     This handler provides HTTP interface for public data access,
     delegating all business logic to the service layer.
+
+    Responses are cached as serialized bodies when a cache backend is given,
+    keyed by the versions of the data sets they are built from (indicators,
+    per economy when filtered by one, or reference data). Indicator responses
+    are kept for `ttl` seconds, reference lists (economies, regions, ...) for
+    `reference_ttl` seconds. On a miss, identical concurrent requests (same
+    endpoint and normalized filters) share one query and its serialized body.
+    A body read from a replica that had not yet replayed the writes behind
+    the current versions is served but not cached.
+
+    Cached bodies are compressed with `compressor` for the encodings clients
+    accept, the compressed variants are cached next to them, so a hit is
+    compressed once per encoding rather than once per request and process.
     """
 
-    def __init__(self, service: PublicService):
+    def __init__(self, service: PublicService,
+                 cache: Optional[CacheBackend] = None,
+                 ttl: float = 300, reference_ttl: float = 300,
+                 compressor: Optional[ResponseCompressor] = None):
         self.service = service
+        self.cache = cache
+        self.ttl = ttl
+        self.reference_ttl = reference_ttl
+        self.compressor = compressor
+        self.flights: SingleFlight[Tuple[bytes, bool]] = \
+            SingleFlight('public')
+
+    async def respond(self, key: Hashable, fetch: Callable[[], Awaitable],
+                      data_sets: Tuple[str, ...],
+                      ttl: float) -> Response:
+        """JSON response of `fetch()`, served from the cache or coalesced
+        with concurrent requests of the same `key`.
+        """
+
+        cache = self.cache
+        versions = None
+        if cache is not None:
+            versions = await self.call_cache(cache.versions, data_sets)
+            if versions is None:
+                cache = None
+
+        key = (request.endpoint, versions, key)
+        cache_key = repr(key)
+
+        if cache is None:
+            body, _ = await self.flights.do(
+                key, lambda: self.serialize(fetch, None, cache_key, ttl))
+            return self.json_response(body)
+
+        encoding = None
+        if self.compressor is not None:
+            encoding = self.compressor.negotiate(
+                request.headers.get('Accept-Encoding'))
+
+        if encoding is not None:
+            body = await self.call_cache(cache.get,
+                                         f'{cache_key} {encoding}')
+            if body is not None:
+                CACHE_LOOKUPS.inc(result='hit')
+                return self.json_response(body, 'HIT', encoding)
+
+        body = await self.call_cache(cache.get, cache_key)
+        CACHE_LOOKUPS.inc(result='miss' if body is None else 'hit')
+        if body is not None:
+            return await self.encoded_response(body, 'HIT', cache_key,
+                                               encoding, ttl)
+
+        body, cached = await self.flights.do(
+            key, lambda: self.serialize(fetch, cache, cache_key, ttl))
+        return await self.encoded_response(body, 'MISS', cache_key, encoding,
+                                           ttl if cached else None)
+
+    async def serialize(self, fetch: Callable[[], Awaitable],
+                        cache: Optional[CacheBackend], cache_key: str,
+                        ttl: float) -> Tuple[bytes, bool]:
+        """Serialized `fetch()` and whether it was cached."""
+
+        if cache is None:
+            return current_app.json.response(await fetch()).get_data(), False
+
+        # replica data older than the versions in `cache_key` must not be
+        # cached under them
+        async with self.service.read_fence() as fence:
+            data = await fetch()
+        body = current_app.json.response(data).get_data()
+        if fence is not None and not fence.current:
+            return body, False
+
+        await self.call_cache(cache.set, cache_key, body, ttl)
+        return body, True
+
+    async def encoded_response(self, body: bytes, cache_status: str,
+                               cache_key: str, encoding: Optional[str],
+                               ttl: Optional[float]) -> Response:
+        """Response of the cached `body`, compressed with `encoding` if it
+        is large enough. The compressed variant is cached next to the body
+        for `ttl` seconds, not at all if None.
+        """
+
+        if encoding is None or len(body) < self.compressor.min_size:
+            return self.json_response(body, cache_status)
+
+        compressed = self.compressor.compress(body, encoding, remember=False)
+        if ttl is not None:
+            await self.call_cache(self.cache.set, f'{cache_key} {encoding}',
+                                  compressed, ttl)
+        return self.json_response(compressed, cache_status, encoding)
+
+    async def call_cache(self, method: Callable, *args):
+        """Run cache backend `method`, on a worker thread if the backend
+        blocks, so a busy cache file does not stall the event loop.
+        """
+        if self.cache.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def respond_reference(self, fetch: Callable[[], Awaitable]):
+        return await self.respond((), fetch, (REFERENCE_DATA,),
+                                  self.reference_ttl)
+
+    async def respond_indicators(self, fetch: Callable[[IndicatorFilters],
+                                                       Awaitable]):
+        filters = parse_indicator_filters()
+        key = filters.key()
+        return await self.respond(key, lambda: fetch(filters),
+                                  indicator_data_sets(key[0]), self.ttl)
+
+    def json_response(self, body: bytes, cache_status: Optional[str] = None,
+                      encoding: Optional[str] = None) -> Response:
+        response = Response(body, mimetype=current_app.json.mimetype)
+        if cache_status is not None:
+            response.headers['X-Cache'] = cache_status
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+        return response
 
     async def list_economies(self):
         """List all economies with region and income level."""
-        data = await self.service.list_economies()
-        return jsonify(data)
+        return await self.respond_reference(self.service.list_economies)
 
     async def list_regions(self):
         """List all regions."""
-        data = await self.service.list_regions()
-        return jsonify(data)
+        return await self.respond_reference(self.service.list_regions)
 
     async def list_income_levels(self):
         """List all income levels."""
-        data = await self.service.list_income_levels()
-        return jsonify(data)
+        return await self.respond_reference(self.service.list_income_levels)
 
     async def list_providers(self):
         """List all providers with user names."""
-        data = await self.service.list_providers()
-        return jsonify(data)
+        return await self.respond_reference(self.service.list_providers)
 
     async def list_indicators(self):
         """List all indicators with filters from query params."""
-        filters = parse_indicator_filters()
-        data = await self.service.list_indicators(filters)
-        return jsonify(data)
+        return await self.respond_indicators(self.service.list_indicators)
 
     async def list_economic_indicators(self):
         """List economic indicators with filters."""
-        filters = parse_indicator_filters()
-        data = await self.service.list_economic_indicators(filters)
-        return jsonify(data)
+        return await self.respond_indicators(
+            self.service.list_economic_indicators)
 
     async def list_health_indicators(self):
         """List health indicators with filters."""
-        filters = parse_indicator_filters()
-        data = await self.service.list_health_indicators(filters)
-        return jsonify(data)
+        return await self.respond_indicators(
+            self.service.list_health_indicators)
 
     async def list_environment_indicators(self):
         """List environment indicators with filters."""
+        return await self.respond_indicators(
+            self.service.list_environment_indicators)
+
+    async def list_derived_indicators(self):
+        """List derived indicator values of the `series` expressions with
+        filters.
+        """
+        expressions = parse_all(request.args.getlist('series'))
+        filters = parse_indicator_filters()
+        key = filters.key()
+        return await self.respond(
+            (tuple(render(e) for e in expressions), key),
+            lambda: self.service.list_derived_indicators(expressions,
+                                                         filters),
+            indicator_data_sets(key[0]), self.ttl)
+
+    async def list_catalog(self):
+        """List the series of the indicator catalog."""
+        return await self.respond_reference(self.service.list_catalog)
+
+    async def list_series(self):
+        """List indicator catalog values of the `indicator` series codes
+        (comma separated) with filters.
+        """
         filters = parse_indicator_filters()
-        data = await self.service.list_environment_indicators(filters)
+        if filters.as_of is not None:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           "as_of is not supported for catalog series.")
+
+        codes = sorted({
+            code.strip().upper()
+            for code in request.args.get('indicator', '').split(',')
+            if code.strip()
+        })
+        key = filters.key()
+        return await self.respond(
+            (tuple(codes), key),
+            lambda: self.service.list_series(codes, filters),
+            indicator_data_sets(key[0]), self.ttl)
+
+    async def list_changes(self):
+        """List indicator changes since the `since` token."""
+        token = parse_change_token()
+        changes, next_token, more = await self.service.list_changes(
+            token, parse_limit(1000))
+        return jsonify({
+            'changes': changes,
+            'next': encode_change_token(next_token),
+            'more': more,
+        })
+
+    async def get_data_versions(self):
+        """Get change counters by table, optionally of one economy."""
+        economy_code = request.args.get('economy_code')
+        data = await self.service.get_data_versions(
+            economy_code.upper() if economy_code else None)
         return jsonify(data)
 
     async def get_stats(self):
         """Get database statistics."""
-        data = await self.service.get_stats()
-        return jsonify(data)
+        return await self.respond((), self.service.get_stats,
+                                  (INDICATOR_DATA, REFERENCE_DATA), self.ttl)
@@ -1,5 +1,5 @@
 from .base_handler import BaseHandler
-from .util import json
+from .util import json, page_response, parse_list_params
 
 from src.error import AppError, AppErrorType
 from src.service import UserService
@@ -14,8 +14,8 @@ class UserHandler(BaseHandler):
         super().__init__(service)
 
     async def get_all_users(self):  # MANAGEMENT
-        return jsonify(
-            await self.service.get_all_users()
+        return page_response(
+            *await self.service.get_all_users(parse_list_params())
         )
 
     async def create_user(self):  # MANAGEMENT
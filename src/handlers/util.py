@@ -1,7 +1,27 @@
-from src.dto import IndicatorFilters
+from src.dto import ChangeToken, IndicatorFilters, ListParams
 from src.error import AppError, AppErrorType
 
-from flask import request
+from flask import jsonify, request, Response
+from pydantic import BaseModel, ValidationError
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Optional, Type, TypeVar
+
+import asyncpg
+import base64
+import binascii
+import json as jsonlib
+import re
+
+
+MAX_PAGE_SIZE = 1000
+MAX_BULK_ITEMS = 1000
+
+# text form of a `pg_snapshot`: xmin:xmax:xip,...
+SNAPSHOT_PATTERN = re.compile(r'\d+:\d+:(\d+(,\d+)*)?')
+
+M = TypeVar('M', bound=BaseModel)
 
 
 def json():
@@ -14,6 +34,70 @@ def json():
     return json
 
 
+def json_array(what: str) -> list:
+    """Request body as a non-empty array of at most MAX_BULK_ITEMS items."""
+    payload = request.get_json(silent=True)
+
+    if not isinstance(payload, list) or not payload:
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       f"Expected a non-empty array of {what}.")
+
+    if len(payload) > MAX_BULK_ITEMS:
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       f"At most {MAX_BULK_ITEMS} {what} can be sent at "
+                       "once.")
+
+    return payload
+
+
+def parse_batch(model: Type[M]) -> List[M]:
+    """Validate the request body as an array of `model` records. A malformed
+    item rejects the whole batch.
+    """
+    records = []
+    for index, item in enumerate(json_array('records')):
+        try:
+            records.append(model.model_validate(item))
+        except ValidationError as e:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           f"Item {index}: {e}")
+
+    return records
+
+
+@contextmanager
+def constraint_errors():
+    """Report constraint violations of a batch statement as client errors."""
+    try:
+        yield
+    except asyncpg.UniqueViolationError as e:
+        raise AppError(AppErrorType.ALREADY_EXITS, e.detail or str(e))
+    except asyncpg.ForeignKeyViolationError as e:
+        raise AppError(AppErrorType.FK_VIOLATION, e.detail or str(e))
+    except (asyncpg.IntegrityConstraintViolationError,
+            asyncpg.DataError) as e:
+        raise AppError(AppErrorType.VALIDATION_ERROR, str(e))
+
+
+def parse_timestamp(name: str) -> Optional[datetime]:
+    """Parse ISO 8601 timestamp query parameter `name`, UTC unless it has an
+    offset.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       f"Invalid {name}, expected an ISO 8601 timestamp.")
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
 def parse_indicator_filters() -> IndicatorFilters:
     """Parse indicator filter parameters from request query string."""
     economy_code = request.args.get('economy_code')
@@ -33,5 +117,100 @@ def parse_indicator_filters() -> IndicatorFilters:
         year_end=int(year_end) if year_end else None,
         provider_id=int(provider_id) if provider_id else None,
         limit=int(limit),
-        offset=int(offset)
+        offset=int(offset),
+        as_of=parse_timestamp('as_of')
     )
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque page cursor holding the ordering keys of a row."""
+    return base64.urlsafe_b64encode(
+        jsonlib.dumps(values, separators=(',', ':')).encode()
+    ).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = jsonlib.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    if not isinstance(values, list):
+        raise AppError(AppErrorType.VALIDATION_ERROR, "Invalid cursor.")
+
+    return values
+
+
+def parse_limit(default_limit: int = 100) -> int:
+    """Parse the `limit` query parameter, at most MAX_PAGE_SIZE."""
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       "limit must be an integer")
+
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    return limit
+
+
+def parse_list_params(default_limit: int = 100) -> ListParams:
+    """Parse `limit`, `cursor` and `q` list parameters from the query
+    string.
+    """
+    limit = parse_limit(default_limit)
+    cursor = request.args.get('cursor')
+
+    return ListParams(
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+        q=request.args.get('q') or None
+    )
+
+
+def encode_change_token(token: ChangeToken) -> str:
+    return encode_cursor([token.since, token.upto, token.after])
+
+
+def parse_change_token() -> ChangeToken:
+    """Parse the `since` change feed token from the query string, an empty
+    token for a full sync.
+    """
+    since = request.args.get('since')
+    if not since:
+        return ChangeToken()
+
+    values = decode_cursor(since)
+
+    def snapshot(value) -> bool:
+        return value is None or (isinstance(value, str) and
+                                 SNAPSHOT_PATTERN.fullmatch(value))
+
+    def position(value) -> bool:
+        return value is None or (
+            isinstance(value, list) and len(value) == 4 and
+            all(isinstance(v, t) and not isinstance(v, bool)
+                for v, t in zip(value, (int, int, str, int))))
+
+    if len(values) != 3 or not snapshot(values[0]) or \
+            not snapshot(values[1]) or not position(values[2]) or \
+            (values[1] is None) != (values[2] is None):
+        raise AppError(AppErrorType.VALIDATION_ERROR,
+                       "Invalid change token.")
+
+    return ChangeToken(*values)
+
+
+def page_response(rows: list, next_after: list | None) -> Response:
+    """JSON array response, with the cursor of the next page (if any) in the
+    `X-Next-Cursor` header.
+    """
+    response = jsonify(rows)
+
+    if next_after is not None:
+        response.headers['X-Next-Cursor'] = encode_cursor(next_after)
+
+    return response
@@ -0,0 +1,78 @@
+"""Indicator registry.
+
+The indicator fields, the category tables storing them and the WDI series
+they are loaded from are declared here once. DTOs, entities, the indicator
+SQL statements (`src.repo.indicator_statements`) and the WorldBank fixtures
+are derived from this registry, so adding a field to a category is a change
+to `CATEGORIES` (and to its table, see db/02-indicators-tables.sql).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+
+# composite key of indicator records
+KEY_COLUMNS = ('provider_id', 'economy_code', 'year')
+
+
+@dataclass(frozen=True)
+class IndicatorField:
+    name: str
+    # WDI series the field is loaded from
+    wdi_code: str
+
+
+@dataclass(frozen=True)
+class IndicatorCategory:
+    """A category of indicators, stored in table `table`."""
+    name: str
+    table: str
+    fields: Tuple[IndicatorField, ...]
+
+    @property
+    def field_names(self) -> Tuple[str, ...]:
+        return tuple(f.name for f in self.fields)
+
+
+CATEGORIES: Tuple[IndicatorCategory, ...] = (
+    IndicatorCategory('economic', 'economic_indicators', (
+        IndicatorField('industry', 'NV.IND.TOTL.ZS'),
+        IndicatorField('gdp_per_capita', 'NY.GDP.PCAP.CD'),
+        IndicatorField('trade', 'NE.TRD.GNFS.ZS'),
+        IndicatorField('agriculture_forestry_and_fishing', 'NV.AGR.TOTL.ZS'),
+    )),
+    IndicatorCategory('health', 'health_indicators', (
+        IndicatorField('community_health_workers', 'SH.MED.NUMW.P3'),
+        IndicatorField('prevalence_of_undernourishment', 'SN.ITK.DEFC.ZS'),
+        IndicatorField('prevalence_of_severe_food_insecurity',
+                       'SN.ITK.SVFI.ZS'),
+        IndicatorField('basic_handwashing_facilities', 'SH.STA.HYGN.ZS'),
+        IndicatorField('safely_managed_drinking_water_services',
+                       'SH.H2O.SMDW.ZS'),
+        IndicatorField('diabetes_prevalence', 'SH.STA.DIAB.ZS'),
+    )),
+    IndicatorCategory('environment', 'environment_indicators', (
+        IndicatorField('energy_use', 'EG.USE.PCAP.KG.OE'),
+        IndicatorField('access_to_electricity', 'EG.ELC.ACCS.ZS'),
+        IndicatorField('alternative_and_nuclear_energy', 'EG.USE.COMM.CL.ZS'),
+        IndicatorField('permanent_cropland', 'AG.LND.CROP.ZS'),
+        IndicatorField('crop_production_index', 'AG.PRD.CROP.XD'),
+        IndicatorField('gdp_per_unit_of_energy_use', 'EG.GDP.PUSE.KO.PP.KD'),
+    )),
+)
+
+CATEGORY_BY_NAME: Dict[str, IndicatorCategory] = {
+    c.name: c for c in CATEGORIES
+}
+CATEGORY_BY_TABLE: Dict[str, IndicatorCategory] = {
+    c.table: c for c in CATEGORIES
+}
+
+# every indicator field, in category order
+FIELD_NAMES: Tuple[str, ...] = tuple(
+    name for c in CATEGORIES for name in c.field_names)
+
+# WDI series code -> indicator field
+WDI_FIELDS: Dict[str, str] = {
+    f.wdi_code: f.name for c in CATEGORIES for f in c.fields
+}
@@ -0,0 +1,131 @@
+"""Portal JWT signing keys.
+
+Several HS256 keys can be active at once, each identified by a `kid`. Tokens
+are signed with the first key and carry its `kid` in their header, tokens
+signed with any other configured key are still accepted. Rotating a secret is
+then a matter of prepending a new key to `JWT_KEYS` and removing the old one
+once the tokens it signed have expired.
+
+Tokens issued before key ids existed have no `kid`; they are verified with
+`JWT_SECRET`.
+
+Verified tokens are cached until their `exp`, so repeated requests with the
+same bearer token skip signature verification and claim parsing. A cached
+token is only accepted while the key that verified it is still configured.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Dict, Optional
+
+import jwt
+
+
+ALGORITHM = 'HS256'
+
+
+def parse_keys(value: str) -> Dict[str, str]:
+    """Parse `kid:secret,kid:secret,...`, keeping the order."""
+
+    keys = {}
+    for entry in value.split(','):
+        kid, sep, secret = entry.strip().partition(':')
+        if not sep or not kid or not secret:
+            raise ValueError("JWT_KEYS entries must look like 'kid:secret'.")
+        if kid in keys:
+            raise ValueError(f"Duplicate JWT key id '{kid}'.")
+        keys[kid] = secret
+
+    return keys
+
+
+class JwtKeyring:
+    """Signs and verifies portal tokens.
+
+    Args:
+        keys: Active keys by `kid`, the first one signs new tokens.
+        legacy_secret: Secret for tokens without a `kid`, defaults to the
+                       signing key.
+        cache_size: Number of verified tokens to remember, 0 disables the
+                    cache.
+    """
+
+    def __init__(self, keys: Dict[str, str],
+                 legacy_secret: Optional[str] = None,
+                 cache_size: int = 4096):
+        if not keys:
+            raise ValueError("At least one JWT signing key is required.")
+
+        self.keys = dict(keys)
+        self.signing_kid = next(iter(self.keys))
+        self.legacy_secret = legacy_secret or self.keys[self.signing_kid]
+
+        self.cache_size = cache_size
+        # token -> (exp, kid, secret, claims)
+        self._cache: OrderedDict[
+            str, tuple[float, Optional[str], str, dict]] = OrderedDict()
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, jwt_secret: Optional[str],
+                    jwt_keys: Optional[str] = None,
+                    cache_size: int = 4096) -> 'JwtKeyring':
+        """Keyring from `JWT_KEYS`, or a single `default` key holding
+        `JWT_SECRET` when no key list is configured.
+        """
+
+        if jwt_keys:
+            keys = parse_keys(jwt_keys)
+        elif jwt_secret:
+            keys = {'default': jwt_secret}
+        else:
+            raise ValueError("A JWT_SECRET or JWT_KEYS is required to sign "
+                             "web tokens.")
+
+        return cls(keys, legacy_secret=jwt_secret, cache_size=cache_size)
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(payload, self.keys[self.signing_kid],
+                          algorithm=ALGORITHM,
+                          headers={'kid': self.signing_kid})
+
+    def secret(self, kid: Optional[str]) -> Optional[str]:
+        """Secret verifying tokens signed with key `kid` (the legacy secret
+        for tokens without one), None if the key is not configured.
+        """
+        return self.legacy_secret if kid is None else self.keys.get(kid)
+
+    def decode(self, token: str) -> dict:
+        """Verify `token` and return a copy of its claims.
+
+        Raises:
+            jwt.InvalidTokenError: The token is invalid or expired.
+        """
+
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                exp, kid, secret, claims = cached
+                if exp > time() and self.secret(kid) == secret:
+                    self._cache.move_to_end(token)
+                    return dict(claims)
+                del self._cache[token]
+
+        kid = jwt.get_unverified_header(token).get('kid')
+
+        secret = self.secret(kid)
+        if secret is None:
+            raise jwt.InvalidTokenError("Unknown signing key.")
+
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
+
+        # tokens without an expiry are verified on every request
+        exp = payload.get('exp')
+        if self.cache_size > 0 and isinstance(exp, (int, float)):
+            with self._lock:
+                self._cache[token] = (exp, kid, secret, dict(payload))
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return payload
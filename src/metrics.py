@@ -0,0 +1,312 @@
+"""Prometheus-style metrics.
+
+A minimal, dependency-free metrics registry rendering the Prometheus text
+exposition format. Metrics are process-wide; `/metrics` renders them when a
+`METRICS_TOKEN` is configured.
+
+The fixture loader runs in its own process, so it dumps its metrics into
+`METRICS_TEXTFILE` after every step, which `/metrics` appends to its output
+(the node exporter "textfile collector" convention).
+"""
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import math
+import os
+
+from flask import Response, g, request
+
+
+METRICS_TEXTFILE = ".load_metrics.prom"
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n') \
+        .replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...],
+                   extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of labeled metrics."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return '\n'.join([
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples()
+        ])
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} "
+            f"{_format_value(v)}"
+            for k, v in values
+        ]
+
+
+class Gauge(Metric):
+    """A gauge that is either set explicitly or read from a callback at
+    render time.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, *args,
+                 callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.callback is not None:
+            return [f"{self.name} {_format_value(self.callback())}"]
+
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} "
+            f"{_format_value(v)}"
+            for k, v in values
+        ]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [bucket counts..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(k, list(v)) for k, v in self._values.items()]
+
+        lines = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Iterable[str] = (),
+              callback: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames,
+                                   callback=callback))
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames,
+                                       buckets=buckets))
+
+    def render(self) -> str:
+        return '\n'.join(m.render() for m in self._metrics.values()) + '\n'
+
+    def write_textfile(self, path: str = METRICS_TEXTFILE):
+        """Atomically dump all metrics into `path`."""
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def read_textfile(path: str = METRICS_TEXTFILE) -> str:
+    """Contents of a metrics textfile, or an empty string."""
+
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ''
+
+
+registry = MetricsRegistry()
+fixture_registry = MetricsRegistry()
+
+
+# Application metrics
+# ---------------------------------------------------------
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', "HTTP requests served.",
+    ('surface', 'route', 'method', 'status'))
+
+HTTP_LATENCY = registry.histogram(
+    'http_request_duration_seconds', "HTTP request latency.",
+    ('surface', 'route', 'method'))
+
+HTTP_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', "Admitted requests being served, by surface.",
+    ('surface',))
+
+HTTP_REJECTED = registry.counter(
+    'http_requests_rejected_total',
+    "Requests rejected because their surface was at its concurrency limit.",
+    ('surface',))
+
+COALESCED_CALLS = registry.counter(
+    'coalesced_calls_total',
+    "Calls served by an identical concurrent call's query.", ('flight',))
+
+CACHE_LOOKUPS = registry.counter(
+    'cache_lookups_total', "Response cache lookups by result (hit, miss).",
+    ('result',))
+
+APP_ERRORS = registry.counter(
+    'app_errors_total', "Application errors by AppErrorType.", ('type',))
+
+DB_QUERY_LATENCY = registry.histogram(
+    'db_query_duration_seconds', "Database query latency by query shape.",
+    ('shape',))
+
+DB_QUERY_ROWS = registry.counter(
+    'db_query_rows_total', "Rows returned or affected by query shape.",
+    ('shape',))
+
+DB_ACQUIRE_LATENCY = registry.histogram(
+    'db_pool_acquire_duration_seconds',
+    "Time spent waiting for a pooled connection.",
+    buckets=(.0005, .001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+
+# Fixture loader metrics (written to METRICS_TEXTFILE)
+# ---------------------------------------------------------
+FIXTURE_ROWS = fixture_registry.counter(
+    'fixture_rows_total', "Rows loaded by the fixture loader.",
+    ('step', 'outcome'))
+
+FIXTURE_STEP_SECONDS = fixture_registry.gauge(
+    'fixture_step_duration_seconds',
+    "Duration of the last run of each fixture loader step.", ('step',))
+
+
+def observe_query(shape: str, elapsed_ms: float, rows: int):
+    """`PoolInstrumentation` query hook."""
+    DB_QUERY_LATENCY.observe(elapsed_ms / 1000, shape=shape)
+    DB_QUERY_ROWS.inc(rows, shape=shape)
+
+
+def observe_acquire(elapsed_ms: float):
+    """`PoolInstrumentation` acquire hook."""
+    DB_ACQUIRE_LATENCY.observe(elapsed_ms / 1000)
+
+
+class RequestMetrics:
+    """Flask hooks counting requests and timing them per route.
+
+    Routes are labeled by their URL rule (e.g. `/internal/users/<id>`), not
+    the concrete path, so label cardinality stays bounded. The surface is the
+    top level blueprint (public, portal, management, internal), or `app` for
+    routes registered on the app itself.
+    """
+
+    def before_request(self):
+        g.metrics_start = perf_counter()
+
+    def after_request(self, response: Response) -> Response:
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+
+        surface = (request.blueprint or 'app').split('.')[0]
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        HTTP_REQUESTS.inc(surface=surface, route=route,
+                          method=request.method,
+                          status=response.status_code)
+        HTTP_LATENCY.observe(perf_counter() - start, surface=surface,
+                             route=route, method=request.method)
+
+        return response
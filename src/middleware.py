@@ -1,4 +1,6 @@
 from src.error import AppError, AppErrorType
+from src.jwt_keyring import JwtKeyring
+from src.tracing import span
 from flask import request, g
 
 import jwt
@@ -22,7 +24,16 @@ def management_console_authorize(management_secret: str):
     return authorize
 
 
-def portal_jwt_authorize(jwt_secret: str, exclude_paths: list[str] = []):
+def metrics_authorize(metrics_token: str):
+    def authorize():
+        if request.headers.get('Authorization') != f"Bearer {metrics_token}":
+            raise AppError(AppErrorType.UNAUTHORIZED)
+
+    return authorize
+
+
+def portal_jwt_authorize(jwt_keyring: JwtKeyring,
+                         exclude_paths: list[str] = []):
     """JWT authorization middleware for the Portal API.
 
     Validates the Bearer token from the Authorization header and extracts
@@ -31,7 +42,7 @@ def portal_jwt_authorize(jwt_secret: str, exclude_paths: list[str] = []):
     Also extracts X-Provider-Context header into g.provider_id if present.
 
     Args:
-        jwt_secret: The secret key used to verify JWT signatures.
+        jwt_keyring: The keys used to verify JWT signatures.
         exclude_paths: List of endpoint paths that don't require auth
                        (e.g., ['/auth/login']).
     """
@@ -58,7 +69,8 @@ def portal_jwt_authorize(jwt_secret: str, exclude_paths: list[str] = []):
         token = parts[1]
 
         try:
-            payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
+            with span('jwt_decode'):
+                payload = jwt_keyring.decode(token)
             g.user_id = payload.get('user_id')
 
             if g.user_id is None:
@@ -4,6 +4,7 @@ from .economy_repo import EconomyRepo
 from .provider_repo import ProviderRepo
 from .permission_repo import PermissionRepo
 from .indicator_repo import IndicatorRepo
+from .catalog_repo import IndicatorCatalogRepo, IndicatorValueRepo
 from .user_repo import UserRepo
 from .public_repo import PublicRepo
 
@@ -14,6 +15,8 @@ __all__ = [
     'ProviderRepo',
     'PermissionRepo',
     'IndicatorRepo',
+    'IndicatorCatalogRepo',
+    'IndicatorValueRepo',
     'UserRepo',
     'PublicRepo'
 ]
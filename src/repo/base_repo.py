@@ -1,30 +1,61 @@
+from .instrumentation import instrumentation, InstrumentedConnection
+from .replicas import ReadPool
 
+from src.error import AppError, AppErrorType
+
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import Any, Generic, List, Optional, Tuple, Type, TypeVar
+from typing import (Any, AsyncIterator, Generic, List, Optional, Tuple, Type,
+                    TypeVar)
 
 import asyncpg
 
 E = TypeVar("E", bound=object)
 
 
+def like_prefix(prefix: str) -> str:
+    """LIKE pattern matching strings starting with `prefix`."""
+    return prefix.replace('\\', '\\\\').replace('%', '\\%') \
+        .replace('_', '\\_') + '%'
+
+
 # database access layer abstraction
 class BaseTransaction(Generic[E]):
-    def __init__(self, pool: asyncpg.pool.Pool, model: Type[E]):
+    def __init__(self, pool: asyncpg.pool.Pool, model: Type[E],
+                 read_pool: Optional[ReadPool] = None):
         self.pool = pool
         self.model = model
+        self.read_pool = read_pool
+
+    @asynccontextmanager
+    async def acquire(self, read_only: bool = False) \
+            -> AsyncIterator[InstrumentedConnection]:
+        """Check out an instrumented connection from the pool.
+
+        Args:
+            read_only: The connection is only used for reads, it is taken
+                       from a replica when a read pool is configured.
+        """
+        if read_only and self.read_pool is not None:
+            async with self.read_pool.acquire() as conn:
+                yield conn
+            return
+
+        async with instrumentation.acquire(self.pool) as conn:
+            yield conn
 
     async def fetch(self, query: str, *args: Any) -> List[E]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             rows = await conn.fetch(query, *args)
             return [self.model(**row) for row in rows]
 
     async def fetch_raw(self, query: str, *args: Any) -> List[dict]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             rows = await conn.fetch(query, *args)
             return [dict(row) for row in rows]
 
     async def fetchrow(self, query: str, *args: Any) -> Optional[E]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(query, *args)
             if row is not None:
                 return self.model(**row)
@@ -32,7 +63,7 @@ class BaseTransaction(Generic[E]):
                 return None
 
     async def fetchrow_raw(self, query: str, *args: Any) -> Optional[dict]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(query, *args)
             if row is not None:
                 return dict(row)
@@ -40,9 +71,68 @@ class BaseTransaction(Generic[E]):
                 return None
 
     async def execute(self, query: str, *args: Any) -> str:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             return await conn.execute(query, *args)
 
+    async def fetch_page(self, query: str, args: List[Any],
+                         order_by: List[str], limit: int,
+                         after: Optional[List[Any]] = None,
+                         descending: bool = False) \
+            -> Tuple[List[dict], Optional[List[Any]]]:
+        """Fetch one keyset-paginated page of `query`.
+
+        Rows after the cursor are selected by comparing the `order_by`
+        columns as a row value, so an index on them serves every page in
+        constant time regardless of its position (unlike OFFSET).
+
+        Args:
+            query: A SELECT ending in a WHERE clause (`WHERE true` if there is
+                   no filter), selecting all `order_by` columns.
+            args: Parameters of `query`.
+            order_by: Columns that uniquely order the rows.
+            limit: Page size.
+            after: `order_by` values of the last row of the previous page.
+            descending: Order (and paginate) in descending order.
+
+        Returns:
+            The rows, and the cursor values of the next page or None if this
+            is the last page.
+        """
+
+        params = list(args)
+        columns = ', '.join(order_by)
+
+        if after is not None:
+            if len(after) != len(order_by):
+                raise AppError(AppErrorType.VALIDATION_ERROR,
+                               "Invalid cursor.")
+
+            placeholders = ', '.join(
+                f"${i}" for i in range(len(params) + 1,
+                                       len(params) + len(order_by) + 1))
+            query += f" AND ({columns}) {'<' if descending else '>'} " \
+                     f"({placeholders})"
+            params.extend(after)
+
+        direction = ' DESC' if descending else ''
+        query += " ORDER BY " + \
+            ', '.join(f"{c}{direction}" for c in order_by) + \
+            f" LIMIT ${len(params) + 1}"
+        params.append(limit + 1)
+
+        try:
+            rows = await self.fetch_raw(query, *params)
+        except asyncpg.DataError as e:
+            if after is None:
+                raise e
+            raise AppError(AppErrorType.VALIDATION_ERROR, "Invalid cursor.")
+
+        if len(rows) <= limit:
+            return rows, None
+
+        rows = rows[:limit]
+        return rows, [rows[-1][c] for c in order_by]
+
 
 T = TypeVar('T', bound=BaseModel)  # underlying entity
 U = TypeVar('U', bound=BaseModel)  # DTO for updatable fields of the entity
@@ -98,6 +188,28 @@ class BaseRepo(Generic[T, U, C],
             for i in range(len(columns))
         ])
 
+        # Column order of the records passed to COPY / executemany
+        self.column_list = list(columns)
+
+        # Upserts need the keys in the inserted columns, tables with
+        # generated keys (serial ids) can not be upserted
+        self.upsert_query = None
+        # columns identifying the record an upsert overwrites
+        self.upsert_key = list(key_columns)
+        if set(key_columns) <= set(self.column_list):
+            updates = [c for c in self.column_list if c not in key_columns]
+            if updates:
+                conflict_action = 'DO UPDATE SET ' + ','.join(
+                    f"{c} = EXCLUDED.{c}" for c in updates)
+            else:
+                conflict_action = 'DO NOTHING'
+
+            self.upsert_query = f"""
+                INSERT INTO {table_name} ({self.columns})
+                    VALUES ({self.insert_placeholders})
+                    ON CONFLICT ({self.key_columns}) {conflict_action}
+            """
+
         self.model_types = model_types
 
     async def get_by_keys(self, keys: List[Any]) -> Optional[T]:
@@ -134,10 +246,34 @@ class BaseRepo(Generic[T, U, C],
         """
 
         return await self.fetch(
-            f"SELECT * FROM {self.table_name} LIMIT $1 OFFSET $2",
+            f"""
+            SELECT * FROM {self.table_name}
+                ORDER BY {self.key_columns}
+                LIMIT $1 OFFSET $2
+            """,
             limit, offset
         )
 
+    async def list_page(self, limit: int,
+                        after: Optional[List[Any]] = None) \
+            -> Tuple[List[T], Optional[List[Any]]]:
+        """Fetch a keyset-paginated list of entities ordered by their keys.
+
+        Args:
+            limit: Maximum number of records to return.
+            after: Key values of the last record of the previous page.
+
+        Returns:
+            The entities, and the keys of the last one if there may be more.
+        """
+
+        rows, next_after = await self.fetch_page(
+            f"SELECT * FROM {self.table_name} WHERE true", [],
+            self.key_columns.split(','), limit, after
+        )
+
+        return [self.model(**row) for row in rows], next_after
+
     async def insert(self, record: C) -> Optional[dict]:
         """Insert a new record into the database.
 
@@ -160,6 +296,101 @@ class BaseRepo(Generic[T, U, C],
             *list(model_dump.values())
         )
 
+    async def insert_many(self, records: List[C]) -> int:
+        """Insert records in bulk with a single COPY.
+
+        The batch is atomic, a constraint violation by any record rejects all
+        of them.
+
+        Args:
+            records: CreateDTOs of the records to insert.
+
+        Returns:
+            int: Number of inserted records.
+        """
+
+        if not records:
+            return 0
+
+        async with self.acquire() as conn:
+            status = await conn.copy_records_to_table(
+                self.table_name,
+                records=[tuple(r.model_dump().values()) for r in records],
+                columns=self.column_list
+            )
+
+        return int(status.rsplit(' ', 1)[-1])
+
+    async def upsert_many(self, records: List[C]) -> int:
+        """Insert records in bulk, updating the ones whose keys exist.
+
+        Runs one prepared statement for all records (`executemany`), which is
+        atomic. Records are written in `upsert_key` order, so concurrent
+        batches lock their rows in the same order.
+
+        Args:
+            records: CreateDTOs of the records to insert or update.
+
+        Returns:
+            int: Number of processed records.
+        """
+
+        if self.upsert_query is None:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           f"{self.table_name} keys are generated, records "
+                           "can not be upserted.")
+
+        if not records:
+            return 0
+
+        key = [self.column_list.index(c) for c in self.upsert_key]
+        rows = sorted((tuple(r.model_dump().values()) for r in records),
+                      key=lambda row: [row[i] for i in key])
+
+        async with self.acquire() as conn:
+            await conn.executemany(self.upsert_query, rows)
+
+        return len(records)
+
+    async def delete_many(self, keys: List[List[Any]]) -> List[dict]:
+        """Delete records by their primary keys in a single statement.
+
+        Args:
+            keys: Primary key(s) of each record to delete.
+
+        Returns:
+            List[dict]: The primary keys of the deleted records.
+        """
+
+        if not keys:
+            return []
+
+        if self.key_column_count == 1:
+            return await self.fetch_raw(
+                f"""
+                DELETE FROM {self.table_name}
+                WHERE {self.key_columns} = ANY($1)
+                RETURNING {self.key_columns}
+                """,
+                [k[0] for k in keys]
+            )
+
+        # composite keys: (a, b) IN (($1, $2), ($3, $4), ...)
+        n = self.key_column_count
+        rows = ','.join(
+            '(' + ','.join(f"${i * n + j + 1}" for j in range(n)) + ')'
+            for i in range(len(keys))
+        )
+
+        return await self.fetch_raw(
+            f"""
+            DELETE FROM {self.table_name}
+            WHERE ({self.key_columns}) IN ({rows})
+            RETURNING {self.key_columns}
+            """,
+            *[v for k in keys for v in k]
+        )
+
     async def update(self, keys: List[Any], update_dto: U) \
             -> Optional[dict]:
         """Dynamically update specific fields of a record.
@@ -0,0 +1,50 @@
+from . import BaseRepo
+
+from src.dto import IndicatorDefinitionCreateDto, \
+    IndicatorDefinitionUpdateDto, IndicatorValueCreateDto, \
+    IndicatorValueUpdateDto
+from src.entities import IndicatorDefinition, IndicatorValue
+
+from typing import List
+
+
+class IndicatorCatalogRepo(BaseRepo[IndicatorDefinition,
+                                    IndicatorDefinitionUpdateDto,
+                                    IndicatorDefinitionCreateDto]):
+    """Series of the long-format indicator store (see
+    db/07-indicator-catalog.sql).
+    """
+
+    def __init__(self, pool):
+        super().__init__(pool, 'indicator_catalog', ['id'],
+                         (IndicatorDefinition, IndicatorDefinitionUpdateDto,
+                          IndicatorDefinitionCreateDto))
+
+        # ids are generated, catalog entries are upserted by series code
+        self.upsert_key = ['code']
+        updates = [c for c in self.column_list if c != 'code']
+        self.upsert_query = f"""
+            INSERT INTO indicator_catalog ({self.columns})
+                VALUES ({self.insert_placeholders})
+                ON CONFLICT (code) DO UPDATE SET
+                {', '.join(f"{c} = EXCLUDED.{c}" for c in updates)}
+        """
+
+    async def get_by_codes(self, codes: List[str]) \
+            -> List[IndicatorDefinition]:
+        """Catalog entries of series `codes`, unknown codes are omitted."""
+        return await self.fetch(
+            "SELECT * FROM indicator_catalog WHERE code = ANY($1::text[]) "
+            "ORDER BY code",
+            codes
+        )
+
+
+class IndicatorValueRepo(BaseRepo[IndicatorValue, IndicatorValueUpdateDto,
+                                  IndicatorValueCreateDto]):
+    def __init__(self, pool):
+        super().__init__(pool, 'indicator_values',
+                         ['indicator_id', 'provider_id', 'economy_code',
+                          'year'],
+                         (IndicatorValue, IndicatorValueUpdateDto,
+                          IndicatorValueCreateDto))
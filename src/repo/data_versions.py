@@ -0,0 +1,128 @@
+"""Data change notifications.
+
+Triggers (db/03-data-versions.sql) keep change counters per table and
+economy in `data_versions`, and notify the `data_changes` channel whenever a
+statement commits changes. `DataChangeListener` holds a dedicated connection
+listening on that channel, so every application process learns about writes
+made by any process (or by hand) and can invalidate its caches precisely.
+"""
+
+from src.error import log
+
+from typing import Any, Callable, List, Optional
+
+import asyncio
+import asyncpg
+import json
+
+
+DATA_CHANGES_CHANNEL = 'data_changes'
+
+# callback(table, economies), `economies` is None when any row may have
+# changed
+ChangeCallback = Callable[[str, Optional[List[str]]], Any]
+
+
+class DataChangeListener:
+    """Listens for `data_changes` notifications.
+
+    Notifications sent while the connection is down are lost. After
+    reconnecting, the callbacks are therefore run for every tracked table
+    with `economies` None.
+
+    Attributes:
+        callbacks: Run for every notification.
+        reconnect_interval: Seconds between reconnection attempts.
+        notifications: Notifications received.
+    """
+
+    def __init__(self, dsn: str, reconnect_interval: float = 5.0):
+        self.dsn = dsn
+        self.reconnect_interval = reconnect_interval
+        self.callbacks: List[ChangeCallback] = []
+        self.notifications = 0
+
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def start(self):
+        """Connect and start listening."""
+
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(self._terminated)
+        await self._conn.add_listener(DATA_CHANGES_CHANNEL, self._notified)
+
+    async def close(self):
+        self._closed = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self.connected:
+            await self._conn.close()
+
+    def _notified(self, conn, pid, channel, payload: str):
+        self.notifications += 1
+        try:
+            change = json.loads(payload)
+            table, economies = change['table'], change['economies']
+        except (ValueError, KeyError) as e:
+            log.warning("malformed data change notification",
+                        payload=payload, error=str(e))
+            return
+
+        self._dispatch(table, economies)
+
+    def _dispatch(self, table: str, economies: Optional[List[str]]):
+        for callback in self.callbacks:
+            try:
+                callback(table, economies)
+            except Exception as e:
+                log.error("data change callback failed", table=table,
+                          error=str(e))
+
+    def _terminated(self, conn):
+        if self._closed or self._reconnect is not None:
+            return
+
+        log.warning("data change listener disconnected")
+        self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        while True:
+            await asyncio.sleep(self.reconnect_interval)
+            try:
+                await self.start()
+                tables = await self._conn.fetch(
+                    "SELECT DISTINCT table_name FROM data_versions")
+            except (OSError, asyncpg.PostgresError,
+                    asyncpg.InterfaceError) as e:
+                log.warning("data change listener reconnect failed",
+                            error=str(e))
+                if self.connected:
+                    self._conn.terminate()
+                continue
+
+            break
+
+        self._reconnect = None
+        log.info("data change listener reconnected")
+
+        # changes made meanwhile were not notified
+        for row in tables:
+            self._dispatch(row['table_name'], None)
+
+    def stats(self) -> dict:
+        return {
+            'connected': self.connected,
+            'notifications': self.notifications,
+        }
+
+
+async def create_listener(dsn: str) -> DataChangeListener:
+    listener = DataChangeListener(dsn)
+    await listener.start()
+    return listener
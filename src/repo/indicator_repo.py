@@ -1,7 +1,29 @@
 from . import BaseRepo
 
+from .indicator_statements import INSERT_EMPTY, INSERT_EMPTY_MANY, \
+    STATEMENTS, TRUNCATE
+
 from src.dto import IndicatorCreateDto, IndicatorUpdateDto
 from src.entities import Indicator
+from src.indicators import CATEGORIES, FIELD_NAMES, KEY_COLUMNS
+from src.tracing import span
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+# physical table -> indicator fields stored in it
+INDICATOR_TABLES = {c.table: list(c.field_names) for c in CATEGORIES}
+
+
+def column_arrays(payloads: Iterable[dict],
+                  columns: Sequence[str]) -> List[list]:
+    """Arrays of `columns` of `payloads`, the parameters of a batch
+    statement. A key repeated in the batch keeps its last payload, like
+    upserting them one by one would, and keys are sorted so concurrent
+    batches lock rows in the same order.
+    """
+    by_key = {tuple(p[c] for c in KEY_COLUMNS): p for p in payloads}
+    rows = [by_key[k] for k in sorted(by_key)]
+    return [[p[c] for p in rows] for c in columns]
 
 
 class IndicatorRepo(BaseRepo):
@@ -9,16 +31,28 @@ class IndicatorRepo(BaseRepo):
     `economic_indicators`, `health_indicators`, `environment_indicators`.
 
     The public API (get_indicator, upsert_indicator) remains unchanged and
-    returns/accepts the same combined record shape as before.
+    returns/accepts the same combined record shape as before. Statements
+    come precompiled from `indicator_statements`.
+
+    Attributes:
+        on_change: Callbacks run with the changed economy codes (None if
+                   unknown) after every write that may have changed
+                   indicator data, e.g. to invalidate cached responses
+                   before the database's change notification arrives.
     """
 
     def __init__(self, pool):
         # Keep BaseRepo initialized for helper methods. Table name here is
         # informational only; we won't rely on BaseRepo's single-table
         # insert/update for indicators anymore.
-        super().__init__(pool, 'indicators',
-                         ['provider_id', 'economy_code', 'year'],
+        super().__init__(pool, 'indicators', list(KEY_COLUMNS),
                          (Indicator, IndicatorUpdateDto, IndicatorCreateDto))
+        self.on_change: List[Callable[[Optional[List[str]]], Any]] = []
+
+    def changed(self, economies: Optional[Iterable[str]] = None):
+        economies = None if economies is None else sorted(set(economies))
+        for callback in self.on_change:
+            callback(economies)
 
     async def get_indicator(self, provider_id: int, economy_code: str,
                             year: int):  # PORTAL
@@ -26,23 +60,13 @@ class IndicatorRepo(BaseRepo):
         the three indicator tables. Returns merged dict or None.
         """
         # Fetch rows from each table and merge results in Python for clarity.
-        econ = await self.fetchrow_raw(
-            "SELECT * FROM economic_indicators WHERE provider_id = $1 "
-            "AND economy_code = $2 AND year = $3",
-            provider_id, economy_code, year
-        )
-        health = await self.fetchrow_raw(
-            "SELECT * FROM health_indicators WHERE provider_id = $1 "
-            "AND economy_code = $2 AND year = $3",
-            provider_id, economy_code, year
-        )
-        env = await self.fetchrow_raw(
-            "SELECT * FROM environment_indicators WHERE provider_id = $1 "
-            "AND economy_code = $2 AND year = $3",
-            provider_id, economy_code, year
-        )
-
-        if not (econ or health or env):
+        parts = [
+            await self.fetchrow_raw(stmt.select, provider_id, economy_code,
+                                    year)
+            for stmt in STATEMENTS
+        ]
+
+        if not any(parts):
             return None
 
         # Start with the composite key fields
@@ -52,14 +76,10 @@ class IndicatorRepo(BaseRepo):
             'year': year
         }
 
-        # Merge non-key fields from each table (later tables overwrite earlier
-        # ones for identical keys, but they are disjoint by design)
-        for part in (econ, health, env):
+        # Merge the fields of each table, they are disjoint by design
+        for part in parts:
             if part:
-                for k, v in part.items():
-                    if k in ('provider_id', 'economy_code', 'year'):
-                        continue
-                    result[k] = v
+                result.update(part)
 
         return result
 
@@ -72,80 +92,38 @@ class IndicatorRepo(BaseRepo):
         combined result dict and `was_created` boolean that is True if any of
         the affected tables created a new row.
         """
-        economic_fields = [
-            'industry', 'gdp_per_capita', 'trade',
-            'agriculture_forestry_and_fishing'
-        ]
-        health_fields = [
-            'community_health_workers',
-            'prevalence_of_undernourishment',
-            'prevalence_of_severe_food_insecurity',
-            'basic_handwashing_facilities',
-            'safely_managed_drinking_water_services',
-            'diabetes_prevalence'
-        ]
-        environment_fields = [
-            'energy_use', 'access_to_electricity',
-            'alternative_and_nuclear_energy',
-            'permanent_cropland', 'crop_production_index',
-            'gdp_per_unit_of_energy_use'
-        ]
-
         created_any = False
         performed_any = False
 
-        async def _upsert_group(table_name, fields):
-            nonlocal created_any, performed_any
-            cols = ['provider_id', 'economy_code', 'year'] + fields
-            values = [provider_id, economy_code, year] + \
-                [data.get(f) for f in fields]
-
-            # If all provided values for the group are None/absent, skip
-            if all(v is None for v in values[3:]):
-                return
-
-            performed_any = True
-
-            placeholders = ', '.join([f"${i + 1}" for i in range(len(values))])
-            cols_str = ', '.join(cols)
-            update_clause = ', '.join([f"{f} = EXCLUDED.{f}" for f in fields])
-
-            query = f"""
-                INSERT INTO {table_name} ({cols_str})
-                VALUES ({placeholders})
-                ON CONFLICT (provider_id, economy_code, year)
-                DO UPDATE SET {update_clause}
-                RETURNING (xmax = 0) AS was_created
-            """
+        # Upsert per logical group
+        with span('upsert'):
+            for stmt in STATEMENTS:
+                values = [data.get(f) for f in stmt.category.field_names]
 
-            res = await self.fetchrow_raw(query, *values)
-            if res and res.get('was_created'):
-                created_any = True
+                # If all provided values for the group are None/absent, skip
+                if all(v is None for v in values):
+                    continue
 
-        # Upsert per logical group
-        await _upsert_group('economic_indicators', economic_fields)
-        await _upsert_group('health_indicators', health_fields)
-        await _upsert_group('environment_indicators', environment_fields)
+                performed_any = True
+                res = await self.fetchrow_raw(stmt.upsert, provider_id,
+                                              economy_code, year, *values)
+                if res and res.get('was_created'):
+                    created_any = True
 
         # Preserve previous behaviour: if client provided no indicator fields
         # at all, create a minimal row in `economic_indicators` so a record
         # exists.
         if not performed_any:
-            res = await self.fetchrow_raw(
-                """
-                INSERT INTO economic_indicators (provider_id, economy_code,
-                                                 year)
-                VALUES ($1, $2, $3)
-                ON CONFLICT (provider_id, economy_code, year) DO NOTHING
-                RETURNING (xmax = 0) AS was_created
-                """,
-                provider_id, economy_code, year
-            )
+            res = await self.fetchrow_raw(INSERT_EMPTY, provider_id,
+                                          economy_code, year)
             if res and res.get('was_created'):
                 created_any = True
 
+        self.changed([economy_code])
+
         # Return the merged record and whether anything was created
-        result = await self.get_indicator(provider_id, economy_code, year)
+        with span('read_back'):
+            result = await self.get_indicator(provider_id, economy_code, year)
         return result, created_any
 
     # --- Override BaseRepo CRUD methods that would otherwise act on the
@@ -192,51 +170,26 @@ class IndicatorRepo(BaseRepo):
 
         provider_id, economy_code, year = keys
 
-        economic_fields = {
-            'industry', 'gdp_per_capita', 'trade',
-            'agriculture_forestry_and_fishing'
-        }
-        health_fields = {
-            'community_health_workers',
-            'prevalence_of_undernourishment',
-            'prevalence_of_severe_food_insecurity',
-            'basic_handwashing_facilities',
-            'safely_managed_drinking_water_services',
-            'diabetes_prevalence'
-        }
-        environment_fields = {
-            'energy_use', 'access_to_electricity',
-            'alternative_and_nuclear_energy',
-            'permanent_cropland', 'crop_production_index',
-            'gdp_per_unit_of_energy_use'
-        }
-
-        updates = {
-            'economic_indicators': {k: v for k, v in fields_to_update.items() if k in economic_fields},
-            'health_indicators': {k: v for k, v in fields_to_update.items() if k in health_fields},
-            'environment_indicators': {k: v for k, v in fields_to_update.items() if k in environment_fields}
-        }
-
         any_updated = False
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.transaction():
-                for table, cols in updates.items():
-                    if not cols:
+                for stmt in STATEMENTS:
+                    fields = stmt.category.field_names
+                    if fields_to_update.keys().isdisjoint(fields):
                         continue
-                    set_clause = ', '.join([f"{c} = ${i + 4}" for i, c in enumerate(cols.keys())])
-                    # param ordering: provider_id, economy_code, year, <values...>
-                    params = [provider_id, economy_code, year, *cols.values()]
-                    query = f"""
-                        UPDATE {table}
-                        SET {set_clause}
-                        WHERE provider_id = $1 AND economy_code = $2 AND year = $3
-                        RETURNING provider_id, economy_code, year
-                    """
-                    row = await conn.fetchrow(query, *params)
+
+                    # a (set, value) pair per field of the table
+                    params = [provider_id, economy_code, year]
+                    for f in fields:
+                        params += [f in fields_to_update,
+                                   fields_to_update.get(f)]
+
+                    row = await conn.fetchrow(stmt.update, *params)
                     if row:
                         any_updated = True
 
         if any_updated:
+            self.changed([economy_code])
             return {
                 'provider_id': provider_id,
                 'economy_code': economy_code,
@@ -248,21 +201,16 @@ class IndicatorRepo(BaseRepo):
         provider_id, economy_code, year = keys
         deleted_any = False
 
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.transaction():
-                for table in ('economic_indicators', 'health_indicators', 'environment_indicators'):
-                    row = await conn.fetchrow(
-                        f"""
-                        DELETE FROM {table}
-                        WHERE provider_id = $1 AND economy_code = $2 AND year = $3
-                        RETURNING provider_id, economy_code, year
-                        """,
-                        provider_id, economy_code, year
-                    )
+                for stmt in STATEMENTS:
+                    row = await conn.fetchrow(stmt.delete, provider_id,
+                                              economy_code, year)
                     if row:
                         deleted_any = True
 
         if deleted_any:
+            self.changed([economy_code])
             return {
                 'provider_id': provider_id,
                 'economy_code': economy_code,
@@ -270,12 +218,64 @@ class IndicatorRepo(BaseRepo):
             }
         return None
 
+    async def insert_many(self, records: List[IndicatorCreateDto]) -> int:
+        """Indicators are always upserted, like `insert`."""
+        return await self.upsert_many(records)
+
+    async def upsert_many(self, records: List[IndicatorCreateDto]) -> int:
+        """Upsert a batch of indicator records with one statement per
+        category table, in a single transaction. Each record is distributed
+        the same way as `upsert_indicator` does.
+        """
+        if not records:
+            return 0
+
+        payloads = [r.model_dump() for r in records]
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                for stmt in STATEMENTS:
+                    fields = stmt.category.field_names
+                    rows = [p for p in payloads
+                            if any(p[f] is not None for f in fields)]
+                    if rows:
+                        await conn.execute(
+                            stmt.upsert_many,
+                            *column_arrays(rows, KEY_COLUMNS + fields))
+
+                # records without any indicator value still get a row
+                empty = [p for p in payloads
+                         if all(p[f] is None for f in FIELD_NAMES)]
+                if empty:
+                    await conn.execute(INSERT_EMPTY_MANY,
+                                       *column_arrays(empty, KEY_COLUMNS))
+
+        self.changed(p['economy_code'] for p in payloads)
+        return len(records)
+
+    async def delete_many(self, keys: List[List[Any]]) -> List[dict]:
+        """Delete a batch of indicator records from all category tables.
+        Returns the keys of records that existed in any of them.
+        """
+        if not keys:
+            return []
+
+        # key columns as arrays
+        params = [list(column) for column in zip(*keys)]
+
+        deleted = {}
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                for stmt in STATEMENTS:
+                    for row in await conn.fetch(stmt.delete_many, *params):
+                        deleted[tuple(row)] = dict(row)
+
+        if deleted:
+            self.changed(code for _, code, _ in deleted)
+        return list(deleted.values())
+
     async def truncate_cascade(self) -> str:
         """Truncate all three indicator tables."""
-        return await self.execute(
-            """
-            TRUNCATE TABLE economic_indicators, health_indicators, environment_indicators
-                RESTART IDENTITY
-                CASCADE
-            """
-        )
+        status = await self.execute(TRUNCATE)
+        self.changed()
+        return status
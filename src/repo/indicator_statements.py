@@ -0,0 +1,317 @@
+"""Indicator SQL statements.
+
+Built once, at import, from the indicator registry (`src.indicators`).
+Repositories run these constant strings, so every call of a statement hits
+the same prepared statement of the connection's statement cache instead of
+formatting SQL per call.
+"""
+
+from src.derived import Expression, Field
+from src.indicators import CATEGORIES, CATEGORY_BY_TABLE, KEY_COLUMNS, \
+    IndicatorCategory
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+
+KEYS = ', '.join(KEY_COLUMNS)
+KEY_WHERE = "provider_id = $1 AND economy_code = $2 AND year = $3"
+# key columns passed as arrays
+KEY_ARRAYS = "$1::bigint[], $2::char(3)[], $3::integer[]"
+
+
+@dataclass(frozen=True)
+class CategoryStatements:
+    """Statements of an indicator category table.
+
+    Attributes:
+        select: Fields of a record, params are the key columns.
+        upsert: Insert or overwrite every field of a record, returning
+                `was_created`. Params are the key columns and the fields in
+                category order.
+        upsert_many: `upsert` of a batch of records passed as column arrays
+                     (key columns, then fields in category order), in one
+                     statement. Keys must be unique within the batch.
+        update: Update the flagged fields of a record, returning its key.
+                Params are the key columns, then a (set, value) pair per
+                field in category order: fields whose `set` is false keep
+                their value.
+        delete: Delete a record, returning its key.
+        delete_many: Delete records by key arrays ($1 provider ids, $2
+                     economy codes, $3 years), returning their keys.
+        columns: Fields in category order, qualified by alias `i`.
+    """
+    category: IndicatorCategory
+    select: str
+    upsert: str
+    upsert_many: str
+    update: str
+    delete: str
+    delete_many: str
+    columns: str
+
+
+def category_statements(category: IndicatorCategory) -> CategoryStatements:
+    table, fields = category.table, category.field_names
+    field_list = ', '.join(fields)
+    placeholders = ', '.join(
+        f"${i + 1}" for i in range(len(KEY_COLUMNS) + len(fields)))
+    first = len(KEY_COLUMNS) + 1
+
+    return CategoryStatements(
+        category=category,
+        select=f"SELECT {field_list} FROM {table} WHERE {KEY_WHERE}",
+        # system columns (xmax) of partitioned tables can not be returned,
+        # the row is looked up before the upsert instead
+        upsert=f"""
+            WITH existing AS (SELECT FROM {table} WHERE {KEY_WHERE})
+            INSERT INTO {table} ({KEYS}, {field_list})
+            VALUES ({placeholders})
+            ON CONFLICT ({KEYS})
+            DO UPDATE SET {', '.join(f"{f} = EXCLUDED.{f}" for f in fields)}
+            RETURNING NOT EXISTS (SELECT FROM existing) AS was_created
+        """,
+        upsert_many=f"""
+            INSERT INTO {table} ({KEYS}, {field_list})
+            SELECT * FROM unnest({KEY_ARRAYS}, {', '.join(
+                f"${first + i}::real[]" for i in range(len(fields)))})
+            ON CONFLICT ({KEYS})
+            DO UPDATE SET {', '.join(f"{f} = EXCLUDED.{f}" for f in fields)}
+        """,
+        update=f"""
+            UPDATE {table}
+            SET {', '.join(
+                f"{f} = CASE WHEN ${first + 2 * i} "
+                f"THEN ${first + 2 * i + 1} ELSE {f} END"
+                for i, f in enumerate(fields))}
+            WHERE {KEY_WHERE}
+            RETURNING {KEYS}
+        """,
+        delete=f"DELETE FROM {table} WHERE {KEY_WHERE} RETURNING {KEYS}",
+        delete_many=f"""
+            DELETE FROM {table}
+            WHERE ({KEYS}) IN (
+                SELECT * FROM unnest({KEY_ARRAYS})
+            )
+            RETURNING {KEYS}
+        """,
+        columns=', '.join(f"i.{f}" for f in fields),
+    )
+
+
+STATEMENTS: Tuple[CategoryStatements, ...] = tuple(
+    category_statements(c) for c in CATEGORIES)
+STATEMENTS_BY_NAME: Dict[str, CategoryStatements] = {
+    s.category.name: s for s in STATEMENTS
+}
+
+# records without any indicator value get an empty economic row
+INSERT_EMPTY = f"""
+    INSERT INTO {CATEGORIES[0].table} ({KEYS})
+    VALUES ($1, $2, $3)
+    ON CONFLICT ({KEYS}) DO NOTHING
+    RETURNING true AS was_created
+"""
+INSERT_EMPTY_MANY = f"""
+    INSERT INTO {CATEGORIES[0].table} ({KEYS})
+    SELECT * FROM unnest({KEY_ARRAYS})
+    ON CONFLICT ({KEYS}) DO NOTHING
+"""
+
+TRUNCATE = f"""
+    TRUNCATE TABLE {', '.join(c.table for c in CATEGORIES)}
+        RESTART IDENTITY
+        CASCADE
+"""
+
+
+# Public list queries
+# ---------------------------------------------------------
+# The FROM clause of a list query depends on whether it reads current or
+# past (`as_of`) rows, its WHERE clause on which filters are set. Both take
+# a handful of shapes, the composed queries are kept per shape.
+
+LIST_JOINS = """
+    JOIN economies e ON i.economy_code = e.code
+    JOIN providers p ON i.provider_id = p.id
+    LEFT JOIN regions r ON e.region = r.id
+"""
+
+
+def combined_columns() -> str:
+    """Key columns and fields of the category row sources FULL OUTER
+    JOINed as `c0`, `c1`, ... (category order).
+    """
+    aliases = [f"c{i}" for i in range(len(CATEGORIES))]
+    keys = [
+        f"COALESCE({', '.join(f'{a}.{k}' for a in aliases)}) AS {k}"
+        for k in KEY_COLUMNS
+    ]
+    fields = [
+        f"{alias}.{f}"
+        for alias, category in zip(aliases, CATEGORIES)
+        for f in category.field_names
+    ]
+    return ', '.join(keys + fields)
+
+
+COMBINED_COLUMNS = combined_columns()
+ALL_COLUMNS = ', '.join(
+    f"i.{f}" for c in CATEGORIES for f in c.field_names)
+
+
+@lru_cache(maxsize=256)
+def combined_list_query(sources: Tuple[str, ...], where_clause: str,
+                        limit: str) -> str:
+    """Listing of the records of every category, `sources` are the category
+    row sources (tables or subqueries) in category order.
+    """
+    joins = f"{sources[0]} c0" + ''.join(
+        f" FULL OUTER JOIN {source} c{i} USING ({KEYS})"
+        for i, source in enumerate(sources[1:], 1))
+
+    return f"""
+        SELECT
+            i.provider_id,
+            p.name AS provider_name,
+            i.economy_code,
+            e.name AS economy_name,
+            r.name AS region_name,
+            il.name AS income_level_name,
+            i.year,
+            {ALL_COLUMNS}
+        FROM (SELECT {COMBINED_COLUMNS} FROM {joins}) i
+        {LIST_JOINS}
+        LEFT JOIN income_levels il ON e.income_level = il.id
+        {where_clause}
+        ORDER BY i.year DESC, e.name
+        {limit}
+    """
+
+
+@lru_cache(maxsize=256)
+def category_list_query(category: str, source: str, where_clause: str,
+                        limit: str) -> str:
+    """Listing of the records of category `category` read from `source`."""
+    return f"""
+        SELECT
+            e.code AS economy_code,
+            e.name AS economy_name,
+            r.name AS region_name,
+            i.year,
+            {STATEMENTS_BY_NAME[category].columns},
+            p.name AS provider_name
+        FROM {source} i
+        {LIST_JOINS}
+        {where_clause}
+        ORDER BY i.year DESC, e.name
+        {limit}
+    """
+
+
+@lru_cache(maxsize=256)
+def revision_source(table: str, as_of: str,
+                    key_conditions: Tuple[str, ...] = ()) -> str:
+    """Rows of category table `table` in effect at the time of placeholder
+    `as_of`, resolved from its revisions (see db/05-indicator-revisions.sql).
+    `key_conditions` filter the keys.
+
+    Keys that had a row then have a row now or a deleted revision since, the
+    latest revision of each is found with one index probe.
+    """
+    fields = CATEGORY_BY_TABLE[table].field_names
+    where = ''.join(f" AND {c}" for c in key_conditions)
+
+    return f"""(
+        SELECT {', '.join(f"k.{k}" for k in KEY_COLUMNS)},
+            {', '.join(f"r.{f}" for f in fields)}
+        FROM (
+            SELECT {KEYS} FROM {table} WHERE true{where}
+            UNION
+            SELECT {KEYS} FROM {table}_revisions WHERE deleted{where}
+        ) k
+        CROSS JOIN LATERAL (
+            SELECT * FROM {table}_revisions r
+            WHERE r.provider_id = k.provider_id
+              AND r.economy_code = k.economy_code
+              AND r.year = k.year
+              AND r.valid_from <= {as_of}
+            ORDER BY r.valid_from DESC
+            LIMIT 1
+        ) r
+        WHERE NOT r.deleted
+    )"""
+
+
+# Derived indicators
+# ---------------------------------------------------------
+def derived_sql(expression: Expression) -> str:
+    """SQL of derived `expression` (see `src.derived`) over the rows of
+    alias `i`, its windows use window `w` (a provider and economy's rows in
+    year order).
+    """
+    if isinstance(expression, Field):
+        return f"i.{expression.name}::float8"
+
+    args = [derived_sql(arg) for arg in expression.args]
+    match expression.function:
+        case 'yoy':
+            # only consecutive years are compared
+            return f"CASE WHEN lag(i.year) OVER w = i.year - 1 " \
+                f"THEN ({args[0]} / NULLIF(lag({args[0]}) OVER w, 0) - 1) " \
+                f"* 100 END"
+        case 'avg':
+            return f"avg({args[0]}) OVER (w RANGE BETWEEN " \
+                f"{expression.years - 1} PRECEDING AND CURRENT ROW)"
+        case 'ratio':
+            return f"({args[0]} / NULLIF({args[1]}, 0))"
+        case 'product':
+            return f"({args[0]} * {args[1]})"
+
+    raise ValueError(f"unknown function {expression.function}")
+
+
+@lru_cache(maxsize=256)
+def derived_list_query(expressions: Tuple[Tuple[str, Expression], ...],
+                       sources: Tuple[Tuple[str, str], ...],
+                       where_clause: str, limit: str) -> str:
+    """Listing of derived `expressions` (name, expression) computed from
+    `sources` (category table, row source) and filtered by `where_clause`
+    over alias `d` (the derived rows) and `e` (their economies).
+    """
+    if len(sources) == 1:
+        source = sources[0][1]
+    else:
+        fields = ', '.join(
+            f for table, _ in sources
+            for f in CATEGORY_BY_TABLE[table].field_names)
+        joins = f"{sources[0][1]} c0" + ''.join(
+            f" FULL OUTER JOIN {source} c{i} USING ({KEYS})"
+            for i, (_, source) in enumerate(sources[1:], 1))
+        source = f"(SELECT {KEYS}, {fields} FROM {joins})"
+
+    columns = ',\n'.join(
+        f'{derived_sql(expression)} AS "{name}"'
+        for name, expression in expressions)
+
+    return f"""
+        SELECT
+            d.*,
+            e.name AS economy_name,
+            r.name AS region_name,
+            p.name AS provider_name
+        FROM (
+            SELECT i.provider_id, i.economy_code, i.year,
+                {columns}
+            FROM {source} i
+            WINDOW w AS (PARTITION BY i.provider_id, i.economy_code
+                         ORDER BY i.year)
+        ) d
+        JOIN economies e ON d.economy_code = e.code
+        JOIN providers p ON d.provider_id = p.id
+        LEFT JOIN regions r ON e.region = r.id
+        {where_clause}
+        ORDER BY d.year DESC, e.name
+        {limit}
+    """
@@ -0,0 +1,293 @@
+"""Database access instrumentation.
+
+Every connection checkout and query issued by the repository layer is routed
+through the process-wide `instrumentation` object. It records how long
+requests waited for a pooled connection, how long queries took and how many
+rows they returned, grouped by query shape. Queries slower than
+`slow_query_ms` are logged.
+
+Other components (metrics, tracing) subscribe to the individual observations
+with `add_hook`.
+"""
+
+from src import deadline
+from src.error import log
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+import hashlib
+import re
+
+import asyncpg
+
+
+# (shape tag, elapsed milliseconds, rows)
+QueryHook = Callable[[str, float, int], None]
+# (elapsed milliseconds)
+AcquireHook = Callable[[float], None]
+
+# shapes beyond `max_shapes` are aggregated under this one
+OTHER_SHAPE = 'other'
+
+_VERB = re.compile(r'^(WITH|SELECT|INSERT|UPDATE|DELETE|TRUNCATE|COPY)\b',
+                   re.IGNORECASE)
+_TARGET = {
+    'with': re.compile(r'\bFROM\s+([a-z_]\w*)', re.IGNORECASE),
+    'select': re.compile(r'\bFROM\s+([a-z_]\w*)', re.IGNORECASE),
+    'insert': re.compile(r'^INSERT\s+INTO\s+(\w+)', re.IGNORECASE),
+    'update': re.compile(r'^UPDATE\s+(\w+)', re.IGNORECASE),
+    'delete': re.compile(r'^DELETE\s+FROM\s+(\w+)', re.IGNORECASE),
+    'truncate': re.compile(r'^TRUNCATE\s+(?:TABLE\s+)?(\w+)', re.IGNORECASE),
+    'copy': re.compile(r'^COPY\s+"?(\w+)', re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=1024)
+def query_shape(query: str) -> tuple[str, str]:
+    """Normalize a query and derive a short tag from it.
+
+    Queries are already parameterized, so whitespace-normalized text
+    identifies the shape. The tag, e.g. `select:permissions#1f2e3d`, is short
+    enough to be used as a log field or metric label.
+
+    Returns:
+        Tuple of (tag, normalized_query).
+    """
+
+    normalized = ' '.join(query.split())
+    digest = hashlib.blake2b(normalized.encode(), digest_size=3).hexdigest()
+
+    verb = _VERB.match(normalized)
+    if verb is None:
+        return f"query#{digest}", normalized
+
+    verb = verb.group(1).lower()
+    target = _TARGET[verb].search(normalized)
+    if target is None:
+        return f"{verb}#{digest}", normalized
+
+    tag = f"{'select' if verb == 'with' else verb}:{target.group(1)}#{digest}"
+
+    return tag, normalized
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, str):
+        # command status, e.g. "UPDATE 3" or "COPY 1000"
+        tail = result.rsplit(' ', 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    return 1
+
+
+@dataclass
+class QueryStats:
+    """Aggregated timings for one query shape."""
+
+    tag: str
+    query: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'tag': self.tag,
+            'query': self.query,
+            'calls': self.calls,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3)
+            if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+        }
+
+
+class InstrumentedConnection:
+    """Thin proxy over `asyncpg.Connection` timing the query methods.
+
+    Anything that is not a query method (transactions, listeners...) is
+    passed through unchanged.
+    """
+
+    def __init__(self, conn: asyncpg.Connection,
+                 instrumentation: 'PoolInstrumentation'):
+        self._conn = conn
+        self._instrumentation = instrumentation
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any):
+        return await self._instrumentation.observe(
+            self._conn.fetch, query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any):
+        return await self._instrumentation.observe(
+            self._conn.fetchrow, query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any):
+        return await self._instrumentation.observe(
+            self._conn.fetchval, query, *args, **kwargs)
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any):
+        return await self._instrumentation.observe(
+            self._conn.execute, query, *args, **kwargs)
+
+    async def executemany(self, query: str, args, **kwargs: Any):
+        return await self._instrumentation.observe(
+            self._conn.executemany, query, args, **kwargs)
+
+    async def copy_records_to_table(self, table_name: str, **kwargs: Any):
+        async def copy(_query, **kwargs):
+            return await self._conn.copy_records_to_table(table_name,
+                                                          **kwargs)
+
+        # recorded under the shape of the equivalent COPY statement
+        return await self._instrumentation.observe(
+            copy, f"COPY {table_name}", **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class PoolInstrumentation:
+    """Collects connection pool and query execution statistics.
+
+    Attributes:
+        slow_query_ms: Queries running longer than this are logged.
+        max_shapes: Query shapes with their own statistics, the queries of
+                    any further shape are counted under `OTHER_SHAPE`.
+        waiters: Number of callers currently waiting for a connection.
+    """
+
+    def __init__(self, slow_query_ms: float = 500.0, max_shapes: int = 512):
+        self.slow_query_ms = slow_query_ms
+        self.max_shapes = max_shapes
+
+        self.waiters = 0
+        self.acquires = 0
+        self.acquire_total_ms = 0.0
+        self.acquire_max_ms = 0.0
+
+        self.queries: Dict[str, QueryStats] = {}
+
+        self.query_hooks: List[QueryHook] = []
+        self.acquire_hooks: List[AcquireHook] = []
+
+    def add_hook(self, query_hook: QueryHook | None = None,
+                 acquire_hook: AcquireHook | None = None):
+        """Subscribe to individual query and/or acquire observations."""
+
+        if query_hook is not None:
+            self.query_hooks.append(query_hook)
+        if acquire_hook is not None:
+            self.acquire_hooks.append(acquire_hook)
+
+    @asynccontextmanager
+    async def acquire(self, pool) -> AsyncIterator[InstrumentedConnection]:
+        """Check out a connection from `pool`, recording the wait time."""
+
+        self.waiters += 1
+        start = perf_counter()
+        waiting = True
+
+        try:
+            async with pool.acquire(timeout=deadline.remaining()) as conn:
+                waiting = False
+                self.waiters -= 1
+                self._record_acquire((perf_counter() - start) * 1000)
+
+                yield InstrumentedConnection(conn, self)
+        finally:
+            if waiting:
+                self.waiters -= 1
+
+    async def observe(self, method: Callable, query: str, *args: Any,
+                      **kwargs: Any) -> Any:
+        """Run `method(query, *args)` and record its timing.
+
+        The query is bounded by the request deadline (unless a `timeout` is
+        given) and cancelled if the client disconnects.
+        """
+
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = deadline.remaining()
+
+        start = perf_counter()
+        result = None
+
+        try:
+            result = await deadline.cancel_on_disconnect(
+                method(query, *args, **kwargs))
+            return result
+        finally:
+            self._record_query(query, (perf_counter() - start) * 1000,
+                               _row_count(result))
+
+    def _record_acquire(self, elapsed_ms: float):
+        self.acquires += 1
+        self.acquire_total_ms += elapsed_ms
+        self.acquire_max_ms = max(self.acquire_max_ms, elapsed_ms)
+
+        for hook in self.acquire_hooks:
+            hook(elapsed_ms)
+
+    def _record_query(self, query: str, elapsed_ms: float, rows: int):
+        tag, normalized = query_shape(query)
+
+        stats = self.queries.get(normalized)
+        if stats is None:
+            if len(self.queries) < self.max_shapes:
+                stats = self.queries[normalized] = QueryStats(tag, normalized)
+            else:
+                # ad-hoc SQL must not grow the statistics without bound
+                stats = self.queries.get(OTHER_SHAPE)
+                if stats is None:
+                    stats = self.queries[OTHER_SHAPE] = QueryStats(
+                        OTHER_SHAPE, OTHER_SHAPE)
+
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.rows += rows
+
+        if elapsed_ms >= self.slow_query_ms:
+            log.warning("slow query", shape=tag, elapsed_ms=round(elapsed_ms),
+                        rows=rows, query=normalized[:500])
+
+        # metric labels are bounded by the same cap
+        for hook in self.query_hooks:
+            hook(stats.tag, elapsed_ms, rows)
+
+    def pool_stats(self, pool) -> dict:
+        """Current pool occupancy and cumulative acquire wait times."""
+
+        return {
+            'size': pool.get_size(),
+            'idle': pool.get_idle_size(),
+            'min_size': pool.get_min_size(),
+            'max_size': pool.get_max_size(),
+            'waiters': self.waiters,
+            'acquires': self.acquires,
+            'acquire_mean_ms': round(self.acquire_total_ms / self.acquires, 3)
+            if self.acquires else 0.0,
+            'acquire_max_ms': round(self.acquire_max_ms, 3),
+        }
+
+    def query_stats(self) -> List[dict]:
+        """Per-shape query statistics, slowest total time first."""
+
+        return [
+            s.as_dict() for s in sorted(self.queries.values(),
+                                        key=lambda s: s.total_ms,
+                                        reverse=True)
+        ]
+
+
+instrumentation = PoolInstrumentation()
@@ -1,7 +1,144 @@
 from . import BaseRepo
+from .base_repo import like_prefix
 
-from src.dto import PermissionCreateDto, PermissionUpdateDto
+from src.dto import ListParams, PermissionCreateDto, PermissionUpdateDto
 from src.entities import Permission
+from src.error import AppError, AppErrorType
+
+from typing import Any, List, Optional, Set
+
+import asyncpg
+
+
+# direct economy permissions, then the ones covering the economy's region
+CHECK_PERMISSION_QUERY = """
+    SELECT p.id, p.provider_id, p.economy_code, p.region,
+           p.year_start, p.year_end
+    FROM permissions p
+    WHERE p.provider_id = $1
+      AND p.economy_code = $2
+      AND p.region IS NULL
+      AND p.years @> $3::integer
+    UNION ALL
+    SELECT p.id, p.provider_id, p.economy_code, p.region,
+           p.year_start, p.year_end
+    FROM permissions p
+    JOIN economies e ON e.code = $2
+    WHERE p.provider_id = $1
+      AND p.region = e.region
+      AND p.economy_code IS NULL
+      AND p.years @> $3::integer
+    LIMIT 1
+"""
+
+# columns of the unnest statements, in parameter order
+GRANT_COLUMNS = ('provider_id', 'economy_code', 'region', 'year_start',
+                 'year_end', 'footnote')
+
+GRANTS = """
+    SELECT i.*, int4range(i.year_start, i.year_end, '[]') AS years
+    FROM unnest($1::bigint[], $2::bpchar[], $3::bpchar[],
+                $4::integer[], $5::integer[], $6::text[])
+        WITH ORDINALITY AS i (provider_id, economy_code, region,
+                              year_start, year_end, footnote, idx)
+"""
+
+# Ranges of the new grants merged with the existing grants they overlap or
+# adjoin, one row per merged range. `id` is the existing grant equal to the
+# range if any, the range replaces the `replaced` grants otherwise.
+MERGE_QUERY = f"""
+    WITH items AS ({GRANTS}),
+    existing AS (
+        SELECT p.id, p.provider_id, p.economy_code,
+               p.region, p.years, p.footnote
+        FROM permissions p
+        JOIN items v
+          ON p.provider_id = v.provider_id
+         AND p.economy_code = v.economy_code
+         AND p.region IS NULL
+         AND (p.years && v.years OR p.years -|- v.years)
+        UNION
+        SELECT p.id, p.provider_id, p.economy_code,
+               p.region, p.years, p.footnote
+        FROM permissions p
+        JOIN items v
+          ON p.provider_id = v.provider_id
+         AND p.region = v.region
+         AND p.economy_code IS NULL
+         AND (p.years && v.years OR p.years -|- v.years)
+    ),
+    merged AS (
+        SELECT provider_id, economy_code, region,
+               unnest(range_agg(years)) AS years
+        FROM (
+            SELECT provider_id, economy_code, region, years
+            FROM existing
+            UNION ALL
+            SELECT provider_id, economy_code, region, years
+            FROM items
+        ) s
+        GROUP BY provider_id, economy_code, region
+    ),
+    scoped AS (
+        SELECT m.*, e.id, e.years AS existing_years, e.footnote
+        FROM merged m
+        LEFT JOIN existing e
+          ON e.provider_id = m.provider_id
+         AND e.economy_code IS NOT DISTINCT FROM m.economy_code
+         AND e.region IS NOT DISTINCT FROM m.region
+         AND e.years <@ m.years
+    )
+    SELECT
+        m.provider_id, m.economy_code, m.region,
+        lower(m.years) AS year_start, upper(m.years) - 1 AS year_end,
+        COALESCE(
+            (SELECT v.footnote FROM items v
+             WHERE v.provider_id = m.provider_id
+               AND v.economy_code IS NOT DISTINCT FROM m.economy_code
+               AND v.region IS NOT DISTINCT FROM m.region
+               AND v.years <@ m.years
+               AND v.footnote IS NOT NULL
+             ORDER BY v.idx DESC LIMIT 1),
+            (array_agg(m.footnote ORDER BY m.id)
+                FILTER (WHERE m.footnote IS NOT NULL))[1]
+        ) AS footnote,
+        min(m.id) FILTER (WHERE m.existing_years = m.years) AS id,
+        array_remove(array_agg(m.id), NULL) AS replaced
+    FROM scoped m
+    GROUP BY m.provider_id, m.economy_code, m.region, m.years
+"""
+
+INSERT_GRANTS = f"""
+    INSERT INTO permissions ({', '.join(GRANT_COLUMNS)})
+    SELECT {', '.join(GRANT_COLUMNS)} FROM ({GRANTS}) i
+"""
+
+# id of the grant covering each item, in item order
+COVERING_QUERY = f"""
+    SELECT (
+        SELECT p.id FROM permissions p
+        WHERE p.provider_id = i.provider_id
+          AND p.economy_code = i.economy_code
+          AND p.region IS NULL
+          AND p.years @> i.years
+        UNION ALL
+        SELECT p.id FROM permissions p
+        WHERE p.provider_id = i.provider_id
+          AND p.region = i.region
+          AND p.economy_code IS NULL
+          AND p.years @> i.years
+        LIMIT 1
+    ) AS id
+    FROM ({GRANTS}) i
+    ORDER BY i.idx
+"""
+
+
+def permission_arrays(permissions: List[PermissionCreateDto]) -> list:
+    """Column arrays of `permissions`, the parameters of the unnest
+    statements.
+    """
+    return [[getattr(p, c) for p in permissions] for c in GRANT_COLUMNS]
 
 
 class PermissionRepo(BaseRepo[Permission, PermissionUpdateDto,
@@ -46,44 +183,230 @@ class PermissionRepo(BaseRepo[Permission, PermissionUpdateDto,
         Returns:
             The matching permission record if found, None otherwise.
         """
-        return await self.fetchrow_raw(
+        return await self.fetchrow_raw(CHECK_PERMISSION_QUERY,
+                                       provider_id, economy_code, year)
+
+    async def get_permissions_by_provider(self, provider_id: int,
+                                          page: ListParams):  # MANAGEMENT
+        """Fetch a page of a provider's permissions, latest years first.
+
+        Args:
+            provider_id: The provider's ID.
+            page: Pagination, `q` matches economy code or region prefixes.
+
+        Returns:
+            The permissions, and the next page cursor.
+        """
+        query = """
+            SELECT id, provider_id, economy_code, region, year_start,
+                   year_end, footnote, created_at
+            FROM permissions
+            WHERE provider_id = $1
             """
-            SELECT p.id, p.provider_id, p.economy_code, p.region,
-                   p.year_start, p.year_end
-            FROM permissions p
-            LEFT JOIN economies e ON e.code = $2
-            WHERE p.provider_id = $1
-              AND $3 BETWEEN p.year_start AND p.year_end
-              AND (
-                  p.economy_code = $2
-                  OR p.region = e.region
-              )
-            LIMIT 1
-            """,
-            provider_id, economy_code, year
-        )
+        args = [provider_id]
 
-    async def get_permissions_by_provider(self, provider_id):  # MANAGEMENT
-        return await self.fetch_raw(
+        if page.q:
+            query += " AND (economy_code LIKE $2 OR region LIKE $2)"
+            args.append(like_prefix(page.q.upper()))
+
+        return await self.fetch_page(query, args, ['year_start', 'id'],
+                                     page.limit, page.after, descending=True)
+
+    async def create_permissions(
+        self, permissions: List[PermissionCreateDto]
+    ):  # MANAGEMENT
+        """Grant many permissions, merging them into the existing grants.
+
+        Year ranges of the same scope (provider and economy or region) are
+        kept normalized: a new grant overlapping or adjacent to existing ones
+        replaces them with a single merged grant, and grants already covering
+        the new range are left untouched.
+
+        The batch is merged at once. If it violates a constraint (an unknown
+        provider, economy or region), the items are granted one by one
+        instead, each in a savepoint, so the violating items are skipped and
+        reported by the constraint name of their database error.
+
+        Providers of the batch are locked for the transaction, so concurrent
+        grants for the same provider are merged one after another.
+
+        Args:
+            permissions: The permissions to grant.
+
+        Returns:
+            One record per item in input order, with `idx` (0-based), the `id`
+            of the grant covering it or None, and the violated
+            `constraint_name` or None.
+        """
+        violations = [None] * len(permissions)
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await self._lock_providers(
+                    conn, {p.provider_id for p in permissions})
+
+                try:
+                    async with conn.transaction():
+                        await self._grant(conn, permissions)
+                except asyncpg.IntegrityConstraintViolationError:
+                    for idx, permission in enumerate(permissions):
+                        try:
+                            async with conn.transaction():
+                                await self._grant(conn, [permission])
+                        except asyncpg.IntegrityConstraintViolationError \
+                                as e:
+                            violations[idx] = e.constraint_name or \
+                                type(e).__name__
+
+                # merges of later items may have replaced earlier grants
+                ids = await conn.fetch(
+                    COVERING_QUERY,
+                    *permission_arrays([
+                        p for p, violation in zip(permissions, violations)
+                        if violation is None
+                    ])
+                )
+
+        ids = iter(ids)
+        return [
+            {
+                'idx': idx,
+                'id': next(ids)['id'] if violation is None else None,
+                'constraint_name': violation
+            }
+            for idx, violation in enumerate(violations)
+        ]
+
+    async def insert(self, record: PermissionCreateDto) -> Optional[dict]:
+        """Grant `record`, merged like `create_permissions`.
+
+        Raises constraint violations (an unknown provider, economy or
+        region) as database errors.
+
+        Returns:
+            The `id` of the grant covering the record.
+        """
+        if record.year_end < record.year_start:
+            raise AppError(AppErrorType.VALIDATION_ERROR,
+                           "Range start cannot be larger than end.")
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await self._lock_providers(conn, {record.provider_id})
+                await self._grant(conn, [record])
+
+                return {'id': await conn.fetchval(
+                    COVERING_QUERY, *permission_arrays([record]))}
+
+    async def insert_many(self, records: List[PermissionCreateDto]) -> int:
+        """Grant `records` at once, merged like `create_permissions`.
+
+        The batch is atomic, a constraint violation by any record rejects all
+        of them.
+
+        Returns:
+            int: Number of granted records.
+        """
+        if not records:
+            return 0
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await self._lock_providers(
+                    conn, {p.provider_id for p in records})
+                await self._grant(conn, records)
+
+        return len(records)
+
+    async def update(self, keys: List[Any],
+                     update_dto: PermissionUpdateDto) -> Optional[dict]:
+        """Update a grant, merging its new range like a new grant.
+
+        The grant is replaced by the grant covering its new range, which is
+        merged with the grants it overlaps or adjoins.
+
+        Returns:
+            The `id` of the grant covering the new range, or None if the grant
+            does not exist or no field was given.
+        """
+        fields = update_dto.model_dump(exclude_unset=True)
+        if not fields:
+            return None
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                provider_id = await conn.fetchval(
+                    "SELECT provider_id FROM permissions WHERE id = $1",
+                    keys[0])
+                if provider_id is None:
+                    return None
+
+                await self._lock_providers(conn, {provider_id})
+
+                current = await conn.fetchrow(
+                    f"""
+                    DELETE FROM permissions WHERE id = $1
+                    RETURNING {', '.join(GRANT_COLUMNS)}
+                    """,
+                    keys[0])
+                if current is None:
+                    return None
+
+                permission = PermissionCreateDto(**{**dict(current),
+                                                    **fields})
+                if permission.year_end < permission.year_start:
+                    raise AppError(AppErrorType.VALIDATION_ERROR,
+                                   "Range start cannot be larger than end.")
+
+                await self._grant(conn, [permission])
+
+                return {'id': await conn.fetchval(
+                    COVERING_QUERY, *permission_arrays([permission]))}
+
+    async def _lock_providers(self, conn, provider_ids: Set[int]):
+        """Lock providers for the transaction, merges of their grants run
+        one after another.
+        """
+        await conn.execute(
             """
-            SELECT * FROM permissions
-            WHERE provider_id = $1
-            ORDER BY year_start DESC, id DESC
+            SELECT 1 FROM providers
+            WHERE id = ANY($1::bigint[])
+            ORDER BY id
+            FOR NO KEY UPDATE
             """,
-            provider_id
+            list(provider_ids)
         )
 
-    async def create_permission(self, provider_id, year_start, year_end,
-                                economy_code, region, footnote):  # MANAGEMENT
-        return await self.fetchrow_raw(
+    async def _grant(self, conn, permissions: List[PermissionCreateDto]):
+        """Merge `permissions` into the existing grants.
+
+        The grants replaced by merged ranges are deleted before the merged
+        ranges are inserted, by separate statements: the order of the data
+        modifications of a single statement is unspecified.
+        """
+        merged = [
+            m for m in await conn.fetch(MERGE_QUERY,
+                                        *permission_arrays(permissions))
+            if m['id'] is None
+        ]
+        if not merged:
+            return
+
+        stale = [id for m in merged for id in m['replaced']]
+        if stale:
+            await conn.execute(
+                "DELETE FROM permissions WHERE id = ANY($1::bigint[])", stale)
+
+        await conn.execute(
+            INSERT_GRANTS, *[[m[c] for m in merged] for c in GRANT_COLUMNS])
+
+    async def delete_permissions(self, ids: List[int]):  # MANAGEMENT
+        return await self.fetch_raw(
             """
-            INSERT INTO permissions
-                (provider_id, year_start, year_end,
-                 economy_code, region, footnote)
-            VALUES ($1, $2, $3, $4, $5, $6)
+            DELETE FROM permissions WHERE id = ANY($1::bigint[])
             RETURNING id
             """,
-            provider_id, year_start, year_end, economy_code, region, footnote
+            ids
         )
 
     async def delete_permission(self, id: int):  # MANAGEMENT
@@ -0,0 +1,131 @@
+"""Database connection pool setup.
+
+The pool opens its `min_size` connections before the application starts
+serving, and every connection runs `init_connection` once when it is opened,
+so the first requests after a deploy do not pay for connection establishment
+or statement preparation. The schema is checked beforehand; an unreachable or
+uninitialized (or not migrated) database fails startup instead of the first
+query.
+"""
+
+from src.error import log
+
+from .indicator_statements import STATEMENTS
+from .permission_repo import CHECK_PERMISSION_QUERY
+from .user_repo import USER_BY_EMAIL_QUERY
+
+from time import perf_counter
+
+import asyncio
+import asyncpg
+
+
+REQUIRED_TABLES = (
+    'regions', 'income_levels', 'users', 'providers', 'economies',
+    'permissions', 'economic_indicators', 'health_indicators',
+    'environment_indicators', 'indicators', 'data_versions',
+    'indicator_deletions', 'economic_indicators_revisions',
+    'health_indicators_revisions', 'environment_indicators_revisions',
+    'indicator_catalog', 'indicator_values'
+)
+
+# columns added by the latest migrations (db/migrations)
+REQUIRED_COLUMNS = (
+    ('permissions', 'years'),
+    ('economic_indicators', 'change_xid'),
+    ('health_indicators', 'change_xid'),
+    ('environment_indicators', 'change_xid'),
+)
+
+# Hot statements with arguments matching no rows. Running them once puts
+# their prepared statements into the connection's statement cache.
+WARM_STATEMENTS = (
+    (USER_BY_EMAIL_QUERY, ('',)),
+    (CHECK_PERMISSION_QUERY, (0, '', 0)),
+    # indicator reads of the portal
+    *((stmt.select, (0, '', 0)) for stmt in STATEMENTS),
+)
+
+
+async def init_connection(conn: asyncpg.Connection):
+    """Set up a newly opened pool connection."""
+
+    for query, args in WARM_STATEMENTS:
+        await conn.fetch(query, *args)
+
+
+async def check_schema(conn: asyncpg.Connection):
+    """Make sure the tables and columns the application uses exist.
+
+    Raises:
+        RuntimeError: Some of them are missing.
+    """
+
+    missing = await conn.fetchval(
+        """
+        SELECT array_agg(t) FROM unnest($1::text[]) AS t
+            WHERE to_regclass(t) IS NULL
+        """,
+        list(REQUIRED_TABLES)
+    )
+    if missing:
+        raise RuntimeError("Database schema is missing tables: "
+                           f"{', '.join(missing)}. Was it initialized with "
+                           "db/*.sql?")
+
+    for table, column in REQUIRED_COLUMNS:
+        exists = await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                      AND table_name = $1 AND column_name = $2
+            )
+            """,
+            table, column
+        )
+        if not exists:
+            raise RuntimeError(f"Database schema is missing {table}.{column}"
+                               ", apply db/migrations.")
+
+
+async def create_pool(dsn: str, min_size: int = 10, max_size: int = 10,
+                      statement_timeout_ms: int = 0) -> asyncpg.Pool:
+    """Check the schema, then open a pool with `min_size` warm connections.
+
+    Args:
+        statement_timeout_ms: Server-side limit of every statement, 0
+                              disables it.
+    """
+
+    start = perf_counter()
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await check_schema(conn)
+    finally:
+        await conn.close()
+
+    pool = await asyncpg.create_pool(
+        dsn, min_size=min_size, max_size=max_size, init=init_connection,
+        server_settings={'statement_timeout': str(statement_timeout_ms)})
+
+    log.info("database pool ready", connections=pool.get_size(),
+             elapsed_ms=round((perf_counter() - start) * 1000))
+
+    return pool
+
+
+async def pool_ready(pool: asyncpg.Pool, timeout: float = 1.0) -> bool:
+    """True if a connection can be checked out and answers within
+    `timeout` seconds.
+    """
+
+    try:
+        async with asyncio.timeout(timeout):
+            await pool.fetchval("SELECT 1")
+    except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError,
+            TimeoutError):
+        return False
+
+    return True
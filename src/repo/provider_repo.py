@@ -1,6 +1,7 @@
 from . import BaseRepo
+from .base_repo import like_prefix
 
-from src.dto import ProviderCreateDto, ProviderUpdateDto
+from src.dto import ListParams, ProviderCreateDto, ProviderUpdateDto
 from src.entities import Provider
 
 
@@ -9,10 +10,24 @@ class ProviderRepo(BaseRepo[Provider, ProviderUpdateDto, ProviderCreateDto]):
         super().__init__(pool, 'providers', ['id'],
                          (Provider, ProviderUpdateDto, ProviderCreateDto))
 
-    async def get_all_providers(self):
-        return await self.fetch_raw(
-            "SELECT * FROM providers"
-        )
+    async def get_all_providers(self, page: ListParams):  # MANAGEMENT
+        """Fetch a page of providers ordered by name.
+
+        Args:
+            page: Pagination, `q` matches name prefixes.
+
+        Returns:
+            The providers, and the next page cursor.
+        """
+        query = "SELECT * FROM providers WHERE true"
+        args = []
+
+        if page.q:
+            query += " AND lower(name) LIKE $1"
+            args.append(like_prefix(page.q.lower()))
+
+        return await self.fetch_page(query, args, ['name', 'id'],
+                                     page.limit, page.after)
 
     async def get_providers_by_user(self, user_id: int):
         """Fetch all providers where the user is admin or technical account.
@@ -1,56 +1,87 @@
 """Public repository for read-only data access with JOINs."""
 
-from src.dto import IndicatorFilters
-
-from typing import List, Tuple
+from .base_repo import BaseTransaction
+from .indicator_statements import category_list_query, \
+    combined_list_query, derived_list_query, revision_source
+from .replicas import ReadPool
+
+from src.derived import Expression, categories, lookback, render
+from src.dto import ChangeToken, IndicatorFilters
+from src.error import AppError, AppErrorType
+from src.indicators import CATEGORIES, CATEGORY_BY_NAME
+
+from dataclasses import replace
+from typing import List, Optional, Tuple
 import asyncpg
 
 
-def build_indicator_filter_clause(
+# change feed categories: (name, table, fields), in feed order
+CHANGE_CATEGORIES = [(c.name, c.table, c.field_names) for c in CATEGORIES]
+
+
+def build_indicator_conditions(
     filters: IndicatorFilters,
     extra_conditions: List[str] = []
-) -> Tuple[str, List, int]:
-    """Build WHERE clause and params from IndicatorFilters.
+) -> Tuple[List[str], List[str], List, int]:
+    """Build WHERE conditions and params from IndicatorFilters.
 
     Args:
         filters: The filter parameters.
         extra_conditions: Additional WHERE conditions (e.g., category filters).
 
     Returns:
-        Tuple of (where_clause, params_list, next_param_index).
+        Tuple of (conditions, key_conditions, params_list, next_param_index).
+        `key_conditions` are the conditions on indicator key columns,
+        unqualified, to filter indicator tables with before joining them,
+        so that only the partitions of the selected years are scanned.
     """
     conditions = list(extra_conditions) if extra_conditions else []
+    key_conditions = []
     params = []
-    param_idx = 1
+
+    def add(condition: str, value, key: bool = True):
+        params.append(value)
+        condition = condition.format(f"${len(params)}")
+        if key:
+            key_conditions.append(condition)
+            condition = f"i.{condition}"
+        conditions.append(condition)
 
     if filters.economy_code:
-        conditions.append(f"i.economy_code = ${param_idx}")
-        params.append(filters.economy_code.upper())
-        param_idx += 1
+        add("economy_code = {}", filters.economy_code.upper())
 
     if filters.region:
-        conditions.append(f"e.region = ${param_idx}")
-        params.append(filters.region.upper())
-        param_idx += 1
+        add("e.region = {}", filters.region.upper(), key=False)
 
     if filters.year is not None:
-        conditions.append(f"i.year = ${param_idx}")
-        params.append(filters.year)
-        param_idx += 1
+        add("year = {}", filters.year)
     else:
         if filters.year_start is not None:
-            conditions.append(f"i.year >= ${param_idx}")
-            params.append(filters.year_start)
-            param_idx += 1
+            add("year >= {}", filters.year_start)
         if filters.year_end is not None:
-            conditions.append(f"i.year <= ${param_idx}")
-            params.append(filters.year_end)
-            param_idx += 1
+            add("year <= {}", filters.year_end)
 
     if filters.provider_id is not None:
-        conditions.append(f"i.provider_id = ${param_idx}")
-        params.append(filters.provider_id)
-        param_idx += 1
+        add("provider_id = {}", filters.provider_id)
+
+    return conditions, key_conditions, params, len(params) + 1
+
+
+def build_indicator_filter_clause(
+    filters: IndicatorFilters,
+    extra_conditions: List[str] = []
+) -> Tuple[str, List, int]:
+    """Build WHERE clause and params from IndicatorFilters.
+
+    Args:
+        filters: The filter parameters.
+        extra_conditions: Additional WHERE conditions (e.g., category filters).
+
+    Returns:
+        Tuple of (where_clause, params_list, next_param_index).
+    """
+    conditions, _, params, param_idx = build_indicator_conditions(
+        filters, extra_conditions)
 
     where_clause = ""
     if conditions:
@@ -59,19 +90,51 @@ def build_indicator_filter_clause(
     return where_clause, params, param_idx
 
 
-class PublicRepo:
+def bind_as_of(filters: IndicatorFilters, params: List,
+               param_idx: int) -> Tuple[Optional[str], int]:
+    """Add the `as_of` filter to params.
+
+    Returns:
+        Tuple of (as_of placeholder or None for current data,
+        next_param_index).
+    """
+    if filters.as_of is None:
+        return None, param_idx
+
+    params.append(filters.as_of)
+    return f"${param_idx}", param_idx + 1
+
+
+def indicator_source(table: str, as_of: Optional[str] = None,
+                     key_conditions: List[str] = []) -> str:
+    """Indicator table `table`, or the rows of it in effect at the time of
+    placeholder `as_of`, resolved from its revisions (see
+    db/05-indicator-revisions.sql). `key_conditions` filter the rows.
+    """
+    if as_of is None:
+        if not key_conditions:
+            return table
+        return f"(SELECT * FROM {table} " \
+            f"WHERE {' AND '.join(key_conditions)})"
+
+    return revision_source(table, as_of, tuple(key_conditions))
+
+
+class PublicRepo(BaseTransaction[dict]):
     """Repository for public read-only queries with table joins.
 
     This repo handles all database access for the public API layer,
     providing pre-joined views of economies, indicators, and related data.
+    Queries run on read replicas when a read pool is configured.
     """
 
-    def __init__(self, pool: asyncpg.pool.Pool):
-        self.pool = pool
+    def __init__(self, pool: asyncpg.pool.Pool,
+                 read_pool: Optional[ReadPool] = None):
+        super().__init__(pool, dict, read_pool)
 
     async def list_economies(self) -> List[dict]:
         """List all economies with region and income level names."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             rows = await conn.fetch("""
                 SELECT
                     e.code,
@@ -93,20 +156,20 @@ class PublicRepo:
 
     async def list_regions(self) -> List[dict]:
         """List all regions."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             rows = await conn.fetch("SELECT * FROM regions ORDER BY name")
             return [dict(row) for row in rows]
 
     async def list_income_levels(self) -> List[dict]:
         """List all income levels."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             rows = await conn.fetch(
                 "SELECT * FROM income_levels ORDER BY name")
             return [dict(row) for row in rows]
 
     async def list_providers(self) -> List[dict]:
         """List all providers with admin/tech user names."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             rows = await conn.fetch("""
                 SELECT
                     p.id,
@@ -128,174 +191,279 @@ class PublicRepo:
 
         This query builds a combined set by FULL OUTER JOINing the three
         category tables and exposing the combined columns under alias `i`, so
-        the existing filter builder continues to work.
+        the existing filter builder continues to work. With `filters.as_of`,
+        the category tables are replaced by their rows in effect then.
         """
-        where_clause, params, param_idx = build_indicator_filter_clause(filters)
+        conditions, key_conditions, params, param_idx = \
+            build_indicator_conditions(filters)
+        where_clause = "WHERE " + " AND ".join(conditions) \
+            if conditions else ""
+        as_of, param_idx = bind_as_of(filters, params, param_idx)
         params.extend([filters.limit, filters.offset])
-
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(f"""
-                SELECT
-                    i.provider_id,
-                    p.name AS provider_name,
-                    i.economy_code,
-                    e.name AS economy_name,
-                    r.name AS region_name,
-                    il.name AS income_level_name,
-                    i.year,
-                    i.gdp_per_capita,
-                    i.industry,
-                    i.trade,
-                    i.agriculture_forestry_and_fishing,
-                    i.community_health_workers,
-                    i.diabetes_prevalence,
-                    i.prevalence_of_undernourishment,
-                    i.prevalence_of_severe_food_insecurity,
-                    i.basic_handwashing_facilities,
-                    i.safely_managed_drinking_water_services,
-                    i.access_to_electricity,
-                    i.energy_use,
-                    i.alternative_and_nuclear_energy,
-                    i.permanent_cropland,
-                    i.crop_production_index,
-                    i.gdp_per_unit_of_energy_use
-                FROM (
-                    SELECT
-                        COALESCE(ei.provider_id, hi.provider_id, env.provider_id) AS provider_id,
-                        COALESCE(ei.economy_code, hi.economy_code, env.economy_code) AS economy_code,
-                        COALESCE(ei.year, hi.year, env.year) AS year,
-
-                        ei.gdp_per_capita,
-                        ei.industry,
-                        ei.trade,
-                        ei.agriculture_forestry_and_fishing,
-
-                        hi.community_health_workers,
-                        hi.diabetes_prevalence,
-                        hi.prevalence_of_undernourishment,
-                        hi.prevalence_of_severe_food_insecurity,
-                        hi.basic_handwashing_facilities,
-                        hi.safely_managed_drinking_water_services,
-
-                        env.access_to_electricity,
-                        env.energy_use,
-                        env.alternative_and_nuclear_energy,
-                        env.permanent_cropland,
-                        env.crop_production_index,
-                        env.gdp_per_unit_of_energy_use
-                    FROM economic_indicators ei
-                    FULL OUTER JOIN health_indicators hi
-                        USING (provider_id, economy_code, year)
-                    FULL OUTER JOIN environment_indicators env
-                        USING (provider_id, economy_code, year)
-                ) i
-                JOIN economies e ON i.economy_code = e.code
-                JOIN providers p ON i.provider_id = p.id
-                LEFT JOIN regions r ON e.region = r.id
-                LEFT JOIN income_levels il ON e.income_level = il.id
-                {where_clause}
-                ORDER BY i.year DESC, e.name
-                LIMIT ${param_idx} OFFSET ${param_idx + 1}
-            """, *params)
+        # the join conditions do not carry filters on the combined key over
+        # to the category tables, so they are filtered individually
+        sources = tuple(indicator_source(c.table, as_of, key_conditions)
+                        for c in CATEGORIES)
+        query = combined_list_query(
+            sources, where_clause,
+            f"LIMIT ${param_idx} OFFSET ${param_idx + 1}")
+
+        async with self.acquire(read_only=True) as conn:
+            rows = await conn.fetch(query, *params)
             return [dict(row) for row in rows]
 
-    async def list_economic_indicators(
-        self, filters: IndicatorFilters
+    async def list_category_indicators(
+        self, category: str, filters: IndicatorFilters
     ) -> List[dict]:
-        """List economic indicators only with filters."""
+        """List the indicators of category `category` only with filters."""
         where_clause, params, param_idx = build_indicator_filter_clause(
             filters)
+        as_of, param_idx = bind_as_of(filters, params, param_idx)
         params.extend([filters.limit, filters.offset])
-
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(f"""
-                SELECT
-                    e.code AS economy_code,
-                    e.name AS economy_name,
-                    r.name AS region_name,
-                    i.year,
-                    i.gdp_per_capita,
-                    i.industry,
-                    i.trade,
-                    i.agriculture_forestry_and_fishing,
-                    p.name AS provider_name
-                FROM economic_indicators i
-                JOIN economies e ON i.economy_code = e.code
-                JOIN providers p ON i.provider_id = p.id
-                LEFT JOIN regions r ON e.region = r.id
-                {where_clause}
-                ORDER BY i.year DESC, e.name
-                LIMIT ${param_idx} OFFSET ${param_idx + 1}
-            """, *params)
+        query = category_list_query(
+            category,
+            indicator_source(CATEGORY_BY_NAME[category].table, as_of),
+            where_clause,
+            f"LIMIT ${param_idx} OFFSET ${param_idx + 1}")
+
+        async with self.acquire(read_only=True) as conn:
+            rows = await conn.fetch(query, *params)
             return [dict(row) for row in rows]
 
+    async def list_economic_indicators(
+        self, filters: IndicatorFilters
+    ) -> List[dict]:
+        """List economic indicators only with filters."""
+        return await self.list_category_indicators('economic', filters)
+
     async def list_health_indicators(
         self, filters: IndicatorFilters
     ) -> List[dict]:
         """List health indicators only with filters."""
-        where_clause, params, param_idx = build_indicator_filter_clause(
-            filters)
-        params.extend([filters.limit, filters.offset])
-
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(f"""
-                SELECT
-                    e.code AS economy_code,
-                    e.name AS economy_name,
-                    r.name AS region_name,
-                    i.year,
-                    i.community_health_workers,
-                    i.diabetes_prevalence,
-                    i.prevalence_of_undernourishment,
-                    i.prevalence_of_severe_food_insecurity,
-                    i.basic_handwashing_facilities,
-                    i.safely_managed_drinking_water_services,
-                    p.name AS provider_name
-                FROM health_indicators i
-                JOIN economies e ON i.economy_code = e.code
-                JOIN providers p ON i.provider_id = p.id
-                LEFT JOIN regions r ON e.region = r.id
-                {where_clause}
-                ORDER BY i.year DESC, e.name
-                LIMIT ${param_idx} OFFSET ${param_idx + 1}
-            """, *params)
-            return [dict(row) for row in rows]
+        return await self.list_category_indicators('health', filters)
 
     async def list_environment_indicators(
         self, filters: IndicatorFilters
     ) -> List[dict]:
         """List environment indicators only with filters."""
+        return await self.list_category_indicators('environment', filters)
+
+    async def list_derived_indicators(
+        self, expressions: List[Expression], filters: IndicatorFilters
+    ) -> List[dict]:
+        """List derived indicator values (see `src.derived`), one column per
+        expression named by its normalized text.
+
+        Windows need the years before the selected ones: the category
+        tables are read from `lookback` years earlier, and the year filters
+        are applied to the derived rows.
+        """
+        back = max(lookback(e) for e in expressions)
+        year_start = filters.year if filters.year is not None \
+            else filters.year_start
+        year_end = filters.year if filters.year is not None \
+            else filters.year_end
+        source_filters = replace(
+            filters, region=None, year=None,
+            year_start=None if year_start is None else year_start - back,
+            year_end=year_end)
+
+        _, key_conditions, params, param_idx = \
+            build_indicator_conditions(source_filters)
+        as_of, param_idx = bind_as_of(filters, params, param_idx)
+        sources = tuple(
+            (table, indicator_source(table, as_of, key_conditions))
+            for table in categories(expressions))
+
+        conditions = []
+        for condition, value in (("d.year >= {}", year_start),
+                                 ("d.year <= {}", year_end),
+                                 ("e.region = {}", filters.region and
+                                  filters.region.upper())):
+            if value is not None:
+                params.append(value)
+                conditions.append(condition.format(f"${param_idx}"))
+                param_idx += 1
+        where_clause = "WHERE " + " AND ".join(conditions) \
+            if conditions else ""
+        params.extend([filters.limit, filters.offset])
+
+        query = derived_list_query(
+            tuple((render(e), e) for e in expressions), sources,
+            where_clause, f"LIMIT ${param_idx} OFFSET ${param_idx + 1}")
+
+        async with self.acquire(read_only=True) as conn:
+            rows = await conn.fetch(query, *params)
+            return [dict(row) for row in rows]
+
+    async def list_catalog(self) -> List[dict]:
+        """List the series of the long-format indicator store."""
+        async with self.acquire(read_only=True) as conn:
+            rows = await conn.fetch(
+                "SELECT * FROM indicator_catalog ORDER BY code")
+            return [dict(row) for row in rows]
+
+    async def list_series(self, codes: List[str],
+                          filters: IndicatorFilters) -> List[dict]:
+        """List values of the long-format indicator store, of the series
+        `codes` (all series if empty), one row per value.
+        """
         where_clause, params, param_idx = build_indicator_filter_clause(
             filters)
+        if codes:
+            params.append(codes)
+            where_clause = f"{where_clause} AND" if where_clause \
+                else "WHERE"
+            where_clause += f" c.code = ANY(${param_idx}::text[])"
+            param_idx += 1
         params.extend([filters.limit, filters.offset])
 
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             rows = await conn.fetch(f"""
                 SELECT
+                    c.code AS indicator_code,
+                    c.name AS indicator_name,
+                    c.unit,
                     e.code AS economy_code,
                     e.name AS economy_name,
                     r.name AS region_name,
                     i.year,
-                    i.access_to_electricity,
-                    i.energy_use,
-                    i.alternative_and_nuclear_energy,
-                    i.permanent_cropland,
-                    i.crop_production_index,
-                    i.gdp_per_unit_of_energy_use,
+                    i.value,
                     p.name AS provider_name
-                FROM environment_indicators i
+                FROM indicator_values i
+                JOIN indicator_catalog c ON i.indicator_id = c.id
                 JOIN economies e ON i.economy_code = e.code
                 JOIN providers p ON i.provider_id = p.id
                 LEFT JOIN regions r ON e.region = r.id
                 {where_clause}
-                ORDER BY i.year DESC, e.name
+                ORDER BY c.code, i.year DESC, e.name
                 LIMIT ${param_idx} OFFSET ${param_idx + 1}
             """, *params)
             return [dict(row) for row in rows]
 
+    async def list_changes(self, token: ChangeToken, limit: int) \
+            -> Tuple[List[dict], ChangeToken, bool]:
+        """Indicator rows changed, and tombstones of rows deleted, since the
+        snapshot of `token` (every row for a full sync), in category and key
+        order.
+
+        A sync is read at one snapshot: changes committed meanwhile are
+        left to the next sync. See db/04-change-feed.sql. Tokens hold
+        snapshots of the primary, the feed is read there rather than from a
+        replica that may not have replayed the changes they cover.
+
+        Returns:
+            Tuple of (changes, token of the next request, whether more
+            changes of this sync follow).
+        """
+        async with self.acquire() as conn:
+            upto = token.upto or \
+                await conn.fetchval("SELECT pg_current_snapshot()::text")
+
+            first, after = 0, None
+            if token.after is not None:
+                first, after = token.after[0], token.after[1:]
+                if not 0 <= first < len(CHANGE_CATEGORIES):
+                    raise AppError(AppErrorType.VALIDATION_ERROR,
+                                   "Invalid change token.")
+
+            changes = []
+            for index in range(first, len(CHANGE_CATEGORIES)):
+                found = await self._category_changes(
+                    conn, index, token.since, upto,
+                    after if index == first else None,
+                    limit + 1 - len(changes))
+                changes.extend((index, change) for change in found)
+
+                if len(changes) > limit:
+                    break
+
+        if len(changes) <= limit:
+            return [c for _, c in changes], ChangeToken(since=upto), False
+
+        changes = changes[:limit]
+        index, last = changes[-1]
+        return [c for _, c in changes], ChangeToken(
+            since=token.since, upto=upto,
+            after=[index, last['provider_id'], last['economy_code'],
+                   last['year']]
+        ), True
+
+    async def _category_changes(self, conn, index: int,
+                                since: Optional[str], upto: str,
+                                after: Optional[list],
+                                limit: int) -> List[dict]:
+        category, table, fields = CHANGE_CATEGORIES[index]
+
+        # snapshots are passed in their text form
+        params = [upto]
+        conditions = [
+            "pg_visible_in_snapshot(change_xid, $1::text::pg_snapshot)"
+        ]
+        if since is not None:
+            params.append(since)
+            conditions.append(
+                "change_xid >= pg_snapshot_xmin($2::text::pg_snapshot) AND "
+                "NOT pg_visible_in_snapshot(change_xid, $2::text::pg_snapshot)"
+            )
+        if after is not None:
+            n = len(params)
+            params.extend(after)
+            conditions.append(f"(provider_id, economy_code, year) > "
+                              f"(${n + 1}, ${n + 2}, ${n + 3})")
+
+        where_clause = " AND ".join(conditions)
+        limit_param = f"${len(params) + 1}"
+
+        rows = await conn.fetch(f"""
+            SELECT provider_id, economy_code, year, updated_at,
+                   {', '.join(fields)}
+            FROM {table}
+            WHERE {where_clause}
+            ORDER BY provider_id, economy_code, year
+            LIMIT {limit_param}
+        """, *params, limit)
+        changes = [
+            {'category': category, 'deleted': False, **row} for row in rows
+        ]
+
+        # a full sync has nothing to delete
+        if since is not None:
+            rows = await conn.fetch(f"""
+                SELECT provider_id, economy_code, year, deleted_at
+                FROM indicator_deletions
+                WHERE table_name = '{table}' AND {where_clause}
+                ORDER BY provider_id, economy_code, year
+                LIMIT {limit_param}
+            """, *params, limit)
+            changes.extend(
+                {'category': category, 'deleted': True, **row}
+                for row in rows
+            )
+            changes.sort(key=lambda c: (c['provider_id'], c['economy_code'],
+                                        c['year']))
+
+        return changes[:limit]
+
+    async def get_data_versions(self, economy_code: Optional[str] = None) \
+            -> dict:
+        """Change counters by table, counting changes of one economy's rows
+        (and whole-table changes) if `economy_code` is given. See
+        db/03-data-versions.sql.
+        """
+        async with self.acquire(read_only=True) as conn:
+            rows = await conn.fetch("""
+                SELECT table_name, sum(version)::bigint AS version
+                FROM data_versions
+                WHERE $1::text IS NULL OR economy_code IN ($1, '')
+                GROUP BY table_name
+                ORDER BY table_name
+            """, economy_code)
+            return {row['table_name']: row['version'] for row in rows}
+
     async def get_stats(self) -> dict:
         """Get database statistics."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire(read_only=True) as conn:
             stats = {}
             stats['economies'] = await conn.fetchval(
                 "SELECT COUNT(*) FROM economies")
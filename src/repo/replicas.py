@@ -0,0 +1,232 @@
+"""Read replica routing.
+
+Read-only repositories (the public API) can check out their connections from
+a `ReadPool` instead of the primary pool, so heavy read traffic does not
+compete with data entry for connections. Replicas are used round-robin; a
+replica that can not hand out a connection, or lags behind the primary more
+than `max_staleness` seconds, is skipped and the primary serves the query
+when no replica can.
+
+A replica read may miss transactions the primary committed shortly before
+it, `ReadPool.fence` tells whether the reads of a block did.
+"""
+
+from .instrumentation import instrumentation, InstrumentedConnection
+
+from src.error import log
+
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+
+
+# Seconds since the last replayed transaction, 0 on a primary or on a
+# replica streaming from it that replayed everything it received (an idle
+# primary is not lag). A replica that is not streaming can not tell how far
+# behind it is, its lag is the age of its last replayed transaction. The
+# receiver status is only shown to roles with pg_read_all_stats, a running
+# receiver counts as streaming for other roles.
+REPLICATION_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT FROM pg_stat_wal_receiver
+                         WHERE coalesce(status, 'streaming') = 'streaming')
+            THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END::float8
+"""
+
+PRIMARY_POSITION_QUERY = "SELECT pg_current_wal_lsn()"
+REPLAYED_QUERY = \
+    "SELECT coalesce(pg_last_wal_replay_lsn() >= $1::pg_lsn, false)"
+
+
+class ReadFence:
+    """Whether the replica reads made within `ReadPool.fence()` saw every
+    transaction the primary committed before the fence was entered.
+
+    Attributes:
+        lsn: WAL position of the primary when the fence was entered.
+        current: No replica read made so far missed a transaction committed
+                 before the fence.
+    """
+
+    def __init__(self, lsn: int):
+        self.lsn = lsn
+        self.current = True
+
+
+_fence: ContextVar[Optional[ReadFence]] = \
+    ContextVar('read_fence', default=None)
+
+
+class ReadPool:
+    """Connection pools of read replicas, backed by the primary.
+
+    Attributes:
+        max_staleness: Replication lag (seconds) beyond which a replica is
+                       skipped.
+        lag_check_interval: Seconds a measured replica lag is reused for,
+                            and an unavailable replica is skipped for.
+        fallbacks: Checkouts served by the primary.
+    """
+
+    def __init__(self, primary: asyncpg.Pool, replicas: List[asyncpg.Pool],
+                 max_staleness: float = 30.0,
+                 lag_check_interval: float = 5.0):
+        if not replicas:
+            raise ValueError("At least one replica pool is required.")
+
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_staleness = max_staleness
+        self.lag_check_interval = lag_check_interval
+        self.fallbacks = 0
+
+        self._next = 0
+        # replica index -> (checked at, lag seconds)
+        self._lag: Dict[int, Tuple[float, float]] = {}
+        # replica index -> when to retry an unavailable replica
+        self._down_until: Dict[int, float] = {}
+
+    def mark_down(self, index: int, error: Exception):
+        """Skip replica `index` for `lag_check_interval` seconds."""
+
+        self._down_until[index] = monotonic() + self.lag_check_interval
+        log.warning("replica unavailable", replica=index, error=str(error))
+
+    async def _fresh(self, index: int, conn: InstrumentedConnection) -> bool:
+        now = monotonic()
+        checked_at, lag = self._lag.get(index, (float('-inf'), 0.0))
+
+        if now - checked_at >= self.lag_check_interval:
+            lag = await conn.fetchval(REPLICATION_LAG_QUERY)
+            # nothing replayed yet
+            lag = float('inf') if lag is None else lag
+            self._lag[index] = (now, lag)
+
+        return lag <= self.max_staleness
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[InstrumentedConnection]:
+        """Check out a connection from the next usable replica, or from the
+        primary if there is none.
+        """
+
+        for _ in range(len(self.replicas)):
+            index = self._next
+            self._next = (index + 1) % len(self.replicas)
+
+            if self._down_until.get(index, 0.0) > monotonic():
+                continue
+
+            stack = AsyncExitStack()
+            try:
+                conn = await stack.enter_async_context(
+                    instrumentation.acquire(self.replicas[index]))
+                fresh = await self._fresh(index, conn)
+
+                fence = _fence.get()
+                if fresh and fence is not None and fence.current:
+                    fence.current = await conn.fetchval(REPLAYED_QUERY,
+                                                        fence.lsn)
+            except (OSError, asyncpg.PostgresError,
+                    asyncpg.InterfaceError) as e:
+                await stack.aclose()
+                self.mark_down(index, e)
+                continue
+
+            if not fresh:
+                await stack.aclose()
+                continue
+
+            async with stack:
+                yield conn
+            return
+
+        self.fallbacks += 1
+        async with instrumentation.acquire(self.primary) as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def fence(self) -> AsyncIterator[ReadFence]:
+        """Track whether the replica reads of the enclosed block reflect
+        every transaction committed on the primary before it, e.g. before a
+        `data_changes` notification was received. Reads served by the
+        primary always do.
+        """
+
+        async with instrumentation.acquire(self.primary) as conn:
+            fence = ReadFence(await conn.fetchval(PRIMARY_POSITION_QUERY))
+
+        token = _fence.set(fence)
+        try:
+            yield fence
+        finally:
+            _fence.reset(token)
+
+    def _lag_seconds(self, index: int) -> Optional[float]:
+        lag = self._lag.get(index, (None, None))[1]
+        return None if lag is None or lag == float('inf') else round(lag, 3)
+
+    def stats(self) -> dict:
+        """Replica pool occupancy, last measured lags and fallback count."""
+
+        return {
+            'replicas': [
+                {
+                    'size': pool.get_size(),
+                    'idle': pool.get_idle_size(),
+                    'lag_seconds': self._lag_seconds(i),
+                }
+                for i, pool in enumerate(self.replicas)
+            ],
+            'fallbacks': self.fallbacks,
+        }
+
+
+async def create_read_pool(primary: asyncpg.Pool, dsns: List[str],
+                           min_size: int = 10, max_size: int = 10,
+                           max_staleness: float = 30.0,
+                           statement_timeout_ms: int = 0,
+                           init: Optional[Callable] = None) -> ReadPool:
+    """Open a pool with `min_size` warm connections for each replica DSN.
+
+    A replica that can not be reached gets a pool opening its connections
+    on demand and is skipped until it can, its reads go to the primary
+    meanwhile.
+
+    Args:
+        init: Set up of a newly opened connection, the one of the primary
+              pool.
+    """
+
+    options = {
+        'max_size': max_size,
+        'init': init,
+        'server_settings': {'statement_timeout': str(statement_timeout_ms)},
+    }
+
+    replicas, unreachable = [], []
+    for dsn in dsns:
+        try:
+            replicas.append(await asyncpg.create_pool(
+                dsn, min_size=min_size, **options))
+        except (OSError, asyncpg.PostgresError,
+                asyncpg.InterfaceError) as e:
+            unreachable.append((len(replicas), e))
+            replicas.append(await asyncpg.create_pool(
+                dsn, min_size=0, **options))
+
+    read_pool = ReadPool(primary, replicas, max_staleness=max_staleness)
+    for index, error in unreachable:
+        read_pool.mark_down(index, error)
+
+    log.info("read replicas ready", replicas=len(replicas) - len(unreachable),
+             unreachable=len(unreachable), max_staleness=max_staleness)
+
+    return read_pool
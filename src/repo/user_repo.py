@@ -1,18 +1,39 @@
 from . import BaseRepo
+from .base_repo import like_prefix
 
-from src.dto import UserCreateDto, UserUpdateDto
+from src.dto import ListParams, UserCreateDto, UserUpdateDto
 from src.entities import User
 
 
+USER_BY_EMAIL_QUERY = """
+    SELECT id, email, password, name FROM users
+    WHERE email = $1
+"""
+
+
 class UserRepo(BaseRepo[User, UserUpdateDto, UserCreateDto]):
     def __init__(self, pool):
         super().__init__(pool, 'users', ['id'],
                          (User, UserUpdateDto, UserCreateDto))
 
-    async def get_all_users(self):  # MANAGEMENT
-        return await self.fetch_raw(
-            "SELECT id, email, name FROM users ORDER BY id DESC"
-        )
+    async def get_all_users(self, page: ListParams):  # MANAGEMENT
+        """Fetch a page of users, newest first.
+
+        Args:
+            page: Pagination, `q` matches email or name prefixes.
+
+        Returns:
+            The users with id, email, name, and the next page cursor.
+        """
+        query = "SELECT id, email, name FROM users WHERE true"
+        args = []
+
+        if page.q:
+            query += " AND (lower(email) LIKE $1 OR lower(name) LIKE $1)"
+            args.append(like_prefix(page.q.lower()))
+
+        return await self.fetch_page(query, args, ['id'], page.limit,
+                                     page.after, descending=True)
 
     async def get_user_by_email(self, email: str):  # MANAGEMENT
         """Fetch a user by email for authentication.
@@ -23,13 +44,7 @@ class UserRepo(BaseRepo[User, UserUpdateDto, UserCreateDto]):
         Returns:
             The user record with id, email, password, name if found.
         """
-        return await self.fetchrow_raw(
-            """
-            SELECT id, email, password, name FROM users
-            WHERE email = $1
-            """,
-            email
-        )
+        return await self.fetchrow_raw(USER_BY_EMAIL_QUERY, email)
 
     async def get_user_by_id(self, user_id: int):  # MANAGEMENT
         """Fetch a user by ID.
@@ -3,7 +3,9 @@ from src.handlers import (
     UserHandler,
     EconomyHandler,
     PermissionHandler,
-    IndicatorHandler
+    IndicatorHandler,
+    IndicatorCatalogHandler,
+    IndicatorValueHandler
 )
 
 from src.middleware import internal_access_authorize
@@ -16,7 +18,9 @@ def internal_routes(internal_access_token: str,
                     user_handler: UserHandler,
                     economy_handler: EconomyHandler,
                     permission_handler: PermissionHandler,
-                    indicator_handler: IndicatorHandler):
+                    indicator_handler: IndicatorHandler,
+                    catalog_handler: IndicatorCatalogHandler,
+                    value_handler: IndicatorValueHandler):
     """Aggregates all internal sub-routes and applies authentication
     middleware.
     """
@@ -29,6 +33,8 @@ def internal_routes(internal_access_token: str,
     internal.register_blueprint(permission_routes(permission_handler))
 
     internal.register_blueprint(indicator_routes(indicator_handler))
+    internal.register_blueprint(catalog_routes(catalog_handler))
+    internal.register_blueprint(catalog_value_routes(value_handler))
 
     internal.before_request(internal_access_authorize(internal_access_token))
 
@@ -36,13 +42,19 @@ def internal_routes(internal_access_token: str,
 
 
 def provider_routes(provider_handler: ProviderHandler):
-    """Creates CRUD routes for Providers."""
+    """Creates CRUD routes for Providers. Provider ids are generated, so
+    there is no batch upsert.
+    """
     providers = Blueprint("providers", __name__, url_prefix="/providers")
 
     providers.add_url_rule("/", view_func=provider_handler.list,
                            methods=["GET"])
     providers.add_url_rule("/", view_func=provider_handler.create,
                            methods=["POST"])
+    providers.add_url_rule("/batch", view_func=provider_handler.create_batch,
+                           methods=["POST"])
+    providers.add_url_rule("/batch", view_func=provider_handler.delete_batch,
+                           methods=["DELETE"])
 
     async def get(id):
         return await provider_handler.get(int(id))
@@ -60,11 +72,17 @@ def provider_routes(provider_handler: ProviderHandler):
 
 
 def user_routes(user_handler: UserHandler):
-    """Creates CRUD routes for Providers."""
+    """Creates CRUD routes for Users. User ids are generated, so there is no
+    batch upsert.
+    """
     users = Blueprint("users", __name__, url_prefix="/users")
 
     users.add_url_rule("/", view_func=user_handler.list, methods=["GET"])
     users.add_url_rule("/", view_func=user_handler.create, methods=["POST"])
+    users.add_url_rule("/batch", view_func=user_handler.create_batch,
+                       methods=["POST"])
+    users.add_url_rule("/batch", view_func=user_handler.delete_batch,
+                       methods=["DELETE"])
 
     async def get(id):
         return await user_handler.get(int(id))
@@ -89,6 +107,12 @@ def economy_routes(economy_handler: EconomyHandler):
                            methods=["GET"])
     economies.add_url_rule("/", view_func=economy_handler.create,
                            methods=["POST"])
+    economies.add_url_rule("/batch", view_func=economy_handler.create_batch,
+                           methods=["POST"])
+    economies.add_url_rule("/batch", view_func=economy_handler.upsert_batch,
+                           methods=["PUT"])
+    economies.add_url_rule("/batch", view_func=economy_handler.delete_batch,
+                           methods=["DELETE"])
 
     async def get(code):
         return await economy_handler.get(code)
@@ -107,7 +131,9 @@ def economy_routes(economy_handler: EconomyHandler):
 
 def permission_routes(permission_handler: PermissionHandler):
     """Creates CRUD routes for Permissions.
-    Updated to use surrogate 'id' instead of composite keys.
+    Updated to use surrogate 'id' instead of composite keys. Batch grants are
+    merged into the existing ones, which makes them idempotent, so there is no
+    batch upsert.
     """
     permissions = Blueprint("permissions", __name__, url_prefix="/permissions")
 
@@ -115,6 +141,12 @@ def permission_routes(permission_handler: PermissionHandler):
                              methods=["GET"])
     permissions.add_url_rule("/", view_func=permission_handler.create,
                              methods=["POST"])
+    permissions.add_url_rule("/batch",
+                             view_func=permission_handler.create_batch,
+                             methods=["POST"])
+    permissions.add_url_rule("/batch",
+                             view_func=permission_handler.delete_batch,
+                             methods=["DELETE"])
 
     async def get(id):
         return await permission_handler.get(int(id))
@@ -139,6 +171,12 @@ def indicator_routes(indicator_handler: IndicatorHandler):
                             methods=["GET"])
     indicators.add_url_rule("/", view_func=indicator_handler.create,
                             methods=["POST"])
+    indicators.add_url_rule("/batch", view_func=indicator_handler.create_batch,
+                            methods=["POST"])
+    indicators.add_url_rule("/batch", view_func=indicator_handler.upsert_batch,
+                            methods=["PUT"])
+    indicators.add_url_rule("/batch", view_func=indicator_handler.delete_batch,
+                            methods=["DELETE"])
 
     async def get(provider_id, economy_code, year):
         return await indicator_handler.get(int(provider_id), economy_code,
@@ -159,3 +197,70 @@ def indicator_routes(indicator_handler: IndicatorHandler):
                             view_func=delete, methods=["DELETE"])
 
     return indicators
+
+
+def catalog_routes(catalog_handler: IndicatorCatalogHandler):
+    """Creates CRUD routes for the Indicator Catalog."""
+    catalog = Blueprint("catalog", __name__, url_prefix="/catalog")
+
+    catalog.add_url_rule("/", view_func=catalog_handler.list,
+                         methods=["GET"])
+    catalog.add_url_rule("/", view_func=catalog_handler.create,
+                         methods=["POST"])
+    catalog.add_url_rule("/batch", view_func=catalog_handler.create_batch,
+                         methods=["POST"])
+    catalog.add_url_rule("/batch", view_func=catalog_handler.upsert_batch,
+                         methods=["PUT"])
+    catalog.add_url_rule("/batch", view_func=catalog_handler.delete_batch,
+                         methods=["DELETE"])
+
+    async def get(id):
+        return await catalog_handler.get(int(id))
+    catalog.add_url_rule("/<id>", view_func=get, methods=["GET"])
+
+    async def update(id):
+        return await catalog_handler.update(int(id))
+    catalog.add_url_rule("/<id>", view_func=update, methods=["PATCH"])
+
+    async def delete(id):
+        return await catalog_handler.delete(int(id))
+    catalog.add_url_rule("/<id>", view_func=delete, methods=["DELETE"])
+
+    return catalog
+
+
+def catalog_value_routes(value_handler: IndicatorValueHandler):
+    """Creates CRUD routes for long-format Indicator Values."""
+    values = Blueprint("catalog_values", __name__,
+                       url_prefix="/catalog-values")
+
+    values.add_url_rule("/", view_func=value_handler.list, methods=["GET"])
+    values.add_url_rule("/", view_func=value_handler.create,
+                        methods=["POST"])
+    values.add_url_rule("/batch", view_func=value_handler.create_batch,
+                        methods=["POST"])
+    values.add_url_rule("/batch", view_func=value_handler.upsert_batch,
+                        methods=["PUT"])
+    values.add_url_rule("/batch", view_func=value_handler.delete_batch,
+                        methods=["DELETE"])
+
+    rule = "/<indicator_id>/<provider_id>/<economy_code>/<year>"
+
+    async def get(indicator_id, provider_id, economy_code, year):
+        return await value_handler.get(int(indicator_id), int(provider_id),
+                                       economy_code, int(year))
+    values.add_url_rule(rule, view_func=get, methods=["GET"])
+
+    async def update(indicator_id, provider_id, economy_code, year):
+        return await value_handler.update(int(indicator_id),
+                                          int(provider_id), economy_code,
+                                          int(year))
+    values.add_url_rule(rule, view_func=update, methods=["PATCH"])
+
+    async def delete(indicator_id, provider_id, economy_code, year):
+        return await value_handler.delete(int(indicator_id),
+                                          int(provider_id), economy_code,
+                                          int(year))
+    values.add_url_rule(rule, view_func=delete, methods=["DELETE"])
+
+    return values
@@ -47,6 +47,14 @@ def management_routes(management_console_token,
     management.add_url_rule("/permissions",
                             view_func=permission_handler.create_permission,
                             methods=["POST"])
+    management.add_url_rule("/permissions/bulk",
+                            view_func=permission_handler
+                            .bulk_create_permissions,
+                            methods=["POST"])
+    management.add_url_rule("/permissions/bulk",
+                            view_func=permission_handler
+                            .bulk_delete_permissions,
+                            methods=["DELETE"])
     management.add_url_rule("/permissions/<id>",
                             view_func=permission_handler.delete_permission,
                             methods=["DELETE"])
@@ -1,17 +1,18 @@
 """Portal API routes for data entry operations."""
 
 from src.handlers import PortalHandler
+from src.jwt_keyring import JwtKeyring
 from src.middleware import portal_jwt_authorize
 
 from flask import Blueprint
 
 
-def portal_routes(jwt_secret: str,
+def portal_routes(jwt_keyring: JwtKeyring,
                   portal_handler: PortalHandler):
     """Create and configure the Portal API blueprint.
 
     Args:
-        jwt_secret: Secret key for JWT validation.
+        jwt_keyring: Keys for JWT validation.
         portal_handler: Handler instance for portal operations.
 
     Returns:
@@ -54,7 +55,7 @@ def portal_routes(jwt_secret: str,
     # Apply JWT authorization middleware
     # Exclude /auth/login from JWT validation
     portal.before_request(
-        portal_jwt_authorize(jwt_secret, exclude_paths=['/auth/login'])
+        portal_jwt_authorize(jwt_keyring, exclude_paths=['/auth/login'])
     )
 
     return portal
@@ -35,7 +35,19 @@ def public_routes(handler: PublicHandler):
     public.add_url_rule(
         "/indicators/environment",
         view_func=handler.list_environment_indicators, methods=["GET"])
+    public.add_url_rule(
+        "/indicators/derived",
+        view_func=handler.list_derived_indicators, methods=["GET"])
+    public.add_url_rule(
+        "/catalog", view_func=handler.list_catalog, methods=["GET"])
+    public.add_url_rule(
+        "/series", view_func=handler.list_series, methods=["GET"])
     public.add_url_rule(
         "/stats", view_func=handler.get_stats, methods=["GET"])
+    public.add_url_rule(
+        "/indicators/changes",
+        view_func=handler.list_changes, methods=["GET"])
+    public.add_url_rule(
+        "/versions", view_func=handler.get_data_versions, methods=["GET"])
 
     return public
@@ -4,6 +4,8 @@ from .economy_service import EconomyService
 from .provider_service import ProviderService
 from .permission_service import PermissionService
 from .indicator_services import IndicatorService
+from .catalog_services import IndicatorCatalogService, \
+    IndicatorValueService
 from .user_service import UserService
 from .public_service import PublicService
 
@@ -14,6 +16,8 @@ __all__ = [
     'PermissionService',
     'EconomyService',
     'IndicatorService',
+    'IndicatorCatalogService',
+    'IndicatorValueService',
     'UserService',
     'PublicService'
 ]
@@ -1,6 +1,9 @@
+from src import tracing
 from src.repo.base_repo import BaseRepo
 
-from typing import Any, Generic, List, Optional, TypeVar
+import inspect
+
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
 from pydantic import BaseModel
 
 
@@ -38,9 +41,22 @@ class BaseService(Generic[T, U, C]):
     async def list(self, limit: int, offset: int) -> List[T]:
         return await self.repo.list(limit, offset)
 
+    async def list_page(self, limit: int, after: Optional[List[Any]] = None) \
+            -> Tuple[List[T], Optional[List[Any]]]:
+        return await self.repo.list_page(limit, after)
+
     async def create(self, create_dto: C) -> Optional[dict]:
         return await self.repo.insert(create_dto)
 
+    async def insert_many(self, records: List[C]) -> int:
+        return await self.repo.insert_many(records)
+
+    async def upsert_many(self, records: List[C]) -> int:
+        return await self.repo.upsert_many(records)
+
+    async def delete_many(self, keys: List[List[Any]]) -> List[dict]:
+        return await self.repo.delete_many(keys)
+
     async def update(self, update_dto: U, keys: List[Any]) -> Optional[dict]:
         return await self.repo.update(keys, update_dto)
 
@@ -51,5 +67,14 @@ class BaseService(Generic[T, U, C]):
         return await self.repo.truncate_cascade()
 
     def __getattr__(self, name):
-        """Fallthrough to repo layer."""
-        return getattr(self.repo, name)
+        """Fallthrough to repo layer.
+
+        When request tracing is enabled, repo coroutines are wrapped so each
+        call shows up as a span.
+        """
+        attr = getattr(self.repo, name)
+
+        if tracing.enabled and inspect.iscoroutinefunction(attr):
+            return tracing.traced(f"{type(self.repo).__name__}.{name}", attr)
+
+        return attr
@@ -0,0 +1,17 @@
+from . import BaseService
+
+from src.repo import IndicatorCatalogRepo, IndicatorValueRepo
+
+
+class IndicatorCatalogService(BaseService):
+    repo: IndicatorCatalogRepo
+
+    def __init__(self, pool):
+        super().__init__(IndicatorCatalogRepo(pool))
+
+
+class IndicatorValueService(BaseService):
+    repo: IndicatorValueRepo
+
+    def __init__(self, pool):
+        super().__init__(IndicatorValueRepo(pool))
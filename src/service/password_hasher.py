@@ -0,0 +1,122 @@
+"""Password hashing.
+
+Passwords are stored as scrypt hashes encoded as
+`scrypt$<log2 n>$<r>$<p>$<salt>$<hash>` (base64 salt and hash). scrypt is
+deliberately slow, so hashing and verification run on a bounded thread pool
+instead of the event loop; hashlib releases the GIL while deriving keys.
+
+Rows created before hashing was introduced hold plain-text passwords. They
+are still accepted, and `needs_rehash` tells the caller to upgrade them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+
+
+SCHEME = 'scrypt'
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+class PasswordHasher:
+    """scrypt hashing offloaded to a dedicated executor.
+
+    Attributes:
+        work_factor: log2 of the scrypt CPU/memory cost `n`.
+        block_size: scrypt `r` parameter.
+        parallelism: scrypt `p` parameter.
+    """
+
+    def __init__(self, work_factor: int = 14, block_size: int = 8,
+                 parallelism: int = 1, workers: Optional[int] = None):
+        self.work_factor = work_factor
+        self.block_size = block_size
+        self.parallelism = parallelism
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            thread_name_prefix='password-hasher'
+        )
+
+    @staticmethod
+    def is_hashed(stored: str) -> bool:
+        return stored.startswith(f"{SCHEME}$")
+
+    def needs_rehash(self, stored: str) -> bool:
+        """True for plain-text passwords and hashes with outdated cost
+        parameters.
+        """
+
+        if not self.is_hashed(stored):
+            return True
+
+        _, work_factor, block_size, parallelism, _, _ = stored.split('$')
+
+        return (int(work_factor), int(block_size), int(parallelism)) != \
+            (self.work_factor, self.block_size, self.parallelism)
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, work_factor: int,
+                block_size: int, parallelism: int) -> bytes:
+        n = 2 ** work_factor
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=block_size, p=parallelism,
+            # scrypt needs 128 * n * r bytes, leave room for the overhead
+            maxmem=256 * n * block_size * parallelism + 2 ** 20,
+            dklen=32
+        )
+
+    def hash_sync(self, password: str) -> str:
+        salt = os.urandom(16)
+        derived = self._derive(password, salt, self.work_factor,
+                               self.block_size, self.parallelism)
+
+        return '$'.join([
+            SCHEME, str(self.work_factor), str(self.block_size),
+            str(self.parallelism), _b64encode(salt), _b64encode(derived)
+        ])
+
+    def verify_sync(self, password: str, stored: str) -> bool:
+        if not self.is_hashed(stored):
+            # legacy plain-text row
+            return hmac.compare_digest(password.encode(), stored.encode())
+
+        try:
+            _, work_factor, block_size, parallelism, salt, expected = \
+                stored.split('$')
+            derived = self._derive(password, _b64decode(salt),
+                                   int(work_factor), int(block_size),
+                                   int(parallelism))
+        except ValueError:
+            return False
+
+        return hmac.compare_digest(derived, _b64decode(expected))
+
+    async def hash(self, password: str) -> str:
+        """Hash `password` without blocking the event loop."""
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.hash_sync, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        """Check `password` against a stored hash (or legacy plain text)
+        without blocking the event loop.
+        """
+
+        if not self.is_hashed(stored):
+            return self.verify_sync(password, stored)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.verify_sync, password, stored)
@@ -1,9 +1,12 @@
 """Public service layer for read-only data access."""
 
-from typing import List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
 
 from src.repo.public_repo import PublicRepo
-from src.dto import IndicatorFilters
+from src.repo.replicas import ReadFence, ReadPool
+from src.derived import Expression
+from src.dto import ChangeToken, IndicatorFilters
 
 
 class PublicService:
@@ -13,8 +16,20 @@ class PublicService:
     It acts as a thin wrapper around PublicRepo, following the SoC principle.
     """
 
-    def __init__(self, pool):
-        self.repo = PublicRepo(pool)
+    def __init__(self, pool, read_pool: Optional[ReadPool] = None):
+        self.repo = PublicRepo(pool, read_pool)
+
+    @asynccontextmanager
+    async def read_fence(self) -> AsyncIterator[Optional[ReadFence]]:
+        """Fence of the reads made in the block (see `ReadPool.fence`),
+        None when all reads go to the primary.
+        """
+        if self.repo.read_pool is None:
+            yield None
+            return
+
+        async with self.repo.read_pool.fence() as fence:
+            yield fence
 
     async def list_economies(self) -> List[dict]:
         """List all economies with region and income level."""
@@ -54,6 +69,34 @@ class PublicService:
         """List environment indicators with filters."""
         return await self.repo.list_environment_indicators(filters)
 
+    async def list_derived_indicators(
+        self, expressions: List[Expression], filters: IndicatorFilters
+    ) -> List[dict]:
+        """List derived indicator values with filters."""
+        return await self.repo.list_derived_indicators(expressions, filters)
+
+    async def list_catalog(self) -> List[dict]:
+        """List the series of the indicator catalog."""
+        return await self.repo.list_catalog()
+
+    async def list_series(
+        self, codes: List[str], filters: IndicatorFilters
+    ) -> List[dict]:
+        """List indicator catalog values with filters."""
+        return await self.repo.list_series(codes, filters)
+
+    async def list_changes(
+        self, token: ChangeToken, limit: int
+    ) -> Tuple[List[dict], ChangeToken, bool]:
+        """List indicator changes since the token's sync."""
+        return await self.repo.list_changes(token, limit)
+
+    async def get_data_versions(
+        self, economy_code: Optional[str] = None
+    ) -> dict:
+        """Get change counters by table."""
+        return await self.repo.get_data_versions(economy_code)
+
     async def get_stats(self) -> dict:
         """Get database statistics."""
         return await self.repo.get_stats()
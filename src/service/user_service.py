@@ -1,10 +1,79 @@
 from . import BaseService
+from .password_hasher import PasswordHasher
 
+from src.dto import UserCreateDto, UserUpdateDto
 from src.repo import UserRepo
 
+from typing import Any, List, Optional
+
+import asyncio
+
 
 class UserService(BaseService):
+    """User accounts. Passwords are hashed before they reach the repo.
+
+    Attributes:
+        password_hasher: Hashes and verifies passwords off the event loop.
+    """
+
     repo: UserRepo
 
-    def __init__(self, pool):
+    def __init__(self, pool, password_hasher: PasswordHasher | None = None):
         super().__init__(UserRepo(pool))
+        self.password_hasher = password_hasher or PasswordHasher()
+
+    async def authenticate(self, email: str, password: str) -> Optional[dict]:
+        """Fetch the user with the given credentials.
+
+        Plain-text passwords (rows created before hashing) and hashes with
+        outdated cost parameters are upgraded on a successful login.
+
+        Returns:
+            The user record, or None if the credentials are invalid.
+        """
+        user = await self.repo.get_user_by_email(email)
+
+        if not user:
+            # spend comparable time on unknown emails
+            await self.password_hasher.hash(password)
+            return None
+
+        if not await self.password_hasher.verify(password, user['password']):
+            return None
+
+        if self.password_hasher.needs_rehash(user['password']):
+            await self.repo.reset_password(
+                user['id'], await self.password_hasher.hash(password))
+
+        return user
+
+    async def create_user(self, email, password, name):
+        return await self.repo.create_user(
+            email, await self.password_hasher.hash(password), name)
+
+    async def reset_password(self, id, password):
+        return await self.repo.reset_password(
+            id, await self.password_hasher.hash(password))
+
+    async def create(self, create_dto: UserCreateDto) -> Optional[dict]:
+        create_dto = create_dto.model_copy(update={
+            'password': await self.password_hasher.hash(create_dto.password)
+        })
+        return await self.repo.insert(create_dto)
+
+    async def insert_many(self, records: List[UserCreateDto]) -> int:
+        hashes = await asyncio.gather(*(
+            self.password_hasher.hash(r.password) for r in records))
+        return await self.repo.insert_many([
+            r.model_copy(update={'password': h})
+            for r, h in zip(records, hashes)
+        ])
+
+    async def update(self, update_dto: UserUpdateDto,
+                     keys: List[Any]) -> Optional[dict]:
+        if update_dto.password is not None:
+            update_dto = update_dto.model_copy(update={
+                'password': await self.password_hasher.hash(
+                    update_dto.password)
+            })
+        return await self.repo.update(keys, update_dto)
@@ -4,13 +4,23 @@ from dataclasses import dataclass
 import asyncpg
 import os
 
+from src.cache import CacheBackend, bump_indicators, create_cache, \
+    invalidate
+from src.jwt_keyring import JwtKeyring
+from src.repo.instrumentation import instrumentation
+from src.repo.data_versions import DataChangeListener, create_listener
+from src.repo.pool import create_pool, init_connection
+from src.repo.replicas import ReadPool, create_read_pool
 from src.service import (
     ProviderService,
     EconomyService,
     PermissionService,
     IndicatorService,
+    IndicatorCatalogService,
+    IndicatorValueService,
     UserService
 )
+from src.service.password_hasher import PasswordHasher
 
 
 @dataclass
@@ -31,20 +41,61 @@ class State:
     economy_service: EconomyService
     permission_service: PermissionService
     indicator_service: IndicatorService
+    indicator_catalog_service: IndicatorCatalogService
+    indicator_value_service: IndicatorValueService
     management_console_token: str
-    jwt_secret: str
+    jwt_keyring: JwtKeyring
     internal_access_token: str | None
+    metrics_token: str | None = None
+
+    # read replicas of the public API
+    read_pool: ReadPool | None = None
+
+    trace_requests: str | None = None
+
+    # public response cache, entry lifetimes in seconds
+    response_cache: CacheBackend | None = None
+    cache_ttl: int = 300
+    cache_reference_ttl: int = 300
+
+    # `data_changes` notifications of the database
+    data_changes: DataChangeListener | None = None
+
+    # HTTP tuning
+    compression_min_size: int = 1024
+    compression_level: int = 6
+
+    # Admission control, concurrent requests per API surface (0: unbounded)
+    public_concurrency: int = 0
+    portal_concurrency: int = 0
+    management_concurrency: int = 0
+    internal_concurrency: int = 0
+    queue_timeout_ms: int = 1000
+    worker_threads: int = 32
+
+    # Database work deadline of a request (0: none)
+    query_timeout_ms: int = 30000
+    public_query_timeout_ms: int = 10000
 
 
 def bootstrap_state(pool,
                     management_console_token,
                     jwt_secret,
-                    internal_access_token: str | None = None) -> State:
+                    internal_access_token: str | None = None,
+                    password_hasher: PasswordHasher | None = None,
+                    jwt_keyring: JwtKeyring | None = None,
+                    **settings) -> State:
     """Bootstraps the application state by instantiating all services.
 
     Args:
         pool: The active asyncpg database connection pool.
         internal_access_token: The secret token for administrative access.
+        password_hasher: Hasher used by the user service, a default one is
+                         created when omitted.
+        jwt_keyring: Portal token keys, a single key holding `jwt_secret` is
+                     used when omitted.
+        settings: Optional tuning fields of `State`, defaults are used for
+                  the omitted ones.
     """
 
     data = {'pool': pool}
@@ -56,11 +107,39 @@ def bootstrap_state(pool,
         if (key.endswith('service')):
             data[key] = ServiceClass(pool)
 
+    if password_hasher is not None:
+        data['user_service'].password_hasher = password_hasher
+
+    cache = settings.get('response_cache')
+    if cache is not None:
+        # own writes invalidate at once, notifications of all writes follow
+        data['indicator_service'].repo.on_change.append(
+            lambda economies: bump_indicators(cache, economies))
+
+        listener = settings.get('data_changes')
+        if listener is not None:
+            listener.callbacks.append(
+                lambda table, economies: invalidate(cache, table, economies))
+
     data['internal_access_token'] = internal_access_token
     data['management_console_token'] = management_console_token
-    data['jwt_secret'] = jwt_secret
+    data['jwt_keyring'] = jwt_keyring or JwtKeyring.from_config(jwt_secret)
+
+    return State(**data, **settings)
+
 
-    return State(**data)
+def env_int(name: str, default: int) -> int:
+    """Reads an integer environment variable, falling back to `default`."""
+
+    value = os.environ.get(name)
+
+    if value is None or value == '':
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} environment variable must be an integer.")
 
 
 async def from_env() -> State:
@@ -80,6 +159,7 @@ async def from_env() -> State:
     INTERNAL_ACCESS_TOKEN = os.environ.get('INTERNAL_ACCESS_TOKEN')
     MANAGEMENT_CONSOLE_TOKEN = os.environ.get('MANAGEMENT_CONSOLE_TOKEN')
     JWT_SECRET = os.environ.get('JWT_SECRET')
+    JWT_KEYS = os.environ.get('JWT_KEYS')
 
     if DATABASE_URL is None:
         raise ValueError("DATABASE_URL environment variable must be set in "
@@ -90,13 +170,81 @@ async def from_env() -> State:
                          "be set in order to control management console "
                          "access.")
 
-    if JWT_SECRET is None:
-        raise ValueError("A JWT_SECRET is required to sign web tokens.")
-
-    # Create the connection pool
-    pool = await asyncpg.create_pool(DATABASE_URL)
+    if JWT_SECRET is None and JWT_KEYS is None:
+        raise ValueError("A JWT_SECRET or JWT_KEYS is required to sign web "
+                         "tokens.")
+
+    instrumentation.slow_query_ms = env_int('SLOW_QUERY_MS', 500)
+
+    COMPRESSION_LEVEL = env_int('COMPRESSION_LEVEL', 6)
+    if not 0 <= COMPRESSION_LEVEL <= 9:
+        raise ValueError("COMPRESSION_LEVEL environment variable must be "
+                         "between 0 and 9.")
+
+    settings = {
+        'metrics_token': os.environ.get('METRICS_TOKEN'),
+        'trace_requests': os.environ.get('TRACE_REQUESTS'),
+        'compression_min_size': env_int('COMPRESSION_MIN_SIZE', 1024),
+        'compression_level': COMPRESSION_LEVEL,
+        'response_cache': create_cache(
+            os.environ.get('CACHE_BACKEND') or 'memory',
+            os.environ.get('CACHE_PATH') or '.response_cache.sqlite3',
+            max_bytes=env_int('CACHE_MAX_MB', 64) << 20),
+        'cache_ttl': env_int('CACHE_TTL', 300),
+        'cache_reference_ttl': env_int('CACHE_REFERENCE_TTL', 300),
+    }
+
+    password_hasher = PasswordHasher(
+        work_factor=env_int('PASSWORD_HASH_WORK_FACTOR', 14),
+        workers=env_int('PASSWORD_HASH_WORKERS', 0) or None
+    )
+
+    jwt_keyring = JwtKeyring.from_config(
+        JWT_SECRET, JWT_KEYS, cache_size=env_int('JWT_CACHE_SIZE', 4096))
+
+    # Create the connection pool, warmed up and schema-checked
+    pool_options = {
+        'min_size': env_int('DB_POOL_MIN_SIZE', 10),
+        'max_size': env_int('DB_POOL_MAX_SIZE', 10),
+        'statement_timeout_ms': env_int('DB_STATEMENT_TIMEOUT_MS', 60000),
+    }
+
+    # public analytics may hold at most half of the connections by default
+    settings.update({
+        'public_concurrency': env_int('PUBLIC_CONCURRENCY',
+                                      max(1, pool_options['max_size'] // 2)),
+        'portal_concurrency': env_int('PORTAL_CONCURRENCY', 0),
+        'management_concurrency': env_int('MANAGEMENT_CONCURRENCY', 0),
+        'internal_concurrency': env_int('INTERNAL_CONCURRENCY', 0),
+        'queue_timeout_ms': env_int('QUEUE_TIMEOUT_MS', 1000),
+        'worker_threads': env_int('WORKER_THREADS', 32),
+        'query_timeout_ms': env_int('QUERY_TIMEOUT_MS', 30000),
+        'public_query_timeout_ms': env_int('PUBLIC_QUERY_TIMEOUT_MS', 10000),
+    })
+
+    pool = await create_pool(DATABASE_URL, **pool_options)
+    settings['data_changes'] = await create_listener(DATABASE_URL)
+
+    DATABASE_REPLICA_URLS = os.environ.get('DATABASE_REPLICA_URLS')
+    if DATABASE_REPLICA_URLS:
+        REPLICA_MAX_STALENESS = env_int('REPLICA_MAX_STALENESS', 30)
+        if REPLICA_MAX_STALENESS < 0:
+            raise ValueError("REPLICA_MAX_STALENESS environment variable "
+                             "must not be negative.")
+
+        settings['read_pool'] = await create_read_pool(
+            pool,
+            [url.strip() for url in DATABASE_REPLICA_URLS.split(',')
+             if url.strip()],
+            max_staleness=REPLICA_MAX_STALENESS,
+            init=init_connection,
+            **pool_options
+        )
 
     return bootstrap_state(pool,
                            MANAGEMENT_CONSOLE_TOKEN,
                            JWT_SECRET,
-                           internal_access_token=INTERNAL_ACCESS_TOKEN)
+                           internal_access_token=INTERNAL_ACCESS_TOKEN,
+                           password_hasher=password_hasher,
+                           jwt_keyring=jwt_keyring,
+                           **settings)
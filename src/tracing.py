@@ -0,0 +1,140 @@
+"""Lightweight request-scoped tracing.
+
+A `Trace` is started for every request when tracing is enabled. Code along
+the Handler -> Service -> Repo path marks its steps with `span(...)`, and
+repository queries are recorded through the instrumentation hooks. When the
+request finishes, the timing breakdown is sent in a `Server-Timing` response
+header and/or logged, depending on `TRACE_REQUESTS` (`header`, `log` or
+`both`).
+
+Spans are no-ops when there is no active trace.
+"""
+
+from src.error import log
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Iterator, List, Optional, Tuple
+
+import re
+
+from flask import Response, request
+
+
+_SERVER_TIMING_TOKEN = re.compile(r"[^!#$%&'*+\-.^_`|~0-9A-Za-z]")
+
+
+class Trace:
+    """Spans recorded during a single request."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.depth = 0
+        # (start offset, depth, name, elapsed), all times in milliseconds
+        self.spans: List[Tuple[float, int, str, float]] = []
+
+    def add(self, name: str, start: float, elapsed_ms: float):
+        """Record a finished span started at `perf_counter()` `start`."""
+        self.spans.append(((start - self.start) * 1000, self.depth, name,
+                           elapsed_ms))
+
+    @property
+    def total_ms(self) -> float:
+        return (perf_counter() - self.start) * 1000
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{_SERVER_TIMING_TOKEN.sub('.', name)};dur={elapsed_ms:.2f}"
+            for _, _, name, elapsed_ms in sorted(self.spans)
+        ]
+        entries.append(f"total;dur={self.total_ms:.2f}")
+        return ', '.join(entries)
+
+    def breakdown(self) -> List[str]:
+        return [
+            f"{'  ' * depth}{name} {elapsed_ms:.2f}ms"
+            for _, depth, name, elapsed_ms in sorted(self.spans)
+        ]
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar('trace', default=None)
+
+enabled = False
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as a span of the active trace."""
+
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    start = perf_counter()
+    trace.depth += 1
+    try:
+        yield
+    finally:
+        trace.depth -= 1
+        trace.add(name, start, (perf_counter() - start) * 1000)
+
+
+def traced(name: str, func):
+    """Wrap coroutine function `func` so each call is recorded as a span."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        with span(name):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_query(shape: str, elapsed_ms: float, _rows: int):
+    """`PoolInstrumentation` query hook, records queries as spans."""
+
+    trace = _current.get()
+    if trace is not None:
+        trace.add(f"db.{shape}", perf_counter() - elapsed_ms / 1000,
+                  elapsed_ms)
+
+
+class RequestTracer:
+    """Flask hooks that start a trace per request and report it.
+
+    Args:
+        header: Send the breakdown in a `Server-Timing` header.
+        log_line: Log the breakdown once the request completes.
+    """
+
+    def __init__(self, header: bool, log_line: bool):
+        self.header = header
+        self.log_line = log_line
+
+    def before_request(self):
+        _current.set(Trace())
+
+    def after_request(self, response: Response) -> Response:
+        trace = _current.get()
+        if trace is None:
+            return response
+
+        _current.set(None)
+
+        if self.header:
+            response.headers['Server-Timing'] = trace.server_timing()
+
+        if self.log_line:
+            log.info("request trace", method=request.method,
+                     path=request.path, status=response.status_code,
+                     total_ms=round(trace.total_ms, 2),
+                     spans=trace.breakdown())
+
+        return response
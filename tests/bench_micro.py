@@ -0,0 +1,190 @@
+"""Micro-benchmarks for hot pure-Python paths (no database required).
+
+Measures query building, SQL string construction, Pydantic row hydration and
+JSON serialization in isolation. Repositories run against `FakePool`, which
+returns canned rows instead of talking to PostgreSQL, so the numbers only
+contain the Python side of each call.
+
+Usage:
+    python tests/bench_micro.py [--number 2000] [--output bench.json]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from contextlib import asynccontextmanager  # noqa: E402
+from time import perf_counter  # noqa: E402
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import statistics  # noqa: E402
+
+from flask import Flask, jsonify  # noqa: E402
+
+from src.dto import IndicatorFilters, ProviderUpdateDto  # noqa: E402
+from src.indicators import FIELD_NAMES  # noqa: E402
+from src.repo import IndicatorRepo, ProviderRepo  # noqa: E402
+from src.repo.public_repo import build_indicator_filter_clause  # noqa: E402
+
+
+INDICATOR_ROW = {
+    'provider_id': 1, 'economy_code': 'TUR', 'year': 2020,
+    # some fields unset, like in WorldBank data
+    **{name: None if i % 8 == 3 else 10.0 * i + 0.5
+       for i, name in enumerate(FIELD_NAMES)},
+}
+
+PUBLIC_ROW = {
+    **INDICATOR_ROW,
+    'provider_name': 'WorldBank', 'economy_name': 'Türkiye',
+    'region_name': 'Europe & Central Asia',
+    'income_level_name': 'Upper middle income',
+}
+
+
+class FakeConnection:
+    """Answers every query with canned rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, query, *args, **kwargs):
+        return self.rows
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return self.rows[0] if self.rows else None
+
+    async def fetchval(self, query, *args, **kwargs):
+        return len(self.rows)
+
+    async def execute(self, query, *args, **kwargs):
+        return "UPDATE 1"
+
+    async def executemany(self, query, args, **kwargs):
+        return None
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    """Stand-in for `asyncpg.Pool`, see `FakeConnection`."""
+
+    def __init__(self, rows):
+        self.conn = FakeConnection(rows)
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        yield self.conn
+
+    def get_size(self):
+        return 1
+
+    def get_idle_size(self):
+        return 1
+
+    def get_min_size(self):
+        return 1
+
+    def get_max_size(self):
+        return 1
+
+
+def bench(name, func, number):
+    """Run `func` `number` times in 5 rounds, report the best round."""
+
+    rounds = []
+    for _ in range(5):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((perf_counter() - start) / number * 1e6)
+
+    result = {
+        'number': number,
+        'best_us': round(min(rounds), 3),
+        'median_us': round(statistics.median(rounds), 3),
+    }
+    print(f"✓ {name:<44} best {result['best_us']:>10.2f}us  "
+          f"median {result['median_us']:>10.2f}us")
+    return result
+
+
+def run_coroutine(loop, factory):
+    return lambda: loop.run_until_complete(factory())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--number', type=int, default=2000,
+                        help="iterations per round")
+    parser.add_argument('--output', default=None,
+                        help="write results as JSON to this file")
+    args = parser.parse_args()
+    n = args.number
+
+    loop = asyncio.new_event_loop()
+    results = {}
+
+    # Query builders
+    # ---------------------------------------------------------
+    filters = IndicatorFilters(economy_code='tur', region='ecs',
+                               year_start=2000, year_end=2020,
+                               provider_id=1)
+    results['build_indicator_filter_clause'] = bench(
+        'build_indicator_filter_clause',
+        lambda: build_indicator_filter_clause(filters), n * 10)
+
+    indicator_repo = IndicatorRepo(FakePool([INDICATOR_ROW]))
+    payload = {k: v for k, v in INDICATOR_ROW.items()
+               if k not in ('provider_id', 'economy_code', 'year')}
+    results['IndicatorRepo.upsert_indicator'] = bench(
+        'IndicatorRepo.upsert_indicator',
+        run_coroutine(loop, lambda: indicator_repo.upsert_indicator(
+            1, 'TUR', 2020, payload)), n)
+
+    provider_repo = ProviderRepo(FakePool([{'id': 1}]))
+    update = ProviderUpdateDto(name="WorldBank", description="desc",
+                               website_url="https://worldbank.org/")
+    results['BaseRepo.update'] = bench(
+        'BaseRepo.update',
+        run_coroutine(loop, lambda: provider_repo.update([1], update)), n)
+
+    # Row hydration
+    # ---------------------------------------------------------
+    for size in (100, 1000):
+        repo = IndicatorRepo(FakePool([INDICATOR_ROW] * size))
+        results[f'BaseTransaction.fetch[{size}]'] = bench(
+            f'BaseTransaction.fetch ({size} rows)',
+            run_coroutine(loop, lambda: repo.fetch("SELECT 1")),
+            max(1, n * 10 // size))
+
+        results[f'BaseTransaction.fetch_raw[{size}]'] = bench(
+            f'BaseTransaction.fetch_raw ({size} rows)',
+            run_coroutine(loop, lambda: repo.fetch_raw("SELECT 1")),
+            max(1, n * 10 // size))
+
+    # Serialization
+    # ---------------------------------------------------------
+    app = Flask(__name__)
+    for size in (100, 1000):
+        page = [dict(PUBLIC_ROW) for _ in range(size)]
+        with app.app_context():
+            results[f'jsonify[{size}]'] = bench(
+                f'jsonify indicator page ({size} rows)',
+                lambda: jsonify(page).get_data(), max(1, n * 10 // size))
+
+    loop.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Login password verification benchmark (no database required).
+
+Runs `--logins` concurrent verifications on one event loop, the way the
+portal login handler does, and reports throughput together with the longest
+event loop stall observed by a 1ms ticker. `inline` verifies on the event
+loop itself, `executor` uses `PasswordHasher.verify` (the dedicated thread
+pool).
+
+Usage:
+    python tests/bench_password.py [--concurrency 32] [--logins 256]
+                                   [--work-factor 14] [--workers N]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from time import perf_counter  # noqa: E402
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+
+from src.service.password_hasher import PasswordHasher  # noqa: E402
+
+
+PASSWORD = "bench-password"
+
+
+async def ticker(stop: asyncio.Event, stalls: list):
+    """Sleep 1ms in a loop, recording how late each wake-up is."""
+
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append((perf_counter() - start) * 1000 - 1)
+
+
+async def run(mode, hasher, stored, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == 'inline':
+                ok = hasher.verify_sync(PASSWORD, stored)
+                # yield like a request handler would between awaits
+                await asyncio.sleep(0)
+            else:
+                ok = await hasher.verify(PASSWORD, stored)
+            assert ok
+
+    stop = asyncio.Event()
+    stalls = []
+    ticker_task = asyncio.create_task(ticker(stop, stalls))
+
+    start = perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = perf_counter() - start
+
+    stop.set()
+    await ticker_task
+
+    result = {
+        'logins': logins,
+        'seconds': round(elapsed, 3),
+        'throughput': round(logins / elapsed, 2),
+        'max_loop_stall_ms': round(max(stalls, default=0), 2),
+    }
+    print(f"✓ {mode:<10} {result['throughput']:>8} logins/s  "
+          f"max loop stall {result['max_loop_stall_ms']:>8}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=256)
+    parser.add_argument('--work-factor', type=int, default=14)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="hashing threads (default: CPU count)")
+    parser.add_argument('--output', default=None,
+                        help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(work_factor=args.work_factor,
+                            workers=args.workers)
+    stored = hasher.hash_sync(PASSWORD)
+
+    print(f"Verifying {args.logins} logins with concurrency "
+          f"{args.concurrency}, scrypt n=2^{args.work_factor}, "
+          f"{hasher.executor._max_workers} hashing threads\n")
+
+    results = {
+        mode: asyncio.run(run(mode, hasher, stored, args.logins,
+                              args.concurrency))
+        for mode in ('inline', 'executor')
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Load test and benchmark suite (requires a running server and database).
+
+Seeds a synthetic dataset of economies x years x providers directly into the
+database, then drives concurrent load against the public listing, portal
+upsert and management endpoints. Throughput and p50/p95/p99 latencies are
+printed and written as JSON, so runs can be compared across commits.
+
+Usage:
+    python tests/load_test.py seed --economies 100 --years 40 --providers 5
+    python tests/load_test.py run --concurrency 16 --requests 2000
+    python tests/load_test.py cleanup
+
+Database settings are read from `.env`/`DATABASE_URL` like the fixtures.
+Synthetic economies use codes starting with a digit (e.g. `9AB`) and
+synthetic users/providers are prefixed with `bench-`, so they never collide
+with WorldBank data and can be removed with `cleanup`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from itertools import product
+from string import ascii_uppercase
+from threading import local
+from time import perf_counter
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+
+import asyncpg
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.indicators import (  # noqa: E402
+    CATEGORIES, CATEGORY_BY_NAME, KEY_COLUMNS)
+
+BASE_URL = "http://127.0.0.1:6767"
+
+# From .env - update if different
+CONSOLE_TOKEN = "management-console-token"
+BENCH_PASSWORD = "bench-password"
+
+ECONOMIC = CATEGORY_BY_NAME['economic'].field_names
+HEALTH = CATEGORY_BY_NAME['health'].field_names
+
+REGIONS = ['LCN', 'MEA', 'SSF', 'ECS', 'EAS', 'SAS', 'NAC']
+FIRST_YEAR = 1960
+
+
+def economy_codes(count):
+    codes = (f"{d}{a}{b}" for d, a, b in
+             product('9876543210', ascii_uppercase, ascii_uppercase))
+    return [next(codes) for _ in range(count)]
+
+
+# -----------------------------------------------------------------------------
+# Seeding
+# -----------------------------------------------------------------------------
+async def cleanup(conn):
+    await conn.execute(
+        "DELETE FROM providers WHERE name LIKE 'bench-%'")
+    await conn.execute(
+        "DELETE FROM users WHERE email LIKE 'bench-%'")
+    await conn.execute(
+        "DELETE FROM economies WHERE code ~ '^[0-9]'")
+
+
+async def seed(conn, economies, years, providers):
+    rng = random.Random(317)
+    codes = economy_codes(economies)
+    year_range = range(FIRST_YEAR, FIRST_YEAR + years)
+
+    async with conn.transaction():
+        await cleanup(conn)
+
+        await conn.copy_records_to_table(
+            'economies',
+            columns=['code', 'name', 'region', 'is_aggregate'],
+            records=[(code, f"Bench Economy {code}", rng.choice(REGIONS),
+                      False) for code in codes])
+
+        provider_ids = []
+        for i in range(providers):
+            user_id = await conn.fetchval(
+                "INSERT INTO users (email, password, name) "
+                "VALUES ($1, $2, $3) RETURNING id",
+                f"bench-{i}@example.com", BENCH_PASSWORD, f"Bench User {i}")
+            provider_ids.append(await conn.fetchval(
+                "INSERT INTO providers (administrative_account, name, "
+                "immutable) VALUES ($1, $2, false) RETURNING id",
+                user_id, f"bench-provider-{i}"))
+
+        await conn.copy_records_to_table(
+            'permissions',
+            columns=['provider_id', 'region', 'year_start', 'year_end'],
+            records=[(pid, region, year_range[0], year_range[-1])
+                     for pid in provider_ids for region in REGIONS])
+
+        keys = list(product(provider_ids, codes, year_range))
+        for category in CATEGORIES:
+            fields = category.field_names
+            await conn.copy_records_to_table(
+                category.table,
+                columns=[*KEY_COLUMNS, *fields],
+                records=[(*key, *(rng.uniform(0, 100) for _ in fields))
+                         for key in keys])
+
+    await conn.execute("ANALYZE")
+
+    return len(keys)
+
+
+async def run_seed(args):
+    conn = await asyncpg.connect(os.environ['DATABASE_URL'])
+    try:
+        if args.command == 'cleanup':
+            await cleanup(conn)
+            print("✓ Removed synthetic data")
+        else:
+            start = perf_counter()
+            rows = await seed(conn, args.economies, args.years,
+                              args.providers)
+            print(f"✓ Seeded {rows} rows into each indicator table in "
+                  f"{perf_counter() - start:.1f}s")
+    finally:
+        await conn.close()
+
+
+# -----------------------------------------------------------------------------
+# Load generation
+# -----------------------------------------------------------------------------
+_thread = local()
+
+
+def session():
+    if not hasattr(_thread, 'session'):
+        _thread.session = requests.Session()
+    return _thread.session
+
+
+class Scenarios:
+    """Request factories, each returning a (method, url, kwargs) triple."""
+
+    def __init__(self, economies, years, providers):
+        self.codes = economy_codes(economies)
+        self.years = list(range(FIRST_YEAR, FIRST_YEAR + years))
+        self.providers = providers
+        self.tokens = []
+        self.provider_ids = []
+
+    def login(self):
+        for i in range(self.providers):
+            r = requests.post(f"{BASE_URL}/api/portal/auth/login", json={
+                "email": f"bench-{i}@example.com",
+                "password": BENCH_PASSWORD
+            })
+            r.raise_for_status()
+            token = r.json()['token']
+
+            r = requests.get(f"{BASE_URL}/api/portal/auth/me", headers={
+                "Authorization": f"Bearer {token}"
+            })
+            r.raise_for_status()
+
+            self.tokens.append(token)
+            self.provider_ids.append(r.json()['managed_providers'][0]['id'])
+
+    def public_indicators(self, rng):
+        params = {'limit': 100}
+        choice = rng.random()
+        if choice < 0.4:
+            params['year'] = rng.choice(self.years)
+        elif choice < 0.7:
+            params['region'] = rng.choice(REGIONS)
+            params['year_start'] = rng.choice(self.years[:len(self.years)
+                                                         // 2])
+        else:
+            params['economy_code'] = rng.choice(self.codes)
+        return 'GET', f"{BASE_URL}/api/public/indicators", {'params': params}
+
+    def public_economies(self, rng):
+        return 'GET', f"{BASE_URL}/api/public/economies", {}
+
+    def portal_login(self, rng):
+        return 'POST', f"{BASE_URL}/api/portal/auth/login", {
+            'json': {
+                "email": f"bench-{rng.randrange(self.providers)}@example.com",
+                "password": BENCH_PASSWORD
+            }
+        }
+
+    def portal_upsert(self, rng):
+        i = rng.randrange(len(self.tokens))
+        return 'POST', f"{BASE_URL}/api/portal/indicators", {
+            'headers': {
+                "Authorization": f"Bearer {self.tokens[i]}",
+                "X-Provider-Context": str(self.provider_ids[i])
+            },
+            'json': {
+                'economy_code': rng.choice(self.codes),
+                'year': rng.choice(self.years),
+                rng.choice(ECONOMIC): rng.uniform(0, 100),
+                rng.choice(HEALTH): rng.uniform(0, 100)
+            }
+        }
+
+    def management_users(self, rng):
+        return 'GET', f"{BASE_URL}/management/users", {
+            'headers': {"x-management-secret": CONSOLE_TOKEN}
+        }
+
+    def management_permissions(self, rng):
+        return 'GET', f"{BASE_URL}/management/permissions", {
+            'headers': {"x-management-secret": CONSOLE_TOKEN},
+            'params': {'provider_id': rng.choice(self.provider_ids)}
+        }
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1,
+                max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(name, factory, total, concurrency, seed_value):
+    def one(i):
+        rng = random.Random(seed_value * 1_000_003 + i)
+        method, url, kwargs = factory(rng)
+        start = perf_counter()
+        try:
+            r = session().request(method, url, **kwargs)
+            ok = r.status_code < 400
+        except requests.RequestException:
+            ok = False
+        return perf_counter() - start, ok
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = sum(1 for r in results if not r[1])
+
+    report = {
+        'requests': total,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(total / elapsed, 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+
+    mark = "✓" if errors == 0 else "⚠"
+    print(f"{mark} {name:<24} {report['throughput']:>8} req/s  "
+          f"p50 {report['p50_ms']:>7}ms  p95 {report['p95_ms']:>7}ms  "
+          f"p99 {report['p99_ms']:>7}ms  errors {errors}")
+
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load(args):
+    scenarios = Scenarios(args.economies, args.years, args.providers)
+    scenarios.login()
+
+    selected = {
+        'public_indicators': scenarios.public_indicators,
+        'public_economies': scenarios.public_economies,
+        'portal_login': scenarios.portal_login,
+        'portal_upsert': scenarios.portal_upsert,
+        'management_users': scenarios.management_users,
+        'management_permissions': scenarios.management_permissions,
+    }
+    if args.only:
+        selected = {k: v for k, v in selected.items() if k in args.only}
+
+    print(f"Running {args.requests} requests per scenario with concurrency "
+          f"{args.concurrency}\n")
+
+    # warm up connections and caches
+    run_scenario('warmup', scenarios.public_economies,
+                 args.concurrency * 2, args.concurrency, 0)
+
+    results = {
+        name: run_scenario(name, factory, args.requests, args.concurrency,
+                           args.seed)
+        for name, factory in selected.items()
+    }
+
+    output = {
+        'commit': git_commit(),
+        'dataset': {
+            'economies': args.economies,
+            'years': args.years,
+            'providers': args.providers,
+        },
+        'concurrency': args.concurrency,
+        'scenarios': results,
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('command', choices=['seed', 'run', 'cleanup'])
+    parser.add_argument('--economies', type=int, default=100)
+    parser.add_argument('--years', type=int, default=40)
+    parser.add_argument('--providers', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000,
+                        help="requests per scenario")
+    parser.add_argument('--only', nargs='*',
+                        help="run only the named scenarios")
+    parser.add_argument('--seed', type=int, default=317)
+    parser.add_argument('--output', default='load_test_results.json')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_load(args)
+    else:
+        if 'DATABASE_URL' not in os.environ:
+            sys.exit("DATABASE_URL must be set to seed the database.")
+        asyncio.run(run_seed(args))
+
+
+if __name__ == "__main__":
+    main()
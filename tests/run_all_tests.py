@@ -12,6 +12,7 @@ tests = [
     ("Public API", "test_public.py"),
     ("Portal API", "test_portal.py"),
     ("Management API", "test_management.py"),
+    ("Internal API", "test_internal.py"),
 ]
 
 failed = []
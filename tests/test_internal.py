@@ -0,0 +1,103 @@
+"""Simple tests for internal API (requires internal access token)."""
+
+import requests
+
+BASE_URL = "http://127.0.0.1:6767/internal"
+
+# From .env - update if different
+ACCESS_TOKEN = "internal-access-token"
+
+HEADERS = {"x-super-admin-secret": ACCESS_TOKEN}
+
+
+def test_unauthorized():
+    """Test that requests without token are rejected."""
+    r = requests.get(f"{BASE_URL}/providers/")
+    assert r.status_code in [401, 403]
+    print(f"✓ Unauthorized correctly blocked: {r.status_code}")
+
+
+def test_list_providers():
+    """Test GET /providers."""
+    r = requests.get(f"{BASE_URL}/providers/", headers=HEADERS)
+    assert r.status_code == 200
+    data = r.json()
+    print(f"✓ Providers: {len(data)} items")
+    return data
+
+
+def test_list_economies():
+    """Test GET /economies."""
+    r = requests.get(f"{BASE_URL}/economies/", headers=HEADERS)
+    assert r.status_code == 200
+    data = r.json()
+    print(f"✓ Economies: {len(data)} items")
+    return data
+
+
+def test_adjacent_permissions_merge(provider_id, economy_code):
+    """Test POST /permissions - adjacent grants become one merged range."""
+    grant = {"provider_id": provider_id, "economy_code": economy_code}
+
+    r = requests.post(f"{BASE_URL}/permissions/", headers=HEADERS,
+                      json={**grant, "year_start": 2101, "year_end": 2105})
+    assert r.status_code == 201, r.text
+    first_id = r.json()["id"]
+
+    r = requests.post(f"{BASE_URL}/permissions/", headers=HEADERS,
+                      json={**grant, "year_start": 2106, "year_end": 2110})
+    assert r.status_code == 201, r.text
+    merged_id = r.json()["id"]
+
+    r = requests.get(f"{BASE_URL}/permissions/{merged_id}", headers=HEADERS)
+    assert r.status_code == 200
+    merged = r.json()
+    assert (merged["year_start"], merged["year_end"]) == (2101, 2110), merged
+
+    r = requests.get(f"{BASE_URL}/permissions/{first_id}", headers=HEADERS)
+    assert first_id == merged_id or r.status_code == 404, r.text
+    print(f"✓ Adjacent grants merged: {merged_id} covers 2101-2110")
+
+    # an overlapping grant is merged, not rejected
+    r = requests.post(f"{BASE_URL}/permissions/", headers=HEADERS,
+                      json={**grant, "year_start": 2108, "year_end": 2112})
+    assert r.status_code == 201, r.text
+    merged_id = r.json()["id"]
+
+    r = requests.get(f"{BASE_URL}/permissions/{merged_id}", headers=HEADERS)
+    merged = r.json()
+    assert (merged["year_start"], merged["year_end"]) == (2101, 2112), merged
+    print(f"✓ Overlapping grant merged: {merged_id} covers 2101-2112")
+
+    r = requests.delete(f"{BASE_URL}/permissions/{merged_id}",
+                        headers=HEADERS)
+    assert r.status_code == 200
+    print(f"✓ Deleted permission: {merged_id}")
+
+
+def test_invalid_permission():
+    """Test POST /permissions - unknown economies are client errors."""
+    r = requests.post(f"{BASE_URL}/permissions/", headers=HEADERS, json={
+        "provider_id": 1, "economy_code": "ZZZ",
+        "year_start": 2101, "year_end": 2102
+    })
+    assert r.status_code == 400, r.text
+    print(f"✓ Unknown economy rejected: {r.status_code}")
+
+
+if __name__ == "__main__":
+    print("=== Testing Internal API ===\n")
+
+    test_unauthorized()
+    providers = test_list_providers()
+    economies = test_list_economies()
+
+    scoped = [e for e in economies if not e.get("is_aggregate")]
+    if providers and scoped:
+        test_adjacent_permissions_merge(providers[0]["id"], scoped[0]["code"])
+    else:
+        print("⚠ Skipping permission merge test (no providers or economies)")
+
+    test_invalid_permission()
+
+    print("\n=== Internal tests complete! ===")
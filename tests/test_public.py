@@ -87,6 +87,43 @@ def test_environment_indicators():
     print(f"✓ Environment indicators: {len(data)} items")
 
 
+def test_derived_indicators():
+    """Test GET /indicators/derived - should return derived series."""
+    r = requests.get(f"{BASE_URL}/indicators/derived", params={
+        "series": ["yoy(gdp_per_capita)", "avg(trade, 3)"],
+        "limit": 5
+    })
+    assert r.status_code == 200
+    data = r.json()
+    assert all("yoy(gdp_per_capita)" in row for row in data)
+    print(f"✓ Derived indicators: {len(data)} items")
+
+    r = requests.get(f"{BASE_URL}/indicators/derived",
+                     params={"series": "yoy(unknown)"})
+    assert r.status_code == 400
+
+
+def test_list_catalog():
+    """Test GET /catalog - should return the indicator catalog."""
+    r = requests.get(f"{BASE_URL}/catalog")
+    assert r.status_code == 200
+    data = r.json()
+    assert isinstance(data, list)
+    print(f"✓ Catalog: {len(data)} series")
+
+
+def test_list_series():
+    """Test GET /series - should return long-format series values."""
+    r = requests.get(f"{BASE_URL}/series", params={
+        "indicator": "SP.POP.TOTL",
+        "limit": 5
+    })
+    assert r.status_code == 200
+    data = r.json()
+    assert all(row["indicator_code"] == "SP.POP.TOTL" for row in data)
+    print(f"✓ Series values: {len(data)} items")
+
+
 def test_stats():
     """Test GET /stats - should return database statistics."""
     r = requests.get(f"{BASE_URL}/stats")
@@ -106,5 +143,8 @@ if __name__ == "__main__":
     test_economic_indicators()
     test_health_indicators()
     test_environment_indicators()
+    test_derived_indicators()
+    test_list_catalog()
+    test_list_series()
     test_stats()
     print("\n=== All public tests passed! ===")
@@ -0,0 +1,10 @@
+"""Unit tests of modules that run without a database or server.
+
+Run them from the repository root with `python -m pytest`.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..', '..')))
@@ -0,0 +1,270 @@
+"""Tests of the ASGI adapter and per-surface admission control."""
+
+import asyncio
+import json
+import sys
+
+from flask import Flask, request
+
+from src.asgi import AsgiApp, SurfaceLimiter, surface_of
+from src.deadline import ClientDisconnected, cancel_on_disconnect
+
+
+def http_scope(method: str = 'GET', path: str = '/echo',
+               headers: list = ()) -> dict:
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': b'', 'headers': list(headers),
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+    }
+
+
+async def call(app, scope: dict, chunks=(b'',), disconnect_after=None):
+    """Run `app` with a request body sent in `chunks`, the client stays
+    connected until `disconnect_after` seconds passed (forever if None).
+
+    Returns:
+        (status, headers, body) of the response, status None if nothing was
+        sent.
+    """
+
+    messages = [{'type': 'http.request', 'body': chunk,
+                 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+
+    if not sent:
+        return None, {}, b''
+
+    start = sent[0]
+    assert start['type'] == 'http.response.start'
+    assert not sent[-1].get('more_body')
+    headers = {}
+    for name, value in start['headers']:
+        headers.setdefault(name.decode(), []).append(value.decode())
+    body = b''.join(m.get('body', b'') for m in sent[1:])
+    return start['status'], headers, body
+
+
+def flask_app() -> Flask:
+    app = Flask(__name__)
+
+    @app.route('/echo', methods=['GET', 'POST'])
+    def echo():
+        return {
+            'body': request.get_data(as_text=True),
+            'tags': request.headers.get('X-Tag'),
+            'length': request.content_length,
+        }
+
+    @app.route('/wait')
+    async def wait():
+        try:
+            await cancel_on_disconnect(asyncio.sleep(5))
+        except ClientDisconnected:
+            return 'gone', 499
+        return 'done'
+
+    return app
+
+
+def test_surface_of():
+    assert surface_of('/api/public/economies') == 'public'
+    assert surface_of('/management/users') == 'management'
+    assert surface_of('/status') is None
+
+
+def test_admit_rejects_when_full():
+    async def run():
+        limiter = SurfaceLimiter(None, {'public': 1, 'portal': 0},
+                                 queue_timeout=0.05)
+
+        async with limiter.admit('public') as admitted:
+            assert admitted
+            async with limiter.admit('public') as second:
+                assert not second
+            # unbounded surfaces are always admitted
+            async with limiter.admit('portal') as portal:
+                assert portal
+            async with limiter.admit(None) as other:
+                assert other
+
+        async with limiter.admit('public') as admitted:
+            assert admitted
+
+    asyncio.run(run())
+
+
+def test_limiter_responds_503_with_retry_after():
+    async def run():
+        release = asyncio.Event()
+
+        async def slow(scope, receive, send):
+            await release.wait()
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': []})
+            await send({'type': 'http.response.body', 'body': b'ok'})
+
+        limiter = SurfaceLimiter(slow, {'public': 1}, queue_timeout=0.1)
+        scope = http_scope(path='/api/public/economies')
+
+        first = asyncio.create_task(call(limiter, scope))
+        await asyncio.sleep(0.01)
+        status, headers, body = await call(limiter, scope)
+        assert status == 503
+        assert headers['retry-after'] == ['1']
+        assert json.loads(body)['error'] == 'UNAVAILABLE'
+
+        # other surfaces are not affected
+        release.set()
+        assert (await first)[0] == 200
+        status, _, _ = await call(limiter, http_scope(path='/internal/x'))
+        assert status == 200
+
+    asyncio.run(run())
+
+
+def test_post_body_round_trip():
+    app = AsgiApp(flask_app(), workers=2)
+    chunks = (b'{"a": ', b'1, "b": ', b'"' + b'x' * 100_000 + b'"}')
+    body = b''.join(chunks)
+
+    status, headers, response = asyncio.run(call(
+        app, http_scope('POST', headers=[
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]), chunks))
+
+    assert status == 200
+    assert headers['content-type'] == ['application/json']
+    data = json.loads(response)
+    assert data['body'] == body.decode()
+    assert data['length'] == len(body)
+
+
+def test_head():
+    app = AsgiApp(flask_app(), workers=2)
+
+    status, headers, body = asyncio.run(call(app, http_scope('HEAD')))
+
+    assert status == 200
+    assert int(headers['content-length'][0]) > 0
+    assert body == b''
+
+
+def test_repeated_headers_are_joined():
+    app = AsgiApp(flask_app(), workers=2)
+
+    _, _, body = asyncio.run(call(app, http_scope(headers=[
+        (b'x-tag', b'a'), (b'x-tag', b'b')])))
+
+    assert json.loads(body)['tags'] == 'a,b'
+
+
+def test_body_truncated_to_content_length():
+    def wsgi(environ, start_response):
+        start_response('200 OK', [('Content-Length', '3')])
+        return [b'ab', b'cd', b'ef']
+
+    _, _, body = asyncio.run(call(AsgiApp(wsgi), http_scope()))
+
+    assert body == b'abc'
+
+
+def test_exc_info_replaces_unsent_response():
+    def wsgi(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        try:
+            raise RuntimeError('failed')
+        except RuntimeError:
+            start_response('500 Internal Server Error',
+                           [('Content-Type', 'text/plain')], sys.exc_info())
+        return [b'error']
+
+    status, _, body = asyncio.run(call(AsgiApp(wsgi), http_scope()))
+
+    assert (status, body) == (500, b'error')
+
+
+def test_exc_info_after_response_started_is_raised():
+    def wsgi(environ, start_response):
+        start_response('200 OK', [])
+        yield b'partial'
+        try:
+            raise RuntimeError('failed')
+        except RuntimeError:
+            start_response('500 Internal Server Error', [], sys.exc_info())
+
+    try:
+        asyncio.run(call(AsgiApp(wsgi), http_scope()))
+    except RuntimeError as e:
+        assert str(e) == 'failed'
+    else:
+        raise AssertionError('exc_info was not raised')
+
+
+def test_response_iterable_is_closed():
+    closed = []
+
+    class Output:
+        def __iter__(self):
+            return iter([b'ok'])
+
+        def close(self):
+            closed.append(True)
+
+    def wsgi(environ, start_response):
+        start_response('200 OK', [])
+        return Output()
+
+    status, _, body = asyncio.run(call(AsgiApp(wsgi), http_scope()))
+
+    assert (status, body, closed) == (200, b'ok', [True])
+
+
+def test_disconnect_before_body():
+    called = []
+
+    def wsgi(environ, start_response):
+        called.append(True)
+
+    async def run():
+        sent = []
+        messages = [{'type': 'http.request', 'body': b'a',
+                     'more_body': True},
+                    {'type': 'http.disconnect'}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await AsgiApp(wsgi)(http_scope('POST'), receive, send)
+        return sent
+
+    assert asyncio.run(run()) == []
+    assert not called
+
+
+def test_disconnect_cancels_queries():
+    app = AsgiApp(flask_app(), workers=2)
+
+    status, _, body = asyncio.run(call(app, http_scope(path='/wait'),
+                                       disconnect_after=0.05))
+
+    assert (status, body) == (499, b'gone')
@@ -0,0 +1,197 @@
+"""Tests of the response cache backends and version bookkeeping."""
+
+from contextlib import asynccontextmanager
+
+import pytest
+from flask import Flask
+
+import src.cache
+from src.cache import (ALL_ECONOMIES, INDICATOR_DATA, REFERENCE_DATA,
+                       MemoryCache, SqliteCache, bump_indicators,
+                       create_cache, indicator_data_sets, invalidate)
+from src.handlers.public_handler import PublicHandler
+from src.repo.replicas import ReadFence
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    return create_cache(request.param, str(tmp_path / 'cache.sqlite3'),
+                        1 << 20)
+
+
+def test_get_and_set(cache):
+    assert cache.get('key') is None
+
+    cache.set('key', b'value', 60)
+    assert cache.get('key') == b'value'
+
+    cache.set('key', b'other', 60)
+    assert cache.get('key') == b'other'
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == 5
+
+
+def test_expiry(cache, monkeypatch):
+    cache.set('key', b'value', 60)
+
+    now = src.cache.time()
+    monkeypatch.setattr(src.cache, 'time', lambda: now + 61)
+    assert cache.get('key') is None
+
+
+def test_oversized_values_are_not_cached(cache):
+    cache.set('key', b'x' * ((1 << 20) + 1), 60)
+
+    assert cache.get('key') is None
+
+
+def test_versions(cache):
+    assert cache.versions(['a', 'b']) == (0, 0)
+
+    cache.bump('a')
+    cache.bump('a')
+    assert cache.versions(['a', 'b']) == (2, 0)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_bytes=10)
+    cache.set('a', b'aaaa', 60)
+    cache.set('b', b'bbbb', 60)
+    cache.get('a')
+    cache.set('c', b'cccc', 60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa'
+    assert cache.stats()['bytes'] == 8
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first, second = SqliteCache(path), SqliteCache(path)
+
+    first.set('key', b'value', 60)
+    first.bump(INDICATOR_DATA)
+
+    assert second.get('key') == b'value'
+    assert second.version(INDICATOR_DATA) == 1
+
+
+def test_sqlite_cache_trims_to_budget(tmp_path):
+    cache = SqliteCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10,
+                        trim_interval=1)
+
+    cache.set('short', b'aaaa', 10)
+    cache.set('long', b'bbbb', 60)
+    cache.set('longer', b'cccc', 120)
+
+    # the entries expiring first go
+    assert cache.get('short') is None
+    assert cache.get('long') == b'bbbb'
+    assert cache.get('longer') == b'cccc'
+
+
+def test_sqlite_errors_are_misses(tmp_path):
+    cache = SqliteCache(str(tmp_path / 'cache.sqlite3'))
+    cache._db.close()
+
+    assert cache.get('key') is None
+    cache.set('key', b'value', 60)
+    assert cache.version(INDICATOR_DATA) is None
+    assert cache.versions([INDICATOR_DATA]) is None
+    assert cache.errors == 4
+
+
+def test_indicator_data_sets():
+    assert indicator_data_sets(None) == (INDICATOR_DATA,)
+    assert indicator_data_sets('TUR') == (ALL_ECONOMIES, 'indicators:TUR')
+
+
+def test_bump_indicators():
+    cache = MemoryCache()
+
+    bump_indicators(cache, ['TUR'])
+    assert cache.versions([INDICATOR_DATA, ALL_ECONOMIES, 'indicators:TUR',
+                           'indicators:USA']) == (1, 0, 1, 0)
+
+    bump_indicators(cache)
+    assert cache.versions([INDICATOR_DATA, ALL_ECONOMIES]) == (2, 1)
+
+
+def test_invalidate():
+    cache = MemoryCache()
+
+    invalidate(cache, 'health_indicators', ['TUR'])
+    assert cache.versions([REFERENCE_DATA, 'indicators:TUR']) == (0, 1)
+
+    # economies appear in reference lists and indicator responses
+    invalidate(cache, 'economies')
+    assert cache.versions([REFERENCE_DATA, ALL_ECONOMIES]) == (1, 1)
+
+    invalidate(cache, 'permissions')
+    assert cache.versions([REFERENCE_DATA, INDICATOR_DATA]) == (1, 2)
+
+
+def test_create_cache():
+    assert create_cache('None', '', 1) is None
+    assert isinstance(create_cache('memory', '', 1), MemoryCache)
+    with pytest.raises(ValueError):
+        create_cache('redis', '', 1)
+
+
+class FakeService:
+    """Serves rows, from a replica behind the primary if `lagging`."""
+
+    def __init__(self):
+        self.lagging = False
+        self.fetches = 0
+
+    @asynccontextmanager
+    async def read_fence(self):
+        fence = ReadFence(0)
+        yield fence
+        fence.current = not self.lagging
+
+    async def list_regions(self):
+        self.fetches += 1
+        return [{'code': 'EAS'}]
+
+
+def test_handler_caches_by_version(cache):
+    service = FakeService()
+    handler = PublicHandler(service, cache)
+
+    app = Flask(__name__)
+
+    @app.route('/regions')
+    async def regions():
+        return await handler.respond_reference(service.list_regions)
+
+    client = app.test_client()
+    assert [client.get('/regions').headers['X-Cache']
+            for _ in range(2)] == ['MISS', 'HIT']
+
+    invalidate(cache, 'regions')
+    assert client.get('/regions').headers['X-Cache'] == 'MISS'
+    assert service.fetches == 2
+
+
+def test_handler_skips_lagging_replica_reads(cache):
+    service = FakeService()
+    handler = PublicHandler(service, cache)
+
+    app = Flask(__name__)
+
+    @app.route('/regions')
+    async def regions():
+        return await handler.respond_reference(service.list_regions)
+
+    client = app.test_client()
+    service.lagging = True
+    r = client.get('/regions')
+    assert (r.headers['X-Cache'], r.json) == ('MISS', [{'code': 'EAS'}])
+    assert client.get('/regions').headers['X-Cache'] == 'MISS'
+
+    service.lagging = False
+    assert [client.get('/regions').headers['X-Cache']
+            for _ in range(2)] == ['MISS', 'HIT']
+    assert service.fetches == 3
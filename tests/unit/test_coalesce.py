@@ -0,0 +1,158 @@
+"""Tests of single-flight coalescing."""
+
+import asyncio
+
+import pytest
+
+from src.coalesce import SingleFlight
+from src.deadline import ClientDisconnected, watch_disconnect
+
+
+class Work:
+    """Counts its runs, each run waits until `release` is set."""
+
+    def __init__(self, result='result', error=None):
+        self.result = result
+        self.error = error
+        self.runs = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_share_one_run():
+    async def run():
+        flights = SingleFlight('test')
+        work = Work()
+
+        calls = [asyncio.create_task(flights.do('key', work))
+                 for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+
+        work.release.set()
+        assert await asyncio.gather(*calls) == ['result'] * 5
+        assert work.runs == 1
+        assert flights.coalesced == 4
+        assert flights.in_flight() == 0
+
+        # nothing is kept once the flight landed
+        assert await flights.do('key', work) == 'result'
+        assert work.runs == 2
+
+    asyncio.run(run())
+
+
+def test_keys_are_separate_flights():
+    async def run():
+        flights = SingleFlight('test')
+        a, b = Work('a'), Work('b')
+        a.release.set()
+        b.release.set()
+
+        assert await asyncio.gather(flights.do('a', a),
+                                    flights.do('b', b)) == ['a', 'b']
+        assert (a.runs, b.runs, flights.coalesced) == (1, 1, 0)
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flights = SingleFlight('test')
+        work = Work(error=ValueError('failed'))
+
+        calls = [asyncio.create_task(flights.do('key', work))
+                 for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert work.runs == 1
+        assert flights.in_flight() == 0
+
+    asyncio.run(run())
+
+
+def test_flight_survives_a_cancelled_caller():
+    async def run():
+        flights = SingleFlight('test')
+        work = Work()
+
+        first = asyncio.create_task(flights.do('key', work))
+        second = asyncio.create_task(flights.do('key', work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+
+        work.release.set()
+        assert await second == 'result'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert work.cancelled == 0
+
+    asyncio.run(run())
+
+
+def test_flight_cancelled_when_every_caller_left():
+    async def run():
+        flights = SingleFlight('test')
+        work = Work()
+
+        calls = [asyncio.create_task(flights.do('key', work))
+                 for _ in range(2)]
+        await asyncio.sleep(0)
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert work.cancelled == 1
+        assert flights.in_flight() == 0
+
+        # a later call starts a new flight
+        work.release.set()
+        assert await flights.do('key', work) == 'result'
+        assert work.runs == 2
+
+    asyncio.run(run())
+
+
+def test_disconnected_caller_stops_waiting():
+    async def run():
+        flights = SingleFlight('test')
+        work = Work()
+        disconnected = asyncio.Event()
+
+        async def leaving_client():
+            with watch_disconnect(disconnected):
+                return await flights.do('key', work)
+
+        leaving = asyncio.create_task(leaving_client())
+        staying = asyncio.create_task(flights.do('key', work))
+        await asyncio.sleep(0)
+
+        disconnected.set()
+        with pytest.raises(ClientDisconnected):
+            await leaving
+
+        # the flight does not watch the disconnect of the request that
+        # started it
+        work.release.set()
+        assert await staying == 'result'
+        assert (work.runs, work.cancelled) == (1, 0)
+
+    asyncio.run(run())
@@ -0,0 +1,136 @@
+"""Tests of response compression and compressed cache entries."""
+
+import gzip
+
+from flask import Flask, jsonify
+
+from src.cache import MemoryCache
+from src.compression import ResponseCompressor, parse_accept_encoding
+from src.handlers.public_handler import PublicHandler
+from src.service.public_service import PublicService
+
+
+BODY = b'{"values": [' + b', '.join(b'%d' % i for i in range(500)) + b']}'
+
+
+def gzip_compressor(**kwargs) -> ResponseCompressor:
+    compressor = ResponseCompressor(**kwargs)
+    compressor.encodings = ['gzip']
+    return compressor
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip;q=0.5, BR, identity;q=x') == {
+        'gzip': 0.5, 'br': 1.0, 'identity': 0.0}
+    assert parse_accept_encoding(None) == {}
+
+
+def test_negotiate():
+    compressor = gzip_compressor()
+
+    assert compressor.negotiate('gzip, deflate') == 'gzip'
+    assert compressor.negotiate('*') == 'gzip'
+    assert compressor.negotiate('gzip;q=0') is None
+    assert compressor.negotiate('*, gzip;q=0') is None
+    assert compressor.negotiate('deflate') is None
+    assert compressor.negotiate(None) is None
+
+
+def test_compress_reuses_variants():
+    compressor = gzip_compressor()
+
+    compressed = compressor.compress(BODY, 'gzip')
+    assert gzip.decompress(compressed) == BODY
+    assert compressor.compress(BODY, 'gzip') is compressed
+
+
+def test_compress_without_remembering():
+    compressor = gzip_compressor()
+
+    compressed = compressor.compress(BODY, 'gzip', remember=False)
+    assert gzip.decompress(compressed) == BODY
+    assert compressor.compress(BODY, 'gzip') is not compressed
+
+
+def test_variants_bounded_by_size():
+    compressor = gzip_compressor(cache_bytes=1000)
+    bodies = [BODY + b' ' * i for i in range(20)]
+
+    for body in bodies:
+        compressor.compress(body, 'gzip')
+
+    assert 0 < compressor._size <= 1000
+    assert compressor._size == sum(map(len, compressor._cache.values()))
+    # the most recent variant is kept
+    last = compressor.compress(bodies[-1], 'gzip')
+    assert compressor.compress(bodies[-1], 'gzip') is last
+
+
+def compressing_app(compressor: ResponseCompressor) -> Flask:
+    app = Flask(__name__)
+    app.after_request(compressor.after_request)
+
+    app.add_url_rule('/large', 'large', lambda: jsonify(list(range(500))))
+    app.add_url_rule('/small', 'small', lambda: jsonify([1]))
+    app.add_url_rule('/missing', 'missing',
+                     lambda: (jsonify(list(range(500))), 404))
+    return app
+
+
+def test_after_request():
+    client = compressing_app(gzip_compressor()).test_client()
+
+    r = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert r.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(r.data).startswith(b'[')
+
+    r = client.get('/large')
+    assert 'Content-Encoding' not in r.headers
+    assert r.headers['Vary'] == 'Accept-Encoding'
+
+    r = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in r.headers
+
+    r = client.get('/missing', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in r.headers
+
+
+def test_cached_responses_store_compressed_variants():
+    compressor = gzip_compressor()
+    cache = MemoryCache()
+    handler = PublicHandler(PublicService(None), cache, compressor=compressor)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return list(range(500))
+
+    async def cached():
+        return await handler.respond_reference(fetch)
+
+    app = compressing_app(compressor)
+    app.add_url_rule('/cached', 'cached', cached)
+    client = app.test_client()
+
+    r = client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['X-Cache'] == 'MISS'
+    assert r.headers['Content-Encoding'] == 'gzip'
+    body = gzip.decompress(r.data)
+
+    # the variant is kept in the response cache, not by the compressor
+    assert cache.stats()['entries'] == 2
+    assert not compressor._cache
+
+    r = client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['X-Cache'] == 'HIT'
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert r.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(r.data) == body
+
+    r = client.get('/cached')
+    assert r.headers['X-Cache'] == 'HIT'
+    assert 'Content-Encoding' not in r.headers
+    assert r.data == body
+
+    assert len(fetches) == 1
@@ -0,0 +1,96 @@
+"""Tests of the derived indicator expression parser."""
+
+import pytest
+
+from src.derived import (MAX_EXPRESSIONS, Call, Field, categories, fields,
+                         lookback, parse, parse_all, render, tokenize)
+from src.error import AppError
+
+
+def invalid(text: str) -> str:
+    """Details of the error parsing `text`."""
+    with pytest.raises(AppError) as error:
+        parse(text)
+    assert error.value.name == 'VALIDATION_ERROR'
+    return error.value.details
+
+
+def test_tokenize():
+    assert tokenize(' avg( trade ,5 ) ') == ['avg', '(', 'trade', ',', '5',
+                                             ')']
+
+
+def test_field():
+    assert parse('gdp_per_capita') == Field('gdp_per_capita')
+
+
+def test_calls():
+    assert parse('yoy(gdp_per_capita)') == \
+        Call('yoy', (Field('gdp_per_capita'),))
+    assert parse('AVG(ratio(trade, industry), 5)') == Call(
+        'avg', (Call('ratio', (Field('trade'), Field('industry'))),), 5)
+    assert parse('product(yoy(trade), energy_use)') == Call(
+        'product', (Call('yoy', (Field('trade'),)), Field('energy_use')))
+
+
+@pytest.mark.parametrize('text', [
+    'gdp_per_capita',
+    'yoy(gdp_per_capita)',
+    'avg(ratio(trade,industry),5)',
+    'product(yoy(trade),avg(energy_use,20))',
+])
+def test_render_round_trips(text):
+    assert render(parse(text)) == text
+    assert render(parse(text.upper().replace(',', ' , '))) == text
+
+
+@pytest.mark.parametrize('text, message', [
+    ('', "unexpected end"),
+    ('gdp', "unknown indicator 'gdp'"),
+    ('sum(trade)', "unknown function 'sum'"),
+    ('yoy(trade', "unexpected end"),
+    ('yoy(trade))', "unexpected ')'"),
+    ('yoy trade', "unknown indicator 'yoy'"),
+    ('ratio(trade)', "expected ','"),
+    ('ratio(trade, industry, energy_use)', "expected ')'"),
+    ('5', "expected an indicator or function"),
+    ('yoy(trade) + 1', "unexpected '+ 1'"),
+    ('avg(trade)', "expected ','"),
+    ('avg(trade, 1)', "year count between 2 and 20"),
+    ('avg(trade, 21)', "year count between 2 and 20"),
+    ('avg(trade, industry)', "year count"),
+    ('yoy(avg(trade, 3))', "'avg' can not be nested"),
+    ('avg(ratio(yoy(trade), industry), 3)', "'yoy' can not be nested"),
+])
+def test_invalid(text, message):
+    assert message in invalid(text)
+
+
+def test_parse_all():
+    assert parse_all(['trade', 'yoy(trade)']) == [
+        Field('trade'), Call('yoy', (Field('trade'),))]
+
+    with pytest.raises(AppError, match="at least one"):
+        parse_all([])
+    with pytest.raises(AppError, match=f"at most {MAX_EXPRESSIONS}"):
+        parse_all(['trade'] * (MAX_EXPRESSIONS + 1))
+
+
+def test_fields():
+    assert fields(parse('product(yoy(trade), energy_use)')) == \
+        ['trade', 'energy_use']
+
+
+def test_lookback():
+    assert lookback(parse('trade')) == 0
+    assert lookback(parse('yoy(trade)')) == 1
+    assert lookback(parse('avg(trade, 5)')) == 4
+    assert lookback(parse('ratio(yoy(trade), avg(industry, 3))')) == 2
+
+
+def test_categories():
+    expressions = parse_all(['ratio(energy_use, gdp_per_capita)',
+                             'yoy(trade)'])
+
+    assert categories(expressions) == ['economic_indicators',
+                                       'environment_indicators']
@@ -0,0 +1,128 @@
+"""Tests of portal token signing, verification and caching."""
+
+from time import time
+
+import jwt
+import pytest
+
+import src.jwt_keyring
+from src.jwt_keyring import JwtKeyring, parse_keys
+
+
+def claims(ttl: float = 3600) -> dict:
+    return {'user_id': 1, 'exp': int(time() + ttl)}
+
+
+def test_parse_keys():
+    assert list(parse_keys('new:s2, old:s1')) == ['new', 'old']
+
+    for value in ('new', 'new:', ':s1', 'a:s1,a:s2'):
+        with pytest.raises(ValueError):
+            parse_keys(value)
+
+
+def test_signs_with_first_key():
+    keyring = JwtKeyring({'new': 's2', 'old': 's1'})
+    token = keyring.encode(claims())
+
+    assert jwt.get_unverified_header(token)['kid'] == 'new'
+    assert keyring.decode(token)['user_id'] == 1
+
+
+def test_rotation():
+    old = JwtKeyring({'old': 's1'})
+    token = old.encode(claims())
+
+    # a new key is prepended, tokens of the old one stay valid
+    keyring = JwtKeyring({'new': 's2', 'old': 's1'})
+    assert keyring.decode(token)['user_id'] == 1
+
+    # and are rejected once it is removed, cached or not
+    del keyring.keys['old']
+    with pytest.raises(jwt.InvalidTokenError):
+        keyring.decode(token)
+    assert not keyring._cache
+
+
+def test_replaced_secret_invalidates_cached_tokens():
+    keyring = JwtKeyring({'key': 's1'})
+    token = keyring.encode(claims())
+    keyring.decode(token)
+
+    keyring.keys['key'] = 's2'
+    with pytest.raises(jwt.InvalidSignatureError):
+        keyring.decode(token)
+
+
+def test_legacy_tokens():
+    keyring = JwtKeyring({'new': 's2'}, legacy_secret='legacy')
+
+    token = jwt.encode(claims(), 'legacy', algorithm='HS256')
+    assert keyring.decode(token)['user_id'] == 1
+
+    forged = jwt.encode(claims(), 's2', algorithm='HS256')
+    with pytest.raises(jwt.InvalidSignatureError):
+        keyring.decode(forged)
+
+
+def test_unknown_kid():
+    keyring = JwtKeyring({'new': 's2'})
+    token = jwt.encode(claims(), 's2', algorithm='HS256',
+                       headers={'kid': 'other'})
+
+    with pytest.raises(jwt.InvalidTokenError, match="Unknown signing key"):
+        keyring.decode(token)
+
+
+def test_cached_claims_are_copies():
+    keyring = JwtKeyring({'key': 's1'})
+    token = keyring.encode(claims())
+
+    keyring.decode(token)['user_id'] = 2
+    keyring.decode(token)['user_id'] = 3
+
+    assert keyring.decode(token)['user_id'] == 1
+
+
+def test_cache_expiry(monkeypatch):
+    keyring = JwtKeyring({'key': 's1'})
+    token = keyring.encode(claims(ttl=60))
+    verified = []
+
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        verified.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, 'decode', counting_decode)
+
+    keyring.decode(token)
+    keyring.decode(token)
+    assert len(verified) == 1
+
+    # past `exp` the entry is dropped and the token verified again
+    now = time()
+    monkeypatch.setattr(src.jwt_keyring, 'time', lambda: now + 120)
+    keyring.decode(token)
+    assert len(verified) == 2
+
+
+def test_expired_and_unbounded_tokens_are_not_cached():
+    keyring = JwtKeyring({'key': 's1'})
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        keyring.decode(keyring.encode(claims(ttl=-60)))
+
+    keyring.decode(keyring.encode({'user_id': 1}))
+    assert not keyring._cache
+
+
+def test_cache_size():
+    keyring = JwtKeyring({'key': 's1'}, cache_size=2)
+    tokens = [keyring.encode({**claims(), 'user_id': i}) for i in range(3)]
+
+    for token in tokens:
+        keyring.decode(token)
+
+    assert list(keyring._cache) == tokens[1:]
@@ -0,0 +1,133 @@
+"""Tests of password hashing and the rehash of outdated hashes on login."""
+
+import asyncio
+
+import pytest
+
+from src.service.password_hasher import PasswordHasher
+from src.service.user_service import UserService
+
+
+# cheap parameters, the tests check behavior rather than cost
+def hasher(work_factor: int = 4) -> PasswordHasher:
+    return PasswordHasher(work_factor=work_factor, workers=1)
+
+
+def test_hash_and_verify():
+    h = hasher()
+    stored = h.hash_sync('secret')
+
+    assert stored.startswith('scrypt$4$8$1$')
+    assert h.is_hashed(stored)
+    assert h.verify_sync('secret', stored)
+    assert not h.needs_rehash(stored)
+
+
+def test_hashes_are_salted():
+    h = hasher()
+
+    assert h.hash_sync('secret') != h.hash_sync('secret')
+
+
+def test_wrong_password():
+    h = hasher()
+    stored = h.hash_sync('secret')
+
+    assert not h.verify_sync('Secret', stored)
+    assert not h.verify_sync('', stored)
+
+
+def test_malformed_hash():
+    h = hasher()
+
+    assert not h.verify_sync('secret', 'scrypt$4$8$1$salt')
+    assert not h.verify_sync('secret', 'scrypt$x$8$1$c2FsdA$aGFzaA')
+
+
+def test_needs_rehash_on_parameter_change():
+    stored = hasher(work_factor=4).hash_sync('secret')
+
+    stronger = hasher(work_factor=5)
+    assert stronger.needs_rehash(stored)
+    # hashes with other parameters still verify
+    assert stronger.verify_sync('secret', stored)
+
+    assert PasswordHasher(work_factor=4, block_size=4).needs_rehash(stored)
+    assert PasswordHasher(work_factor=4, parallelism=2).needs_rehash(stored)
+
+
+def test_legacy_plain_text():
+    h = hasher()
+
+    assert not h.is_hashed('secret')
+    assert h.needs_rehash('secret')
+    assert h.verify_sync('secret', 'secret')
+    assert not h.verify_sync('other', 'secret')
+
+
+def test_async_hash_and_verify():
+    h = hasher()
+
+    async def run():
+        stored = await h.hash('secret')
+        return (await h.verify('secret', stored),
+                await h.verify('other', stored),
+                await h.verify('secret', 'secret'))
+
+    assert asyncio.run(run()) == (True, False, True)
+
+
+class FakeUserRepo:
+    """In-memory users, recording password resets."""
+
+    def __init__(self, password: str):
+        self.user = {'id': 1, 'email': 'user@example.com',
+                     'password': password}
+        self.resets = []
+
+    async def get_user_by_email(self, email):
+        return dict(self.user) if email == self.user['email'] else None
+
+    async def reset_password(self, id, password):
+        self.resets.append(id)
+        self.user['password'] = password
+
+
+def user_service(repo: FakeUserRepo, h: PasswordHasher) -> UserService:
+    service = UserService(None, h)
+    service.repo = repo
+    return service
+
+
+@pytest.mark.parametrize('stored', [
+    'secret',                                   # legacy plain text
+    hasher(work_factor=3).hash_sync('secret'),  # outdated parameters
+])
+def test_login_rehashes(stored):
+    h = hasher()
+    repo = FakeUserRepo(stored)
+    service = user_service(repo, h)
+
+    user = asyncio.run(service.authenticate('user@example.com', 'secret'))
+
+    assert user['id'] == 1
+    assert repo.resets == [1]
+    assert not h.needs_rehash(repo.user['password'])
+    assert h.verify_sync('secret', repo.user['password'])
+
+    # the upgraded hash is kept
+    asyncio.run(service.authenticate('user@example.com', 'secret'))
+    assert repo.resets == [1]
+
+
+def test_failed_login_does_not_rehash():
+    h = hasher()
+    repo = FakeUserRepo('secret')
+    service = user_service(repo, h)
+
+    assert asyncio.run(service.authenticate('user@example.com', 'other')) \
+        is None
+    assert asyncio.run(service.authenticate('nobody@example.com',
+                                            'secret')) is None
+    assert repo.resets == []
+    assert repo.user['password'] == 'secret'